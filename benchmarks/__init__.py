@@ -0,0 +1,6 @@
+# benchmarks/__init__.py
+"""
+Stand-alone performance benchmarks for the core handlers.
+Run them from the project root, e.g. >> python -m benchmarks.db_profiles
+Every benchmark works on a scratch database and never touches database/goods_system.db.
+"""
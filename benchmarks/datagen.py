@@ -0,0 +1,130 @@
+# benchmarks/datagen.py
+
+"""
+Deterministic synthetic data for a scratch database (same seed + sizes = same rows).
+
+>> N branches, M goods, warehouse + branch stock
+>> millions of sales, distributions and imports spread over a date range
+>> a few users (password = username + "-pw"), bcrypt-hashed when bcrypt is installed
+
+usage: python -m benchmarks.datagen scratch.db --branches 50 --goods 10000 --sales 2000000
+"""
+
+import argparse
+import logging
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterator
+
+from core import db_manager
+
+START_DATE = datetime(2023, 1, 1)
+DAYS = 730
+CHUNK = 50_000
+
+DEFAULT_SIZES = {
+    "branches": 20,
+    "goods": 2_000,
+    "users": 10,
+    "sales": 200_000,
+    "distributions": 50_000,
+    "imports": 20_000,
+}
+
+
+def _timestamps(rng: random.Random, count: int) -> Iterator[str]:
+    # Sorted, like a real append-only log
+    step = DAYS * 86400 / max(count, 1)
+    for i in range(count):
+        moment = START_DATE + timedelta(seconds=int(i * step + rng.random() * step))
+        yield moment.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _chunked_insert(conn, sql: str, rows: Iterator[tuple]) -> None:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= CHUNK:
+            conn.executemany(sql, batch)
+            conn.commit()
+            batch = []
+    if batch:
+        conn.executemany(sql, batch)
+        conn.commit()
+
+
+def user_password(username: str) -> str:
+    return f"{username}-pw"
+
+
+def generate(db_path: str, seed: int = 42, profile: str = "fast", **sizes: int) -> Dict[str, int]:
+    """
+    Creates (or appends to) the scratch database at db_path and points the pool at it.
+    >> sizes: branches, goods, users, sales, distributions, imports (see DEFAULT_SIZES)
+    >> return: the sizes actually used
+    """
+    sizes = {**DEFAULT_SIZES, **{k: v for k, v in sizes.items() if v is not None}}
+    rng = random.Random(seed)
+    db_manager.configure_database(db_path, profile)
+    conn = db_manager.get_connection()
+    b, g = sizes["branches"], sizes["goods"]
+
+    try:
+        import bcrypt
+        hash_pw = lambda pw: bcrypt.hashpw(pw.encode("utf-8"), bcrypt.gensalt(rounds=10)).decode("utf-8")
+    except ImportError:  # legacy plaintext passwords are still accepted by authenticate_user
+        hash_pw = lambda pw: pw
+    conn.executemany("INSERT INTO users (username, password, role) VALUES (?, ?, ?)",
+                     [(f"user{u}", hash_pw(user_password(f"user{u}")), "ADMIN" if u == 1 else "STAFF")
+                      for u in range(1, sizes["users"] + 1)])
+    conn.executemany("INSERT INTO branches (name, location) VALUES (?, ?)",
+                     [(f"Branch {i:04d}", f"District {rng.randint(1, 40)}") for i in range(1, b + 1)])
+    conn.executemany("INSERT INTO goods (name, quantity, price) VALUES (?, ?, ?)",
+                     [(f"Good {i:06d}", 1_000_000, round(rng.uniform(0.5, 500.0), 2)) for i in range(1, g + 1)])
+    conn.executemany("INSERT INTO branch_inventories (branch_id, good_id, quantity) VALUES (?, ?, ?)",
+                     [(bi, gi, 1_000_000) for bi in range(1, b + 1) for gi in range(1, min(g, 200) + 1)])
+    conn.commit()
+
+    # Popular goods sell more: skewed good ids
+    def skewed_good() -> int:
+        return min(g, int(rng.paretovariate(1.2))) if rng.random() < 0.7 else rng.randint(1, g)
+
+    users = sizes["users"]
+    _chunked_insert(conn, """
+        INSERT INTO sales (good_id, quantity, sale_date, sold_by_user_id, branch_id) VALUES (?, ?, ?, ?, ?)
+    """, ((skewed_good(), rng.randint(1, 5), ts, rng.randint(1, users), rng.randint(1, b))
+          for ts in _timestamps(rng, sizes["sales"])))
+    _chunked_insert(conn, """
+        INSERT INTO distributions (good_id, from_branch_id, to_branch_id, quantity, distribution_date, distributed_by_user_id)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, ((skewed_good(), None if rng.random() < 0.8 else rng.randint(1, b), rng.randint(1, b),
+           rng.randint(10, 200), ts, rng.randint(1, users))
+          for ts in _timestamps(rng, sizes["distributions"])))
+    _chunked_insert(conn, """
+        INSERT INTO imported_goods (good_name, quantity, price, import_date, import_place, import_cost)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, ((f"Good {rng.randint(1, g):06d}", q, round(rng.uniform(0.5, 500.0), 2), ts[:10],
+           f"Supplier {rng.randint(1, 30)}", round(q * rng.uniform(0.3, 300.0), 2))
+          for q, ts in ((rng.randint(10, 1000), ts) for ts in _timestamps(rng, sizes["imports"]))))
+    conn.execute("ANALYZE")
+    return sizes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("db_path")
+    parser.add_argument("--seed", type=int, default=42)
+    for name, default in DEFAULT_SIZES.items():
+        parser.add_argument(f"--{name}", type=int, default=default)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    t0 = time.perf_counter()
+    sizes = generate(args.db_path, args.seed, **{k: getattr(args, k) for k in DEFAULT_SIZES})
+    print(f"generated {sizes} in {time.perf_counter() - t0:.1f}s")
+    db_manager.close_all_connections()
+
+
+if __name__ == "__main__":
+    main()
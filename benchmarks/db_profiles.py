@@ -0,0 +1,87 @@
+# benchmarks/db_profiles.py
+
+"""
+Sales-per-second for every SQLite performance profile in core.db_manager.
+
+>> Builds a scratch database per profile with the real schema (migrations),
+>> stocks one branch, then records sales through core.sales_handler.record_sale,
+>> optionally from several threads at once (simulating several terminals).
+
+usage: python -m benchmarks.db_profiles [--sales 5000] [--threads 1] [--profiles legacy balanced]
+"""
+
+import argparse
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from core import db_manager
+from core.sales_handler import record_sale
+
+GOODS = 50
+
+
+def _prepare(profile: str, directory: str, stock: int) -> None:
+    db_path = os.path.join(directory, f"bench_{profile}.db")
+    db_manager.configure_database(db_path, profile)
+    with db_manager.get_connection() as conn:
+        conn.execute("INSERT INTO branches (id, name, location) VALUES (1, 'Bench', 'Nowhere')")
+        conn.executemany(
+            "INSERT INTO goods (id, name, quantity, price) VALUES (?, ?, 0, 1.0)",
+            [(g, f"good-{g}") for g in range(1, GOODS + 1)]
+        )
+        conn.executemany(
+            "INSERT INTO branch_inventories (branch_id, good_id, quantity) VALUES (1, ?, ?)",
+            [(g, stock) for g in range(1, GOODS + 1)]
+        )
+
+
+def run_profile(profile: str, sales: int, threads: int, directory: str) -> dict:
+    _prepare(profile, directory, stock=sales)
+    per_thread = sales // threads
+    failures = []
+
+    def worker(offset: int) -> None:
+        for i in range(per_thread):
+            result = record_sale((offset + i) % GOODS + 1, 1, 1, None)
+            if not result["success"]:
+                failures.append(result)
+
+    workers = [threading.Thread(target=worker, args=(t * per_thread,)) for t in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - start
+    done = per_thread * threads
+    return {
+        "profile": profile,
+        "sales": done,
+        "threads": threads,
+        "seconds": round(elapsed, 3),
+        "sales_per_second": round(done / elapsed, 1) if elapsed else None,
+        "failures": len(failures),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sales", type=int, default=5000)
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument("--profiles", nargs="*", default=list(db_manager.PERFORMANCE_PROFILES))
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"{'profile':<10} {'threads':>7} {'sales':>8} {'seconds':>9} {'sales/s':>10} {'failed':>7}")
+        for profile in args.profiles:
+            r = run_profile(profile, args.sales, args.threads, directory)
+            print(f"{r['profile']:<10} {r['threads']:>7} {r['sales']:>8} {r['seconds']:>9} {r['sales_per_second']:>10} {r['failures']:>7}")
+        db_manager.close_all_connections()
+
+
+if __name__ == "__main__":
+    main()
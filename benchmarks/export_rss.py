@@ -0,0 +1,67 @@
+# benchmarks/export_rss.py
+
+"""
+Memory profile of core.export_handler: RSS must stay flat while exporting millions of rows.
+
+>> Fills a scratch database with --rows synthetic sales (benchmarks.datagen, streamed in),
+>> exports them to CSV / JSONL (gzip), sampling the process RSS after every batch.
+
+usage: python -m benchmarks.export_rss [--rows 5000000] [--format csv] [--gzip]
+"""
+
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+from benchmarks import datagen
+from core import db_manager
+from core.export_handler import export_dataset
+
+
+def current_rss_mb() -> float:
+    # Anonymous RSS only: pages of the database file mapped via PRAGMA mmap_size are
+    # shared page cache, not memory held by the export, so they are left out.
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("RssAnon:"):
+                    return int(line.split()[1]) / 1e3
+    except OSError:
+        pass
+    import resource  # not Linux: fall back to peak RSS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1e6 if os.uname().sysname == "Darwin" else peak / 1e3
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--format", dest="fmt", choices=("csv", "jsonl"), default="csv")
+    parser.add_argument("--gzip", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    with tempfile.TemporaryDirectory() as directory:
+        t0 = time.perf_counter()
+        datagen.generate(os.path.join(directory, "export.db"), sales=args.rows, distributions=1000, imports=1000)
+        print(f"filled {args.rows} sales in {time.perf_counter() - t0:.1f}s")
+
+        samples = []
+        out = os.path.join(directory, f"sales.{args.fmt}" + (".gz" if args.gzip else ""))
+        rss_before = current_rss_mb()
+        t0 = time.perf_counter()
+        result = export_dataset("sales", out, args.fmt, progress=lambda n: samples.append((n, current_rss_mb())))
+        elapsed = time.perf_counter() - t0
+        print(f"exported {result.get('rows')} rows in {elapsed:.1f}s ({result.get('rows', 0) / elapsed:,.0f} rows/s), "
+              f"file {os.path.getsize(out) / 1e6:.1f} MB")
+        print(f"RSS before export: {rss_before:.1f} MB")
+        for n, rss in samples[:: max(1, len(samples) // 10)]:
+            print(f"  after {n:>9} rows: {rss:.1f} MB")
+        print(f"RSS peak during export: {max(r for _, r in samples):.1f} MB")
+        db_manager.close_all_connections()
+
+
+if __name__ == "__main__":
+    main()
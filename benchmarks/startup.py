@@ -0,0 +1,150 @@
+# benchmarks/startup.py
+
+"""
+Cold-start time of the application, and a check that heavy imports stay off the startup path.
+
+>> Every run is a fresh interpreter: `python -X importtime` imports main (and, when a display
+   is available, builds the login window), so nothing is shared between runs.
+>> Reports the median wall time from process start to "login window ready" (or to "main imported"
+   without a display), the import time of main and the heaviest modules by self time.
+>> Budgets: IMPORT_BUDGET_MS for importing main, WINDOW_BUDGET_MS for the login window.
+>> DEFERRED_MODULES must not be imported at startup: matplotlib/numpy (charts), bcrypt (first
+   login), and every screen behind the login window.
+>> --check exits with 1 when a budget is exceeded or a deferred module was imported
+   (use it as the startup regression test).
+
+usage: python -m benchmarks.startup [--runs 5] [--no-window] [--check]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+IMPORT_BUDGET_MS = 400
+WINDOW_BUDGET_MS = 1000
+
+DEFERRED_MODULES = (
+    "matplotlib",
+    "numpy",
+    "bcrypt",
+    "utils.chart_utils",
+    "ui.main_menu",
+    "ui.statistics",
+    "ui.settings",
+    "ui.view_goods",
+    "ui.view_branch_inventory",
+    "ui.virtual_table",
+    "ui.add_goods",
+    "ui.record_import",
+    "ui.sales_screen",
+    "ui.distribute_goods",
+    "ui.branch_manager",
+)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in the child interpreter; prints one JSON line once the login window is ready
+_CHILD = """
+import json, sys
+import main
+deferred = {deferred!r}
+result = {{"loaded": [m for m in deferred if m in sys.modules], "window": False}}
+if {window!r}:
+    try:
+        root = main.tk.Tk()
+    except Exception:
+        root = None  # no display
+    if root is not None:
+        root.withdraw()
+        login = main.LoginScreen(root)
+        login.window.deiconify()
+        root.update()
+        result["window"] = True
+        result["loaded"] = [m for m in deferred if m in sys.modules]
+print(json.dumps(result), flush=True)
+"""
+
+
+def _parse_importtime(stderr: str) -> Dict[str, tuple]:
+    """`import time: self | cumulative | name` lines >> {name: (self_us, cumulative_us, depth)}"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules[name.strip()] = (int(self_us), int(cumulative_us), depth)
+    return modules
+
+
+def run_once(window: bool) -> Dict:
+    """One cold start in a fresh interpreter."""
+    code = _CHILD.format(deferred=DEFERRED_MODULES, window=window)
+    t0 = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-X", "importtime", "-c", code], cwd=PROJECT_ROOT,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    line = proc.stdout.readline()
+    ready_ms = (time.perf_counter() - t0) * 1000
+    proc.stdout.close()
+    stderr = proc.stderr.read()
+    proc.wait()
+    if proc.returncode != 0 or not line:
+        raise RuntimeError(f"startup failed:\n{stderr[-2000:]}")
+    modules = _parse_importtime(stderr)
+    return {
+        "ready_ms": ready_ms,
+        "import_main_ms": modules.get("main", (0, 0, 0))[1] / 1000,
+        "modules": modules,
+        **json.loads(line),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--no-window", action="store_true", help="only import main, do not build the login window")
+    parser.add_argument("--top", type=int, default=10, help="heaviest modules to list")
+    parser.add_argument("--import-budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    parser.add_argument("--window-budget-ms", type=float, default=WINDOW_BUDGET_MS)
+    parser.add_argument("--check", action="store_true", help="exit with 1 on a budget overrun or an eager heavy import")
+    args = parser.parse_args()
+
+    runs = [run_once(not args.no_window) for _ in range(args.runs)]
+    window = all(run["window"] for run in runs)
+    median_run = sorted(runs, key=lambda run: run["ready_ms"])[len(runs) // 2]
+    heaviest: List[tuple] = sorted(median_run["modules"].items(), key=lambda item: item[1][0], reverse=True)[:args.top]
+    report = {
+        "python": sys.version.split()[0],
+        "runs": args.runs,
+        "login_window": window,
+        "ready_ms_median": round(statistics.median(run["ready_ms"] for run in runs), 1),
+        "import_main_ms_median": round(statistics.median(run["import_main_ms"] for run in runs), 1),
+        "budget_ms": {"import_main": args.import_budget_ms, "login_window": args.window_budget_ms if window else None},
+        "eager_deferred_imports": sorted({m for run in runs for m in run["loaded"]}),
+        "heaviest_self_ms": {name: round(self_us / 1000, 2) for name, (self_us, _, _) in heaviest},
+    }
+    print(json.dumps(report, indent=2))
+    if not window and not args.no_window:
+        print("(no display: login window not built, only the import of main was timed)")
+
+    if args.check:
+        problems = []
+        if report["import_main_ms_median"] > args.import_budget_ms:
+            problems.append(f"import main took {report['import_main_ms_median']} ms (budget {args.import_budget_ms} ms)")
+        if window and report["ready_ms_median"] > args.window_budget_ms:
+            problems.append(f"login window ready after {report['ready_ms_median']} ms (budget {args.window_budget_ms} ms)")
+        for module in report["eager_deferred_imports"]:
+            problems.append(f"{module} is imported at startup (must be deferred until first use)")
+        if problems:
+            print("STARTUP REGRESSIONS:\n  " + "\n  ".join(problems))
+            raise SystemExit(1)
+        print("startup within budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# benchmarks/stock_contention.py
+
+"""
+Oversell check + latency for record_sale under concurrent terminals.
+
+>> Many threads sell the same good from the same branch until stock runs out.
+>> Afterwards:  units sold (sales rows) + remaining stock  MUST equal the initial stock.
+>> Compares the atomic conditional UPDATE in core.sales_handler with the old
+   read-modify-write flow (SELECT quantity, compare in Python, UPDATE with the computed value).
+
+usage: python -m benchmarks.stock_contention [--threads 16] [--stock 2000] [--per-thread 200]
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from core import db_manager
+from core.db_manager import get_connection
+from core.sales_handler import record_sale
+
+
+def read_modify_write_sale(good_id: int, branch_id: int, quantity: int, user_id) -> dict:
+    """The pre-atomic implementation, kept here only as a baseline."""
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT quantity FROM branch_inventories WHERE branch_id = ? AND good_id = ?", (branch_id, good_id))
+            row = cursor.fetchone()
+            if not row:
+                return {"success": False, "reason": "No inventory record."}
+            if row[0] < quantity:
+                return {"success": False, "reason": "Insufficient stock", "available": row[0]}
+            cursor.execute("UPDATE branch_inventories SET quantity = ? WHERE branch_id = ? AND good_id = ?",
+                           (row[0] - quantity, branch_id, good_id))
+            cursor.execute("INSERT INTO sales (good_id, quantity, sale_date, sold_by_user_id, branch_id) VALUES (?, ?, ?, ?, ?)",
+                           (good_id, quantity, datetime.now().strftime("%Y-%m-%d %H:%M:%S"), user_id, branch_id))
+            conn.commit()
+            return {"success": True}
+    except Exception as e:
+        return {"success": False, "reason": str(e)}
+
+
+def run(sale_func, label: str, threads: int, stock: int, per_thread: int, directory: str) -> dict:
+    db_manager.configure_database(os.path.join(directory, f"contention_{label}.db"))
+    with get_connection() as conn:
+        conn.execute("INSERT INTO branches (id, name, location) VALUES (1, 'Bench', 'Nowhere')")
+        conn.execute("INSERT INTO goods (id, name, quantity, price) VALUES (1, 'Widget', 0, 1.0)")
+        conn.execute("INSERT INTO branch_inventories (branch_id, good_id, quantity) VALUES (1, 1, ?)", (stock,))
+
+    latencies: list[float] = []
+    errors: list[str] = []
+    lock = threading.Lock()
+
+    def worker() -> None:
+        local = []
+        for _ in range(per_thread):
+            t0 = time.perf_counter()
+            result = sale_func(1, 1, 1, None)
+            local.append(time.perf_counter() - t0)
+            if not result["success"] and result.get("reason") != "Insufficient stock":
+                errors.append(result.get("reason", "?"))
+        with lock:
+            latencies.extend(local)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+
+    with get_connection() as conn:
+        sold = conn.execute("SELECT COALESCE(SUM(quantity), 0) FROM sales").fetchone()[0]
+        left = conn.execute("SELECT quantity FROM branch_inventories WHERE branch_id = 1 AND good_id = 1").fetchone()[0]
+    latencies.sort()
+    return {
+        "variant": label,
+        "sold": sold,
+        "left": left,
+        "oversold": sold + left != stock,
+        "errors": len(errors),
+        "p50_ms": round(statistics.median(latencies) * 1000, 3),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--stock", type=int, default=2000)
+    parser.add_argument("--per-thread", type=int, default=200)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL)
+    with tempfile.TemporaryDirectory() as directory:
+        for label, func in (("atomic", record_sale), ("read-modify-write", read_modify_write_sale)):
+            r = run(func, label, args.threads, args.stock, args.per_thread, directory)
+            print(f"{r['variant']:<18} sold={r['sold']:<6} left={r['left']:<6} oversold={r['oversold']!s:<5} "
+                  f"errors={r['errors']:<5} p50={r['p50_ms']}ms p95={r['p95_ms']}ms")
+        db_manager.close_all_connections()
+
+
+if __name__ == "__main__":
+    main()
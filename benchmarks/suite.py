@@ -0,0 +1,173 @@
+# benchmarks/suite.py
+
+"""
+End-to-end benchmark of the core handlers on a generated scratch database.
+
+>> Generates data with benchmarks.datagen (deterministic), then times:
+   record_sale, record_sales_bulk, distribute_goods, get_stock, add_good,
+   the statistics_handler queries and authenticate_user (bcrypt verification; skipped,
+   with a note in the report, when bcrypt is not installed: datagen then stores plaintext
+   passwords and the timing would say nothing about login cost).
+>> Reports ops/second and p50/p95/p99 latency per operation as JSON.
+>> --compare old.json flags operations whose p50 got slower than --tolerance.
+
+usage: python -m benchmarks.suite [--sales 1000000] [--output run.json] [--compare baseline.json]
+"""
+
+import argparse
+import importlib.util
+import json
+import logging
+import os
+import platform
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List
+
+from benchmarks import datagen
+from core import db_manager
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def measure(func: Callable, calls: Iterable[tuple]) -> Dict:
+    """Runs func(*args) for every args tuple; returns count, ops/s and latency percentiles in ms."""
+    latencies = []
+    failures = 0
+    for args in calls:
+        t0 = time.perf_counter()
+        result = func(*args)
+        latencies.append(time.perf_counter() - t0)
+        if result is False or result is None or (isinstance(result, dict) and result.get("success") is False):
+            failures += 1
+    latencies.sort()
+    total = sum(latencies)
+    return {
+        "count": len(latencies),
+        "failures": failures,
+        "ops_per_sec": round(len(latencies) / total, 1) if total else None,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 4),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 4),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 4),
+        "max_ms": round(latencies[-1] * 1000, 4) if latencies else 0.0,
+    }
+
+
+def run_suite(sizes: Dict[str, int], iterations: int, seed: int) -> Dict:
+    from core.distribution_handler import distribute_goods, get_stock
+    from core.goods_handler import add_good
+    from core.sales_handler import record_sale, record_sales_bulk
+    from core import statistics_handler
+
+    rng = random.Random(seed)
+    b, g = sizes["branches"], min(sizes["goods"], 200)  # branch stock exists for the first 200 goods
+    results: Dict[str, Dict] = {}
+
+    results["record_sale"] = measure(record_sale, [
+        (rng.randint(1, g), rng.randint(1, b), 1, 1) for _ in range(iterations)
+    ])
+    results["record_sales_bulk[1000 lines]"] = measure(record_sales_bulk, [
+        ([(rng.randint(1, g), rng.randint(1, b), 1, 1, None) for _ in range(1000)],) for _ in range(max(1, iterations // 100))
+    ])
+    results["distribute_goods"] = measure(distribute_goods, [
+        (rng.randint(1, g), None, rng.randint(1, b), 1, 1) for _ in range(iterations)
+    ])
+    results["get_stock"] = measure(get_stock, [
+        (rng.randint(1, g), rng.randint(1, b)) for _ in range(iterations)
+    ])
+    results["add_good"] = measure(add_good, [
+        (f"Bench good {i:06d}", 10, 9.99) for i in range(iterations)
+    ])
+    stats_runs = max(3, iterations // 200)
+    results["get_sales_by_branch"] = measure(statistics_handler.get_sales_by_branch, [()] * stats_runs)
+    results["get_distribution_history_page"] = measure(statistics_handler.get_distribution_history_page, [()] * stats_runs)
+    results["get_distribution_history[full]"] = measure(statistics_handler.get_distribution_history, [()] * 3)
+    results["get_branch_inventory"] = measure(statistics_handler.get_branch_inventory, [()] * stats_runs)
+
+    # core.auth imports bcrypt only inside authenticate_user, so importing it proves nothing
+    if importlib.util.find_spec("bcrypt") is None:
+        results["authenticate_user"] = {"skipped": "bcrypt is not installed (datagen stored plaintext passwords)"}
+    else:
+        from core.auth import authenticate_user
+        users = sizes["users"]
+        results["authenticate_user"] = measure(authenticate_user, [
+            (f"user{u}", datagen.user_password(f"user{u}")) for u in (rng.randint(1, users) for _ in range(min(iterations, 50)))
+        ])
+    return results
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Lists operations whose p50 grew by more than tolerance (0.2 = 20%) against the baseline run."""
+    regressions = []
+    for name, now in current["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if not before or "p50_ms" not in now or "p50_ms" not in before or not before["p50_ms"]:
+            continue
+        ratio = now["p50_ms"] / before["p50_ms"]
+        if ratio > 1 + tolerance:
+            regressions.append(f"{name}: p50 {before['p50_ms']}ms -> {now['p50_ms']}ms (x{ratio:.2f})")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--iterations", type=int, default=2000, help="calls per timed operation")
+    parser.add_argument("--profile", default=db_manager.DEFAULT_PROFILE, choices=list(db_manager.PERFORMANCE_PROFILES))
+    for name, default in datagen.DEFAULT_SIZES.items():
+        parser.add_argument(f"--{name}", type=int, default=default)
+    parser.add_argument("--output", help="write the JSON report to this file (default: stdout)")
+    parser.add_argument("--compare", help="baseline JSON report to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p50 slowdown vs baseline (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL)
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, "bench.db")
+        t0 = time.perf_counter()
+        sizes = datagen.generate(db_path, args.seed, profile="fast", **{k: getattr(args, k) for k in datagen.DEFAULT_SIZES})
+        generate_seconds = time.perf_counter() - t0
+        # time the handlers with the profile under test, not the bulk-load profile
+        db_manager.configure_database(db_path, args.profile)
+        results = run_suite(sizes, args.iterations, args.seed)
+        db_manager.close_all_connections()
+
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "profile": args.profile,
+        "seed": args.seed,
+        "iterations": args.iterations,
+        "sizes": sizes,
+        "generate_seconds": round(generate_seconds, 2),
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"report written to {args.output}")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        if regressions:
+            print("REGRESSIONS:\n  " + "\n  ".join(regressions))
+            raise SystemExit(1)
+        print("no regressions against", args.compare)
+
+
+if __name__ == "__main__":
+    main()
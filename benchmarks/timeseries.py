@@ -0,0 +1,63 @@
+# benchmarks/timeseries.py
+
+"""
+Speed of core.timeseries.aggregate on synthetic sales columns (no database involved).
+
+>> Generates --rows sales (2 years of timestamps, --branches, --goods) as NumPy columns,
+   then times every period (daily / weekly / monthly) grouped by branch and by good.
+>> --check exits with 1 if any aggregation takes longer than BUDGET_MS.
+
+usage: python -m benchmarks.timeseries [--rows 10000000] [--check]
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from core.timeseries import PERIODS, aggregate
+
+BUDGET_MS = 1000
+START = 1672531200  # 2023-01-01
+END = 1735689600    # 2025-01-01
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--branches", type=int, default=50)
+    parser.add_argument("--goods", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--budget-ms", type=float, default=BUDGET_MS)
+    parser.add_argument("--check", action="store_true", help="exit with 1 if an aggregation exceeds the budget")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    columns = {
+        "ts": rng.integers(START, END, args.rows, dtype=np.int64),
+        "branch": rng.integers(1, args.branches + 1, args.rows, dtype=np.int32),
+        "good": rng.integers(1, args.goods + 1, args.rows, dtype=np.int32),
+        "qty": rng.integers(1, 20, args.rows, dtype=np.int32),
+    }
+
+    report = {"rows": args.rows, "budget_ms": args.budget_ms, "aggregate_ms": {}}
+    for period in PERIODS:
+        for by in ("branch", "good"):
+            t0 = time.perf_counter()
+            result = aggregate(columns, period, by)
+            elapsed = (time.perf_counter() - t0) * 1000
+            assert result["totals"].sum() == columns["qty"].sum()
+            report["aggregate_ms"][f"{period}/{by}"] = round(elapsed, 1)
+    print(json.dumps(report, indent=2))
+
+    if args.check:
+        slow = [name for name, ms in report["aggregate_ms"].items() if ms > args.budget_ms]
+        if slow:
+            print("OVER BUDGET: " + ", ".join(slow))
+            raise SystemExit(1)
+        print("all aggregations within budget")
+
+
+if __name__ == "__main__":
+    main()
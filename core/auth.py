@@ -7,8 +7,8 @@ I also use bcrypt for password hashing and verification. maybe switch to sha256
 """
 
 import logging
-import bcrypt
 from core.db_manager import get_connection
+from core.instrumentation import instrument_module
 
 def authenticate_user(username: str, password: str) -> tuple | None:
     """
@@ -39,7 +39,8 @@ def authenticate_user(username: str, password: str) -> tuple | None:
             # Check if stored_password looks like a bcrypt hash:
             # bcrypt hashes typically start with $2b$ or $2a$ or $2y$...
             if stored_password and stored_password.startswith("$2"):
-                # Hashed password case
+                # Hashed password case (bcrypt is imported here, not at startup)
+                import bcrypt
                 if bcrypt.checkpw(password.encode('utf-8'), stored_password.encode('utf-8')): #must use encode to convert to bytes 
                     return (user_id, role)
                 else:
@@ -78,6 +79,7 @@ def register_user(username: str, password: str) -> tuple[bool, str]:
                 return False, "Username already exists."
 
             # Hash the password using bcrypt
+            import bcrypt
             hashed_pw = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
 
             # Insert new user with hashed password
@@ -91,3 +93,6 @@ def register_user(username: str, password: str) -> tuple[bool, str]:
     except Exception as e:
         logging.error(f"Error registering user '{username}': {e}", exc_info=True)
         return False, "Registration failed due to an internal error."
+
+
+instrument_module(__name__)
@@ -5,13 +5,14 @@ Branch handler module to handle branch-related operations, including adding, edi
 """
 import logging
 from core.db_manager import get_connection, update_branch, delete_branch
+from core.instrumentation import instrument_module
 from typing import List, Tuple
 
 def get_all_branches() -> List[Tuple]: # a type hint in Python to specify that the function returns a list of tuples 
     try:
         with get_connection() as conn:
             cursor = conn.cursor()
-            query = "SELECT id, name, location FROM branches"
+            query = "SELECT id, name, location FROM branches ORDER BY id"
             cursor.execute(query)
             return cursor.fetchall()
     except Exception as e:
@@ -26,7 +27,7 @@ def add_branch(name: str, location: str) -> bool:  # (:) spcifies the type if va
         with get_connection() as conn:
             cursor = conn.cursor()
             # Check for duplicate branch name
-            cursor.execute("SELECT id FROM branches WHERE LOWER(name) = LOWER(?)", (name,))
+            cursor.execute("SELECT id FROM branches WHERE name = ? COLLATE NOCASE", (name,))
             if cursor.fetchone():
                 logging.error(f"Branch with name '{name}' already exists.")
                 return False
@@ -47,7 +48,7 @@ def edit_branch(branch_id: int, name: str, location: str) -> bool:
         with get_connection() as conn:
             cursor = conn.cursor()
             # Check if the new name already exists for a different branch
-            cursor.execute("SELECT id FROM branches WHERE LOWER(name) = LOWER(?) AND id <> ?", (name, branch_id))
+            cursor.execute("SELECT id FROM branches WHERE name = ? COLLATE NOCASE AND id <> ?", (name, branch_id))
             if cursor.fetchone():
                 logging.error(f"Branch name '{name}' already exists.")
                 return False
@@ -63,3 +64,6 @@ def delete_branch_record(branch_id: int) -> bool:
     except Exception as e:
         logging.error(f"Error deleting branch {branch_id}: {e}", exc_info=True)
         return False
+
+
+instrument_module(__name__)
@@ -1,113 +1,775 @@
 # core/db_manager.py
 """
-Handles all database connection logic and schema initialization for the Goods Distribution System.
-<<<  Manages SQLite connection
+Handles all database connection logic and schema migrations for the Goods Distribution System.
+<<<  Manages SQLite connection (one pooled, long-lived connection per thread)
 
 """
 
+import atexit
+import json
 import logging
 import sqlite3
 import os
+import sys
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+
+from core.instrumentation import instrument_module
+
+DB_DIR = "database"
+DB_PATH = os.environ.get("GDS_DB_PATH", os.path.join(DB_DIR, "goods_system.db"))
+MAX_CONNECTIONS = 16  # upper bound on simultaneously open connections (one per live thread)
+POOL_TIMEOUT = 10.0   # seconds a new thread waits for a free slot before giving up
+
+# SQLite performance profiles, applied as PRAGMAs on every new pooled connection.
+# journal_mode is persistent in the database file; the rest are per connection.
+#   legacy   >> what the app used before: rollback journal, fsync on every commit
+#   durable  >> WAL (readers never block the writer), still fsync on every commit
+#   balanced >> WAL + synchronous=NORMAL: no corruption risk, last commits may be lost on power cut
+#   fast     >> no fsync at all; only for scratch/benchmark/bulk-load databases
+PERFORMANCE_PROFILES: dict[str, dict[str, object]] = {
+    "legacy": {
+        "busy_timeout": 5000,
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+    },
+    "durable": {
+        "busy_timeout": 5000,
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "cache_size": -16000,      # negative = KiB, i.e. 16 MB
+        "temp_store": "MEMORY",
+    },
+    "balanced": {
+        "busy_timeout": 5000,
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -32000,
+        "temp_store": "MEMORY",
+        "mmap_size": 268435456,    # 256 MB
+    },
+    "fast": {
+        "busy_timeout": 5000,
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "cache_size": -64000,
+        "temp_store": "MEMORY",
+        "mmap_size": 268435456,
+    },
+}
+DEFAULT_PROFILE = os.environ.get("GDS_DB_PROFILE", "balanced")
+
+# SQL tracing (off by default): GDS_SQL_TRACE=1 or enable_sql_trace()
+SLOW_QUERY_MS = float(os.environ.get("GDS_SQL_SLOW_MS", "100"))
+SQL_TRACE_SUMMARY_PATH = os.environ.get("GDS_SQL_TRACE_SUMMARY", os.path.join(DB_DIR, "sql_trace_summary.json"))
+
+
+def apply_profile(conn: sqlite3.Connection, profile: str) -> None:
+    """Applies the PRAGMAs of the named performance profile to an open connection."""
+    settings = PERFORMANCE_PROFILES.get(profile)
+    if settings is None:
+        raise ValueError(f"Unknown database profile '{profile}'. Choose from: {', '.join(PERFORMANCE_PROFILES)}")
+    for pragma, value in settings.items():
+        conn.execute(f"PRAGMA {pragma} = {value}")
+
+
+# SQL tracing
+# >> every statement SQLite runs (trigger bodies and implicit BEGIN/COMMIT included) is counted
+#    through the trace callback, per logical operation
+# >> statements issued via execute()/executemany() are timed; anything slower than the
+#    threshold is logged with its EXPLAIN QUERY PLAN
+# >> a per-session summary (operation >> statements, executes, time, most frequent SQL) is
+#    logged and written to SQL_TRACE_SUMMARY_PATH when the connections are closed
+# Operation = the innermost ui.* function on the call stack, else the innermost core handler,
+# unless a caller labels it explicitly with `with sql_operation("name"):`.
+_sql_trace = {"enabled": os.environ.get("GDS_SQL_TRACE", "") not in ("", "0"), "slow_ms": SLOW_QUERY_MS}
+_sql_trace_lock = threading.Lock()
+_sql_trace_stats: dict[str, dict] = {}
+_sql_trace_local = threading.local()
+
+
+def _current_operation() -> str:
+    operations = getattr(_sql_trace_local, "operations", None)
+    if operations:
+        return operations[-1]
+    handler = None
+    frame = sys._getframe(1)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module.startswith("ui."):
+            return f"{module}.{getattr(frame.f_code, 'co_qualname', frame.f_code.co_name)}"
+        if handler is None and module.startswith("core.") and module not in ("core.db_manager", "core.instrumentation"):
+            handler = f"{module}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return handler or "other"
+
+
+def _operation_stats(operation: str) -> dict:
+    entry = _sql_trace_stats.get(operation)
+    if entry is None:
+        entry = _sql_trace_stats[operation] = {"statements": 0, "executes": 0, "sql_ms": 0.0, "queries": {}}
+    return entry
+
+
+def _on_statement(sql: str) -> None:
+    """sqlite3 trace callback: one call per statement SQLite starts."""
+    if getattr(_sql_trace_local, "suppress", False):
+        return
+    operation = _current_operation()
+    with _sql_trace_lock:
+        _operation_stats(operation)["statements"] += 1
+
+
+def _record_execute(conn: sqlite3.Connection, sql: str, params, seconds: float, many: bool) -> None:
+    ms = seconds * 1000
+    text = " ".join(sql.split())
+    operation = _current_operation()
+    with _sql_trace_lock:
+        entry = _operation_stats(operation)
+        entry["executes"] += 1
+        entry["sql_ms"] += ms
+        query = entry["queries"].setdefault(text, [0, 0.0, 0.0])
+        query[0] += 1
+        query[1] += ms
+        query[2] = max(query[2], ms)
+    if ms < _sql_trace["slow_ms"]:
+        return
+    plan = "n/a (executemany)"
+    if not many:
+        _sql_trace_local.suppress = True
+        try:
+            rows = sqlite3.Connection.execute(conn, "EXPLAIN QUERY PLAN " + sql, params).fetchall()
+            plan = "; ".join(row[-1] for row in rows) or "n/a"
+        except sqlite3.Error as e:
+            plan = f"n/a ({e})"
+        finally:
+            _sql_trace_local.suppress = False
+    logging.warning(f"Slow SQL ({ms:.1f} ms) in {operation}: {text[:300]} | plan: {plan}")
+
+
+class TracedCursor(sqlite3.Cursor):
+    """Cursor that times its statements while SQL tracing is enabled."""
+
+    def execute(self, sql, parameters=()):
+        if not _sql_trace["enabled"]:
+            return super().execute(sql, parameters)
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            _record_execute(self.connection, sql, parameters, time.perf_counter() - start, False)
+
+    def executemany(self, sql, seq_of_parameters):
+        if not _sql_trace["enabled"]:
+            return super().executemany(sql, seq_of_parameters)
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            _record_execute(self.connection, sql, (), time.perf_counter() - start, True)
+
+
+class TracedConnection(sqlite3.Connection):
+    """Connection class of the pool: hands out TracedCursors (Connection.execute included)."""
+
+    def cursor(self, factory=TracedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+@contextmanager
+def sql_operation(name: str):
+    """Labels every statement run inside the block with the given operation name."""
+    operations = getattr(_sql_trace_local, "operations", None)
+    if operations is None:
+        operations = _sql_trace_local.operations = []
+    operations.append(name)
+    try:
+        yield
+    finally:
+        operations.pop()
+
+
+def enable_sql_trace(slow_ms: float | None = None) -> None:
+    """Turns SQL tracing on for all pooled connections (slow_ms = slow-query threshold)."""
+    if slow_ms is not None:
+        _sql_trace["slow_ms"] = slow_ms
+    _sql_trace["enabled"] = True
+    _pool.set_trace_callback(_on_statement)
+    logging.info(f"SQL tracing enabled (slow query threshold {_sql_trace['slow_ms']} ms).")
+
+
+def disable_sql_trace() -> None:
+    _sql_trace["enabled"] = False
+    _pool.set_trace_callback(None)
+    logging.info("SQL tracing disabled.")
+
+
+def reset_sql_trace() -> None:
+    with _sql_trace_lock:
+        _sql_trace_stats.clear()
+
+
+def get_sql_trace_summary(top_queries: int = 5) -> dict:
+    """
+    operation >> {"statements", "executes", "sql_ms", "queries": [{"sql", "count", "total_ms", "max_ms"}, ...]}
+    (queries = the most frequently executed SQL of that operation; operations sorted by statement count)
+    """
+    with _sql_trace_lock:
+        raw = {op: {**entry, "queries": dict(entry["queries"])} for op, entry in _sql_trace_stats.items()}
+    summary = {}
+    for operation, entry in sorted(raw.items(), key=lambda item: item[1]["statements"], reverse=True):
+        queries = sorted(entry["queries"].items(), key=lambda item: item[1][0], reverse=True)[:top_queries]
+        summary[operation] = {
+            "statements": entry["statements"],
+            "executes": entry["executes"],
+            "sql_ms": round(entry["sql_ms"], 3),
+            "queries": [{"sql": sql, "count": c, "total_ms": round(t, 3), "max_ms": round(m, 3)} for sql, (c, t, m) in queries],
+        }
+    return summary
+
+
+def write_sql_trace_summary(path: str | None = None) -> None:
+    """Logs the session summary and writes it as JSON (default: SQL_TRACE_SUMMARY_PATH)."""
+    summary = get_sql_trace_summary()
+    if not summary:
+        return
+    path = path or SQL_TRACE_SUMMARY_PATH
+    try:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"slow_ms": _sql_trace["slow_ms"], "operations": summary}, f, indent=2)
+    except OSError as e:
+        logging.error(f"Could not write SQL trace summary to {path}: {e}")
+    for operation, entry in list(summary.items())[:10]:
+        top = entry["queries"][0] if entry["queries"] else None
+        logging.info(f"SQL trace: {operation}: {entry['statements']} statement(s), {entry['sql_ms']} ms"
+                     + (f"; most frequent x{top['count']}: {top['sql'][:120]}" if top else ""))
+
+
+class ConnectionPool:
+    """
+    Thread-aware pool of long-lived SQLite connections.
+    >> Each thread gets its own connection, opened on first use and reused afterwards.
+       It is SHARED by everything that runs on that thread: a nested `with get_connection()`
+       block commits the caller's pending work on exit. Code that may run inside someone
+       else's transaction uses write_transaction() instead.
+    >> The number of open connections is bounded by max_connections; a thread that
+       exits gives its slot back automatically.
+    >> Schema migrations run once per database file, not on every get_connection() call.
+    """
+
+    def __init__(self, db_path: str, profile: str = DEFAULT_PROFILE, max_connections: int = MAX_CONNECTIONS, timeout: float = POOL_TIMEOUT) -> None:
+        if profile not in PERFORMANCE_PROFILES:
+            raise ValueError(f"Unknown database profile '{profile}'. Choose from: {', '.join(PERFORMANCE_PROFILES)}")
+        self.db_path = db_path
+        self.profile = profile
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: dict[int, sqlite3.Connection] = {}
+        self._closed = False
+        self._watcher: sqlite3.Connection | None = None
+        self._watcher_lock = threading.Lock()
+
+    def get(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+        if self._closed:
+            raise sqlite3.ProgrammingError("Connection pool has been closed.")
+        if not self._slots.acquire(timeout=self.timeout):
+            raise sqlite3.OperationalError("Connection pool exhausted: no free connection slot.")
+        try:
+            conn = self._open()
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._connections[id(conn)] = conn
+        self._local.conn = conn
+        # Give the slot back when the owning thread (and its thread-local storage) goes away.
+        self._local.holder = _ConnectionHolder()
+        weakref.finalize(self._local.holder, self._release, id(conn))
+        return conn
+
+    def _open(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.db_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+            logging.info(f"Created '{directory}' folder for storing SQLite DB.")
+        # check_same_thread=False only so close_all() can close from the shutdown thread;
+        # a connection is never handed to more than one worker thread.
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, factory=TracedConnection)
+        if _sql_trace["enabled"]:
+            conn.set_trace_callback(_on_statement)
+        conn.execute("PRAGMA foreign_keys = ON;")
+        apply_profile(conn, self.profile)
+        run_migrations(conn, self.db_path)
+        return conn
+
+    def _release(self, conn_id: int) -> None:
+        with self._lock:
+            conn = self._connections.pop(conn_id, None)
+        if conn is None:
+            return
+        try:
+            conn.close()
+        except Exception as e:
+            logging.warning(f"Error closing pooled connection: {e}")
+        self._slots.release()
+
+    def data_version(self) -> int:
+        """
+        PRAGMA data_version as seen by a private read-only connection. Because that connection
+        never writes, the value changes after ANY commit: other threads' connections or other processes.
+        """
+        if self._watcher is None:
+            self.get()  # make sure the database file exists and is migrated
+            with self._watcher_lock:
+                if self._watcher is None:
+                    self._watcher = sqlite3.connect(self.db_path, check_same_thread=False)
+        with self._watcher_lock:
+            return self._watcher.execute("PRAGMA data_version").fetchone()[0]
+
+    def set_trace_callback(self, callback) -> None:
+        with self._lock:
+            connections = list(self._connections.values())
+        for conn in connections:
+            conn.set_trace_callback(callback)
+
+    def close_all(self) -> None:
+        """Closes every open connection (used on application shutdown)."""
+        self._closed = True
+        with self._lock:
+            conn_ids = list(self._connections)
+        for conn_id in conn_ids:
+            self._release(conn_id)
+        with self._watcher_lock:
+            if self._watcher is not None:
+                self._watcher.close()
+                self._watcher = None
+        self._local = threading.local()
+        logging.info("All pooled database connections closed.")
+
+
+class _ConnectionHolder:
+    """Marker object stored in thread-local storage; its finalizer returns the pool slot."""
+
+
+_pool = ConnectionPool(DB_PATH)
+
 
 def get_connection() -> sqlite3.Connection:
-    db_path = os.path.join("database", "goods_system.db")
-    if not os.path.exists("database"):
-        os.makedirs("database", exist_ok=True)
-        logging.info("Created 'database' folder for storing SQLite DB.")
-    conn = sqlite3.connect(db_path)
-    conn.execute("PRAGMA foreign_keys = ON;")
-    _init_schema(conn)
-    return conn
-# Initialize the database schema
-def _init_schema(conn: sqlite3.Connection) -> None:
-    
+    """
+    Returns the calling thread's pooled connection.
+    Use it as `with get_connection() as conn:`; the block commits or rolls back
+    but does NOT close the connection, so it is reused by the next call.
+    """
+    return _pool.get()
+
+
+@contextmanager
+def write_transaction():
+    """
+    Write transaction on the calling thread's pooled connection: `with write_transaction() as conn:`
+    >> No transaction open yet: BEGIN IMMEDIATE (write lock taken before the first read),
+       COMMIT on success, ROLLBACK on an exception.
+    >> The caller already has one open: a SAVEPOINT instead, released on success and rolled
+       back on an exception; committing stays with the caller.
+    """
+    conn = get_connection()
+    if conn.in_transaction:
+        conn.execute("SAVEPOINT write_transaction")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK TO write_transaction")
+            conn.execute("RELEASE write_transaction")
+            raise
+        conn.execute("RELEASE write_transaction")
+        return
+    conn.execute("BEGIN IMMEDIATE")
     try:
-        cursor = conn.cursor()
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+
+
+def close_all_connections() -> None:
+    if _sql_trace["enabled"]:
+        write_sql_trace_summary()
+        reset_sql_trace()
+    _pool.close_all()
+
+
+def get_data_version() -> tuple[int, int]:
+    """
+    Change token for the whole database: (pool generation, data_version).
+    It changes after every commit from any connection or process, and when
+    configure_database() switches files. Compare it with a token saved earlier
+    to find out cheaply whether cached data may be stale.
+    """
+    pool = _pool
+    return id(pool), pool.data_version()
+
+
+def get_table_version(name: str) -> int:
+    """Trigger-maintained change counter of a logical table (see the table_versions migration)."""
+    # plain read: no `with` block, so a caller's open transaction is never committed from here
+    row = get_connection().execute("SELECT version FROM table_versions WHERE name = ?", (name,)).fetchone()
+    return row[0] if row else 0
+
+
+def configure_database(db_path: str | None = None, profile: str | None = None) -> None:
+    """
+    Points the pool at another database file and/or performance profile.
+    Existing pooled connections are closed; the next get_connection() opens a new one.
+    (The GDS_DB_PATH / GDS_DB_PROFILE environment variables set the startup defaults.)
+    """
+    global _pool
+    new_pool = ConnectionPool(db_path or _pool.db_path, profile or _pool.profile)
+    old_pool, _pool = _pool, new_pool
+    old_pool.close_all()
+    logging.info(f"Database set to '{new_pool.db_path}' with profile '{new_pool.profile}'.")
+
+
+def get_database_config() -> dict:
+    return {"db_path": _pool.db_path, "profile": _pool.profile}
+
+
+atexit.register(close_all_connections)
+
+# Schema migrations
+# Each entry is (version, description, steps); a step is an SQL statement or a function
+# taking the connection (for changes that depend on what the file already contains).
+# A migration runs once per database file, inside its own transaction, and bumps
+# PRAGMA user_version to its number.
+# NEVER change what an applied migration does >> append a new one instead.
+
+def _add_missing_columns(table: str, columns: list[tuple[str, str]]):
+    """Migration step: ALTER TABLE ADD COLUMN for each (name, type) the table does not have yet."""
+    def step(conn: sqlite3.Connection) -> None:
+        existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        for name, column_type in columns:
+            if name not in existing:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {column_type}")
+    return step
+
+
+def _name_index(table: str):
+    """
+    Migration step: NOCASE index on <table>.name, UNIQUE when the existing names allow it.
+    >> Older databases (case-sensitive UNIQUE) may hold names differing only in case; those
+       are logged and the index is created non-unique, so lookups stay fast and nothing is lost.
+    """
+    def step(conn: sqlite3.Connection) -> None:
+        collisions = conn.execute(f"""
+            SELECT group_concat(id || ':' || name, ', ') FROM {table}
+            GROUP BY name COLLATE NOCASE HAVING COUNT(*) > 1
+        """).fetchall()
+        if not collisions:
+            conn.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS idx_{table}_name_nocase ON {table}(name COLLATE NOCASE)")
+            return
+        logging.warning(f"{table}: names differing only in case (id:name) >> " + "; ".join(row[0] for row in collisions)
+                        + ". The NOCASE name index is created non-unique; rename or merge them.")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_name_nocase ON {table}(name COLLATE NOCASE)")
+    return step
+
+
+MIGRATIONS: list[tuple[int, str, list]] = [
+    (1, "initial schema", [
         # Users table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE NOT NULL,
-                password TEXT NOT NULL,
-                role TEXT NOT NULL DEFAULT 'USER'
-            );
-        """)
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL,
+            role TEXT NOT NULL DEFAULT 'USER'
+        )
+        """,
         # Branches table with UNIQUE constraint on name
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS branches (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                location TEXT NOT NULL,
-                UNIQUE(name)
-            );
-        """)
+        """
+        CREATE TABLE IF NOT EXISTS branches (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            location TEXT NOT NULL,
+            UNIQUE(name)
+        )
+        """,
         # Goods table with UNIQUE constraint on name
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS goods (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                quantity INTEGER NOT NULL DEFAULT 0,
-                price REAL NOT NULL DEFAULT 0.0,
-                UNIQUE(name)
-            );
-        """)
-        # Sales table (only one definition)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS sales (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                good_id INTEGER NOT NULL,
-                quantity INTEGER NOT NULL,
-                sale_date TEXT NOT NULL,
-                sold_by_user_id INTEGER,
-                branch_id INTEGER,
-                FOREIGN KEY(good_id) REFERENCES goods(id) ON DELETE CASCADE,
-                FOREIGN KEY(sold_by_user_id) REFERENCES users(id) ON DELETE SET NULL,
-                FOREIGN KEY(branch_id) REFERENCES branches(id) ON DELETE CASCADE
-            );
-        """)
+        """
+        CREATE TABLE IF NOT EXISTS goods (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            quantity INTEGER NOT NULL DEFAULT 0,
+            price REAL NOT NULL DEFAULT 0.0,
+            UNIQUE(name)
+        )
+        """,
+        # Sales table
+        """
+        CREATE TABLE IF NOT EXISTS sales (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            good_id INTEGER NOT NULL,
+            quantity INTEGER NOT NULL,
+            sale_date TEXT NOT NULL,
+            sold_by_user_id INTEGER,
+            branch_id INTEGER,
+            FOREIGN KEY(good_id) REFERENCES goods(id) ON DELETE CASCADE,
+            FOREIGN KEY(sold_by_user_id) REFERENCES users(id) ON DELETE SET NULL,
+            FOREIGN KEY(branch_id) REFERENCES branches(id) ON DELETE CASCADE
+        )
+        """,
         # Branch inventories table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS branch_inventories (
-                branch_id INTEGER NOT NULL,
-                good_id INTEGER NOT NULL,
-                quantity INTEGER NOT NULL DEFAULT 0,
-                PRIMARY KEY (branch_id, good_id),
-                FOREIGN KEY (branch_id) REFERENCES branches(id) ON DELETE CASCADE,
-                FOREIGN KEY (good_id) REFERENCES goods(id) ON DELETE CASCADE
-            );
-        """)
+        """
+        CREATE TABLE IF NOT EXISTS branch_inventories (
+            branch_id INTEGER NOT NULL,
+            good_id INTEGER NOT NULL,
+            quantity INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (branch_id, good_id),
+            FOREIGN KEY (branch_id) REFERENCES branches(id) ON DELETE CASCADE,
+            FOREIGN KEY (good_id) REFERENCES goods(id) ON DELETE CASCADE
+        )
+        """,
         # Distributions table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS distributions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                good_id INTEGER NOT NULL,
-                from_branch_id INTEGER,
-                to_branch_id INTEGER NOT NULL,
-                quantity INTEGER NOT NULL,
-                distribution_date TEXT NOT NULL,
-                distributed_by_user_id INTEGER,
-                FOREIGN KEY (good_id) REFERENCES goods(id) ON DELETE CASCADE,
-                FOREIGN KEY (from_branch_id) REFERENCES branches(id) ON DELETE SET NULL,
-                FOREIGN KEY (to_branch_id) REFERENCES branches(id) ON DELETE CASCADE,
-                FOREIGN KEY (distributed_by_user_id) REFERENCES users(id) ON DELETE SET NULL
-            );
-        """)
+        """
+        CREATE TABLE IF NOT EXISTS distributions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            good_id INTEGER NOT NULL,
+            from_branch_id INTEGER,
+            to_branch_id INTEGER NOT NULL,
+            quantity INTEGER NOT NULL,
+            distribution_date TEXT NOT NULL,
+            distributed_by_user_id INTEGER,
+            FOREIGN KEY (good_id) REFERENCES goods(id) ON DELETE CASCADE,
+            FOREIGN KEY (from_branch_id) REFERENCES branches(id) ON DELETE SET NULL,
+            FOREIGN KEY (to_branch_id) REFERENCES branches(id) ON DELETE CASCADE,
+            FOREIGN KEY (distributed_by_user_id) REFERENCES users(id) ON DELETE SET NULL
+        )
+        """,
         # Imported goods table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS imported_goods (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                good_name TEXT NOT NULL,
-                quantity INTEGER NOT NULL,
-                price REAL NOT NULL,
-                import_date TEXT NOT NULL,
-                import_place TEXT NOT NULL,
-                import_cost REAL NOT NULL
-            );
-        """)
-        conn.commit()
-        logging.info("✅ Database schema initialized.")
-    except Exception as e:
-        logging.error(f"Schema initialization error: {e}", exc_info=True)
+        """
+        CREATE TABLE IF NOT EXISTS imported_goods (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            good_name TEXT NOT NULL,
+            quantity INTEGER NOT NULL,
+            price REAL NOT NULL,
+            import_date TEXT NOT NULL,
+            import_place TEXT NOT NULL,
+            import_cost REAL NOT NULL
+        )
+        """,
+    ]),
+    (2, "import details on goods (used by update_good_inventory)", [
+        # databases that already ran update_good_inventory may have some of these
+        _add_missing_columns("goods", [("last_import_date", "TEXT"), ("supplier", "TEXT"), ("unit_cost", "REAL")]),
+    ]),
+    (3, "case-insensitive name indexes and indexes for sales/distribution lookups", [
+        # Name lookups use `name = ? COLLATE NOCASE`, which can only be served by a NOCASE index.
+        _name_index("goods"),
+        _name_index("branches"),
+        "CREATE INDEX IF NOT EXISTS idx_sales_branch_good_date ON sales(branch_id, good_id, sale_date)",
+        "CREATE INDEX IF NOT EXISTS idx_sales_date ON sales(sale_date)",
+        "CREATE INDEX IF NOT EXISTS idx_distributions_date ON distributions(distribution_date)",
+        "CREATE INDEX IF NOT EXISTS idx_distributions_to_branch ON distributions(to_branch_id)",
+        "ANALYZE",
+    ]),
+    (4, "sales_totals aggregate kept current by triggers on sales", [
+        # One row per (branch, good): statistics read this instead of grouping the whole sales table.
+        # Revenue is booked at the good's price at the moment of the sale.
+        """
+        CREATE TABLE IF NOT EXISTS sales_totals (
+            branch_id INTEGER NOT NULL,
+            good_id INTEGER NOT NULL,
+            total_qty INTEGER NOT NULL DEFAULT 0,
+            total_revenue REAL NOT NULL DEFAULT 0.0,
+            PRIMARY KEY (branch_id, good_id),
+            FOREIGN KEY (branch_id) REFERENCES branches(id) ON DELETE CASCADE,
+            FOREIGN KEY (good_id) REFERENCES goods(id) ON DELETE CASCADE
+        ) WITHOUT ROWID
+        """,
+        """
+        INSERT INTO sales_totals (branch_id, good_id, total_qty, total_revenue)
+        SELECT s.branch_id, s.good_id, SUM(s.quantity), SUM(s.quantity * g.price)
+        FROM sales s
+        JOIN goods g ON s.good_id = g.id
+        WHERE s.branch_id IS NOT NULL
+        GROUP BY s.branch_id, s.good_id
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_sales_totals_insert
+        AFTER INSERT ON sales
+        WHEN NEW.branch_id IS NOT NULL
+        BEGIN
+            INSERT INTO sales_totals (branch_id, good_id, total_qty, total_revenue)
+            VALUES (NEW.branch_id, NEW.good_id, NEW.quantity,
+                    NEW.quantity * COALESCE((SELECT price FROM goods WHERE id = NEW.good_id), 0))
+            ON CONFLICT(branch_id, good_id) DO UPDATE SET
+                total_qty = total_qty + excluded.total_qty,
+                total_revenue = total_revenue + excluded.total_revenue;
+        END
+        """,
+        # Removing a sale takes back its share at the average booked unit price of that row.
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_sales_totals_delete
+        AFTER DELETE ON sales
+        WHEN OLD.branch_id IS NOT NULL
+        BEGIN
+            UPDATE sales_totals SET
+                total_revenue = CASE WHEN total_qty > 0
+                                     THEN total_revenue - total_revenue * OLD.quantity / total_qty
+                                     ELSE 0 END,
+                total_qty = total_qty - OLD.quantity
+            WHERE branch_id = OLD.branch_id AND good_id = OLD.good_id;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_sales_totals_update
+        AFTER UPDATE OF quantity, good_id, branch_id ON sales
+        BEGIN
+            UPDATE sales_totals SET
+                total_revenue = CASE WHEN total_qty > 0
+                                     THEN total_revenue - total_revenue * OLD.quantity / total_qty
+                                     ELSE 0 END,
+                total_qty = total_qty - OLD.quantity
+            WHERE branch_id = OLD.branch_id AND good_id = OLD.good_id;
+            INSERT INTO sales_totals (branch_id, good_id, total_qty, total_revenue)
+            SELECT NEW.branch_id, NEW.good_id, NEW.quantity,
+                   NEW.quantity * COALESCE((SELECT price FROM goods WHERE id = NEW.good_id), 0)
+            WHERE NEW.branch_id IS NOT NULL
+            ON CONFLICT(branch_id, good_id) DO UPDATE SET
+                total_qty = total_qty + excluded.total_qty,
+                total_revenue = total_revenue + excluded.total_revenue;
+        END
+        """,
+    ]),
+    (5, "table_versions change counters for cache invalidation", [
+        # Bumped by triggers, so every writer (any screen, script or process) invalidates caches.
+        # 'goods_catalog' only moves when a good is added/removed or its name/price changes.
+        """
+        CREATE TABLE IF NOT EXISTS table_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+        """,
+        "INSERT OR IGNORE INTO table_versions (name, version) VALUES ('goods_catalog', 0)",
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_goods_catalog_insert AFTER INSERT ON goods
+        BEGIN
+            UPDATE table_versions SET version = version + 1 WHERE name = 'goods_catalog';
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_goods_catalog_delete AFTER DELETE ON goods
+        BEGIN
+            UPDATE table_versions SET version = version + 1 WHERE name = 'goods_catalog';
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_goods_catalog_update AFTER UPDATE OF name, price ON goods
+        WHEN OLD.name IS NOT NEW.name OR OLD.price IS NOT NEW.price
+        BEGIN
+            UPDATE table_versions SET version = version + 1 WHERE name = 'goods_catalog';
+        END
+        """,
+    ]),
+    (6, "history change counters for the columnar snapshot (core/snapshot.py)", [
+        # New rows are picked up by rowid; these only move when an existing row changes or goes away
+        # (including FK cascades), which makes the snapshot rebuild.
+        "INSERT OR IGNORE INTO table_versions (name, version) VALUES ('sales_history', 0)",
+        "INSERT OR IGNORE INTO table_versions (name, version) VALUES ('distributions_history', 0)",
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_sales_history_delete AFTER DELETE ON sales
+        BEGIN
+            UPDATE table_versions SET version = version + 1 WHERE name = 'sales_history';
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_sales_history_update
+        AFTER UPDATE OF sale_date, branch_id, good_id, quantity ON sales
+        BEGIN
+            UPDATE table_versions SET version = version + 1 WHERE name = 'sales_history';
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_distributions_history_delete AFTER DELETE ON distributions
+        BEGIN
+            UPDATE table_versions SET version = version + 1 WHERE name = 'distributions_history';
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_distributions_history_update
+        AFTER UPDATE OF distribution_date, to_branch_id, good_id, quantity ON distributions
+        BEGIN
+            UPDATE table_versions SET version = version + 1 WHERE name = 'distributions_history';
+        END
+        """,
+    ]),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+_migrated_paths: set[str] = set()
+_migration_lock = threading.Lock()
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def run_migrations(conn: sqlite3.Connection, db_path: str = DB_PATH) -> int:
+    """
+    Brings the database up to SCHEMA_VERSION by applying every pending migration in order.
+    Runs at most once per process for a given database file; later calls are a set lookup.
+
+    >> conn: an open connection to the database file
+    >> db_path: path of that file (the once-per-process key)
+    >> return: the schema version after migrating
+    """
+    key = os.path.abspath(db_path)
+    if key in _migrated_paths:
+        return SCHEMA_VERSION
+    with _migration_lock:
+        if key in _migrated_paths:
+            return SCHEMA_VERSION
+        current = get_schema_version(conn)
+        for version, description, statements in MIGRATIONS:
+            if version <= current:
+                continue
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                # Another process may have migrated while we waited for the write lock.
+                if get_schema_version(conn) >= version:
+                    conn.rollback()
+                    continue
+                for step in statements:
+                    if callable(step):
+                        step(conn)
+                    else:
+                        conn.execute(step)
+                conn.execute(f"PRAGMA user_version = {version:d}")
+                conn.commit()
+                logging.info(f"Applied schema migration {version}: {description}")
+            except Exception as e:
+                conn.rollback()
+                logging.error(f"Schema migration {version} failed: {e}", exc_info=True)
+                raise
+        _migrated_paths.add(key)
+        logging.info(f"✅ Database schema at version {SCHEMA_VERSION}.")
+    return SCHEMA_VERSION
 
 # functions for updating and deleting records
 
@@ -135,12 +797,18 @@ def delete_branch(branch_id: int) -> bool:
         logging.error(f"Error deleting branch {branch_id}: {e}", exc_info=True)
         return False
 
+def _invalidate_goods_cache() -> None:
+    # late import: goods_handler imports this module
+    from core.goods_handler import invalidate_goods_cache
+    invalidate_goods_cache()
+
 def update_good(good_id: int, name: str, price: float) -> bool:
     try:
         with get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("UPDATE goods SET name = ?, price = ? WHERE id = ?", (name, price, good_id))
             conn.commit()
+        _invalidate_goods_cache()
         logging.info(f"Good {good_id} updated to name: {name}, price: {price}.")
         return True
     except Exception as e:
@@ -153,6 +821,7 @@ def delete_good(good_id: int) -> bool:
             cursor = conn.cursor()
             cursor.execute("DELETE FROM goods WHERE id = ?", (good_id,))
             conn.commit()
+        _invalidate_goods_cache()
         logging.info(f"Good {good_id} deleted successfully.")
         return True
     except Exception as e:
@@ -173,6 +842,10 @@ def seed_sample_data():
     except Exception as e:
         logging.error(f"Error seeding data: {e}", exc_info=True)
 
+
+instrument_module(__name__)
+
+
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
     seed_sample_data()
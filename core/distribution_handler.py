@@ -6,14 +6,16 @@ Manages the logic for distributing goods between the warehouse and branches.
 >>Checks stock availability before distribution.
 >> Updates inventory records according to the distribution.
 >>Records distribution history with user and timestamp .
+>> Ships whole manifests (many goods to many branches) in one transaction.
 
 
 """
 
 import logging
 from datetime import datetime
-from typing import Optional, Dict
-from core.db_manager import get_connection
+from typing import Optional, Dict, Iterable, List, Tuple
+from core.db_manager import get_connection, write_transaction
+from core.instrumentation import instrument_module
 
 def distribute_goods(
     good_id: int,
@@ -26,61 +28,49 @@ def distribute_goods(
         logging.warning("Distribution quantity must be positive.")
         return {"success": False, "reason": "Quantity must be positive."}
     try:
-        with get_connection() as conn:
+        # a savepoint when the caller already has a transaction open on this thread's connection
+        with write_transaction() as conn:
             cursor = conn.cursor()
             if from_branch_id is not None:
+                # Conditional decrement: succeeds only if the source still has enough stock
                 cursor.execute("""
-                    SELECT quantity FROM branch_inventories
-                    WHERE branch_id = ? AND good_id = ?
-                """, (from_branch_id, good_id))
-                row = cursor.fetchone()
-                if not row:
-                    logging.warning(f"No inventory record for good_id={good_id} in branch_id={from_branch_id}.")
-                    return {"success": False, "reason": "No inventory record in source branch."}
-                current_source_qty = row[0]
-                if current_source_qty < quantity:
+                    UPDATE branch_inventories
+                    SET quantity = quantity - ?
+                    WHERE branch_id = ? AND good_id = ? AND quantity >= ?
+                """, (quantity, from_branch_id, good_id, quantity))
+                if cursor.rowcount == 0:
+                    cursor.execute("""
+                        SELECT quantity FROM branch_inventories
+                        WHERE branch_id = ? AND good_id = ?
+                    """, (from_branch_id, good_id))
+                    row = cursor.fetchone()
+                    if not row:
+                        logging.warning(f"No inventory record for good_id={good_id} in branch_id={from_branch_id}.")
+                        return {"success": False, "reason": "No inventory record in source branch."}
+                    current_source_qty = row[0]
                     logging.warning(f"Insufficient stock in branch {from_branch_id}. Needed={quantity}, Available={current_source_qty}")
                     return {"success": False, "reason": "Insufficient stock in source branch.", "available": current_source_qty}
-                new_source_qty = current_source_qty - quantity
-                cursor.execute("""
-                    UPDATE branch_inventories
-                    SET quantity = ?
-                    WHERE branch_id = ? AND good_id = ?
-                """, (new_source_qty, from_branch_id, good_id))
             else:
-                cursor.execute("SELECT quantity FROM goods WHERE id = ?", (good_id,))
-                row = cursor.fetchone()
-                if not row:
-                    logging.warning(f"No good found with id={good_id}.")
-                    return {"success": False, "reason": "Good not found in warehouse."}
-                warehouse_qty = row[0]
-                if warehouse_qty < quantity:
-                    logging.warning(f"Insufficient warehouse stock for good_id={good_id}. Needed={quantity}, Available={warehouse_qty}")
-                    return {"success": False, "reason": "Insufficient warehouse stock.", "available": warehouse_qty}
-                new_warehouse_qty = warehouse_qty - quantity
                 cursor.execute("""
                     UPDATE goods
-                    SET quantity = ?
-                    WHERE id = ?
-                """, (new_warehouse_qty, good_id))
-            # Update destination branch inventory
+                    SET quantity = quantity - ?
+                    WHERE id = ? AND quantity >= ?
+                """, (quantity, good_id, quantity))
+                if cursor.rowcount == 0:
+                    cursor.execute("SELECT quantity FROM goods WHERE id = ?", (good_id,))
+                    row = cursor.fetchone()
+                    if not row:
+                        logging.warning(f"No good found with id={good_id}.")
+                        return {"success": False, "reason": "Good not found in warehouse."}
+                    warehouse_qty = row[0]
+                    logging.warning(f"Insufficient warehouse stock for good_id={good_id}. Needed={quantity}, Available={warehouse_qty}")
+                    return {"success": False, "reason": "Insufficient warehouse stock.", "available": warehouse_qty}
+            # Update destination branch inventory (insert the row on first delivery)
             cursor.execute("""
-                SELECT quantity FROM branch_inventories
-                WHERE branch_id = ? AND good_id = ?
-            """, (to_branch_id, good_id))
-            row = cursor.fetchone()
-            if row:
-                dest_quantity = row[0] + quantity
-                cursor.execute("""
-                    UPDATE branch_inventories
-                    SET quantity = ?
-                    WHERE branch_id = ? AND good_id = ?
-                """, (dest_quantity, to_branch_id, good_id))
-            else:
-                cursor.execute("""
-                    INSERT INTO branch_inventories (branch_id, good_id, quantity)
-                    VALUES (?, ?, ?)
-                """, (to_branch_id, good_id, quantity))
+                INSERT INTO branch_inventories (branch_id, good_id, quantity)
+                VALUES (?, ?, ?)
+                ON CONFLICT(branch_id, good_id) DO UPDATE SET quantity = quantity + excluded.quantity
+            """, (to_branch_id, good_id, quantity))
             distribution_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             cursor.execute("""
                 INSERT INTO distributions (good_id, from_branch_id, to_branch_id, quantity, distribution_date, distributed_by_user_id)
@@ -93,13 +83,132 @@ def distribute_goods(
                 price = price_row[0]
                 profit = quantity * price * 0.2  # 20% profit margin
                 logging.info(f"Expected profit from this distribution: {profit:.2f}")
-            conn.commit()
             logging.info(f"Distributed {quantity} of good_id={good_id} from {from_branch_id} to {to_branch_id}.")
             return {"success": True}
     except Exception as e:
         logging.error(f"Error distributing goods: {e}", exc_info=True)
         return {"success": False, "reason": str(e)}
 
+def _chunks(items: list, size: int = 500):
+    # keeps IN (...) lists under SQLite's bound-parameter limit
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def distribute_manifest(lines: Iterable[tuple], user_id: int) -> Dict:
+    """
+    Ships a whole manifest of distribution lines atomically (weekly replenishment).
+    All source stock is validated together against the stock at the start of the
+    shipment; if any line fails nothing is applied.
+
+    >> lines: iterable of (good_id, from_branch_id, to_branch_id, quantity);
+       from_branch_id None = warehouse
+    >> user_id: the distributing user
+    >> return: {"success": True, "lines": n} or
+       {"success": False, "failed": [{"line": i, "reason": ..., ("available": n)}]}
+    """
+    failed: List[Dict] = []
+    parsed: List[Tuple[int, int, Optional[int], int, int]] = []
+    for i, line in enumerate(lines):
+        try:
+            good_id, from_branch_id, to_branch_id, quantity = line
+            good_id, to_branch_id, quantity = int(good_id), int(to_branch_id), int(quantity)
+            from_branch_id = int(from_branch_id) if from_branch_id is not None else None
+        except (TypeError, ValueError) as e:
+            failed.append({"line": i, "reason": f"Malformed line: {e}"})
+            continue
+        if quantity <= 0:
+            failed.append({"line": i, "reason": "Quantity must be positive."})
+        elif from_branch_id == to_branch_id:
+            failed.append({"line": i, "reason": "Source and destination are the same branch."})
+        else:
+            parsed.append((i, good_id, from_branch_id, to_branch_id, quantity))
+    if failed:
+        return {"success": False, "failed": failed}
+    if not parsed:
+        return {"success": False, "failed": [], "reason": "Manifest is empty."}
+
+    try:
+        # Write lock first, so the stock we validate is the stock we update
+        # (a savepoint when the caller already has a transaction open on this thread's connection).
+        with write_transaction() as conn:
+            cursor = conn.cursor()
+
+            good_ids = sorted({p[1] for p in parsed})
+            goods: Dict[int, Tuple[int, float]] = {}
+            for chunk in _chunks(good_ids):
+                cursor.execute(f"SELECT id, quantity, price FROM goods WHERE id IN ({','.join('?' * len(chunk))})", chunk)
+                goods.update({g: (q, price) for g, q, price in cursor.fetchall()})
+
+            cursor.execute("SELECT id FROM branches")
+            known_branches = {row[0] for row in cursor.fetchall()}
+
+            source_branches = sorted({p[2] for p in parsed if p[2] is not None})
+            branch_stock: Dict[Tuple[int, int], int] = {}
+            for chunk in _chunks(source_branches):
+                cursor.execute(f"""
+                    SELECT branch_id, good_id, quantity FROM branch_inventories
+                    WHERE branch_id IN ({','.join('?' * len(chunk))})
+                """, chunk)
+                branch_stock.update({(b, g): q for b, g, q in cursor.fetchall()})
+
+            # Validate every line against the stock left after the lines before it
+            taken: Dict[Tuple[Optional[int], int], int] = {}
+            received: Dict[Tuple[int, int], int] = {}
+            for i, good_id, from_branch_id, to_branch_id, quantity in parsed:
+                if good_id not in goods:
+                    failed.append({"line": i, "reason": "Good not found in warehouse."})
+                    continue
+                unknown = [b for b in (from_branch_id, to_branch_id) if b is not None and b not in known_branches]
+                if unknown:
+                    failed.append({"line": i, "reason": f"Unknown branch id {unknown[0]}."})
+                    continue
+                key = (from_branch_id, good_id)
+                if from_branch_id is None:
+                    stock = goods[good_id][0]
+                elif key in branch_stock:
+                    stock = branch_stock[key]
+                else:
+                    failed.append({"line": i, "reason": "No inventory record in source branch."})
+                    continue
+                available = stock - taken.get(key, 0)
+                if available < quantity:
+                    reason = "Insufficient warehouse stock." if from_branch_id is None else "Insufficient stock in source branch."
+                    failed.append({"line": i, "reason": reason, "available": available})
+                    continue
+                taken[key] = taken.get(key, 0) + quantity
+                received[(to_branch_id, good_id)] = received.get((to_branch_id, good_id), 0) + quantity
+
+            if failed:
+                # nothing written yet: leaving the block just ends the (empty) transaction
+                logging.warning(f"Manifest rejected: {len(failed)} of {len(parsed)} line(s) failed validation.")
+                return {"success": False, "failed": failed}
+
+            cursor.executemany("UPDATE goods SET quantity = quantity - ? WHERE id = ?",
+                               [(qty, g) for (b, g), qty in taken.items() if b is None])
+            cursor.executemany("""
+                UPDATE branch_inventories
+                SET quantity = quantity - ?
+                WHERE branch_id = ? AND good_id = ?
+            """, [(qty, b, g) for (b, g), qty in taken.items() if b is not None])
+            cursor.executemany("""
+                INSERT INTO branch_inventories (branch_id, good_id, quantity)
+                VALUES (?, ?, ?)
+                ON CONFLICT(branch_id, good_id) DO UPDATE SET quantity = quantity + excluded.quantity
+            """, [(b, g, qty) for (b, g), qty in received.items()])
+            distribution_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            cursor.executemany("""
+                INSERT INTO distributions (good_id, from_branch_id, to_branch_id, quantity, distribution_date, distributed_by_user_id)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, [(g, src, dst, qty, distribution_date, user_id) for _, g, src, dst, qty in parsed])
+
+        profit = sum(qty * goods[g][1] * 0.2 for _, g, _, _, qty in parsed)  # 20% profit margin
+        logging.info(f"Manifest shipped: {len(parsed)} line(s) to {len({p[3] for p in parsed})} branch(es). "
+                     f"Expected profit: {profit:.2f}")
+        return {"success": True, "lines": len(parsed)}
+    except Exception as e:
+        logging.error(f"Error shipping manifest: {e}", exc_info=True)
+        return {"success": False, "failed": [], "reason": str(e)}
+
 def get_stock(good_id: int, branch_id: int = None) -> Dict:
     """
     Returns the current stock for a good. If branch_id is provided, returns the branch inventory stock,
@@ -123,3 +232,6 @@ def get_stock(good_id: int, branch_id: int = None) -> Dict:
     except Exception as e:
         logging.error(f"Error retrieving stock: {e}", exc_info=True)
         return {"success": False, "reason": str(e)}
+
+
+instrument_module(__name__)
@@ -0,0 +1,204 @@
+# core/export_handler.py
+
+"""
+Streaming export of the transaction tables to CSV or JSON Lines:
+>> sales, sales_totals (per branch and good), distributions, branch_inventories and imported_goods.
+>> Rows are pulled from the cursor with fetchmany and written straight to the file,
+   so memory stays flat no matter how many rows are exported.
+>> Optional gzip compression (automatic for paths ending in .gz).
+>> Date-range and branch filters.
+
+Headless usage:
+    python -m core.export_handler sales exports/sales.csv.gz --from 2024-01-01 --to 2024-12-31 --branch 2
+"""
+
+import argparse
+import csv
+import gzip
+import json
+import logging
+from typing import Callable, Dict, Optional
+
+from core.db_manager import get_connection
+from core.instrumentation import instrument_module
+
+BATCH_SIZE = 5000
+
+# dataset >> (SELECT ..., date column or None, branch filter SQL or None)
+EXPORTS = {
+    "sales": (
+        """
+        SELECT s.id, s.sale_date, s.branch_id, b.name AS branch_name,
+               s.good_id, g.name AS good_name, s.quantity, s.sold_by_user_id
+        FROM sales s
+        LEFT JOIN branches b ON s.branch_id = b.id
+        LEFT JOIN goods g ON s.good_id = g.id
+        """,
+        "s.sale_date",
+        "s.branch_id = ?",
+    ),
+    "sales_totals": (
+        """
+        SELECT t.branch_id, b.name AS branch_name, t.good_id, g.name AS good_name,
+               t.total_qty, t.total_revenue
+        FROM sales_totals t
+        JOIN branches b ON t.branch_id = b.id
+        JOIN goods g ON t.good_id = g.id
+        """,
+        None,
+        "t.branch_id = ?",
+    ),
+    "distributions": (
+        """
+        SELECT d.id, d.distribution_date, d.good_id, g.name AS good_name,
+               d.from_branch_id, COALESCE(sb.name, 'Warehouse') AS from_branch,
+               d.to_branch_id, tb.name AS to_branch, d.quantity, d.distributed_by_user_id
+        FROM distributions d
+        LEFT JOIN branches sb ON d.from_branch_id = sb.id
+        LEFT JOIN branches tb ON d.to_branch_id = tb.id
+        LEFT JOIN goods g ON d.good_id = g.id
+        """,
+        "d.distribution_date",
+        "(d.to_branch_id = ? OR d.from_branch_id = ?)",
+    ),
+    "branch_inventories": (
+        """
+        SELECT bi.branch_id, b.name AS branch_name, bi.good_id, g.name AS good_name, bi.quantity
+        FROM branch_inventories bi
+        JOIN branches b ON bi.branch_id = b.id
+        JOIN goods g ON bi.good_id = g.id
+        """,
+        None,
+        "bi.branch_id = ?",
+    ),
+    "imported_goods": (
+        """
+        SELECT i.id, i.import_date, i.good_name, i.quantity, i.price, i.import_place, i.import_cost
+        FROM imported_goods i
+        """,
+        "i.import_date",
+        None,
+    ),
+}
+
+FORMATS = ("csv", "jsonl")
+
+
+def _build_query(dataset: str, date_from: Optional[str], date_to: Optional[str], branch_id: Optional[int]) -> tuple[str, list]:
+    if dataset not in EXPORTS:
+        raise ValueError(f"Unknown dataset '{dataset}'. Choose from: {', '.join(EXPORTS)}")
+    select, date_column, branch_filter = EXPORTS[dataset]
+    clauses, params = [], []
+    if date_from or date_to:
+        if date_column is None:
+            raise ValueError(f"'{dataset}' has no date column to filter on.")
+        if date_from:
+            clauses.append(f"{date_column} >= ?")
+            params.append(date_from)
+        if date_to:
+            clauses.append(f"{date_column} <= ?")
+            # a bare date means "up to the end of that day"
+            params.append(date_to + " 23:59:59" if len(date_to) == 10 else date_to)
+    if branch_id is not None:
+        if branch_filter is None:
+            raise ValueError(f"'{dataset}' has no branch column to filter on.")
+        clauses.append(branch_filter)
+        params += [branch_id] * branch_filter.count("?")
+    where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+    return select + where, params
+
+
+def _open_output(path: str, compress: bool):
+    if compress:
+        return gzip.open(path, "wt", encoding="utf-8", newline="")
+    return open(path, "w", encoding="utf-8", newline="")
+
+
+def export_dataset(
+    dataset: str,
+    path: str,
+    fmt: str = "csv",
+    compress: Optional[bool] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    branch_id: Optional[int] = None,
+    batch_size: int = BATCH_SIZE,
+    progress: Optional[Callable[[int], None]] = None,
+) -> Dict:
+    """
+    Streams one dataset to a CSV or JSON Lines file.
+
+    >> dataset: sales | sales_totals | distributions | branch_inventories | imported_goods
+    >> path: output file; compress=None means "gzip if the path ends in .gz"
+    >> fmt: csv | jsonl
+    >> date_from / date_to: 'YYYY-MM-DD' (inclusive) or full timestamps
+    >> branch_id: only rows for this branch (from OR to, for distributions)
+    >> progress: optional callback, called with the running row count after every batch
+    >> return: {"success": True, "rows": n, "path": path} or {"success": False, "reason": ...}
+    """
+    if fmt not in FORMATS:
+        return {"success": False, "reason": f"Unknown format '{fmt}'. Choose from: {', '.join(FORMATS)}"}
+    if compress is None:
+        compress = path.endswith(".gz")
+    try:
+        query, params = _build_query(dataset, date_from, date_to, branch_id)
+    except ValueError as e:
+        return {"success": False, "reason": str(e)}
+
+    rows_written = 0
+    try:
+        # A dedicated cursor: iterating a large result must not share state with other callers
+        cursor = get_connection().cursor()
+        try:
+            cursor.execute(query, params)
+            columns = [c[0] for c in cursor.description]
+            with _open_output(path, compress) as out:
+                writer = csv.writer(out) if fmt == "csv" else None
+                if writer:
+                    writer.writerow(columns)
+                while True:
+                    batch = cursor.fetchmany(batch_size)
+                    if not batch:
+                        break
+                    if writer:
+                        writer.writerows(batch)
+                    else:
+                        out.writelines(json.dumps(dict(zip(columns, row)), ensure_ascii=False) + "\n" for row in batch)
+                    rows_written += len(batch)
+                    if progress:
+                        progress(rows_written)
+        finally:
+            # also when writing fails half-way: no half-read statement is left on the pooled connection
+            cursor.close()
+        logging.info(f"Exported {rows_written} {dataset} row(s) to {path}.")
+        return {"success": True, "rows": rows_written, "path": path}
+    except Exception as e:
+        logging.error(f"Error exporting {dataset}: {e}", exc_info=True)
+        return {"success": False, "reason": str(e), "rows": rows_written}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export sales, sales totals, distributions, inventories or imports.")
+    parser.add_argument("dataset", choices=list(EXPORTS))
+    parser.add_argument("path", help="output file (.gz suffix = gzip)")
+    parser.add_argument("--format", dest="fmt", choices=FORMATS, default=None,
+                        help="default: jsonl for .jsonl/.jsonl.gz paths, otherwise csv")
+    parser.add_argument("--from", dest="date_from")
+    parser.add_argument("--to", dest="date_to")
+    parser.add_argument("--branch", dest="branch_id", type=int)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s - %(message)s")
+    fmt = args.fmt or ("jsonl" if ".jsonl" in args.path else "csv")
+    result = export_dataset(args.dataset, args.path, fmt, date_from=args.date_from,
+                            date_to=args.date_to, branch_id=args.branch_id)
+    if not result["success"]:
+        raise SystemExit(f"Export failed: {result['reason']}")
+    print(f"{result['rows']} row(s) written to {result['path']}")
+
+
+instrument_module(__name__)
+
+
+if __name__ == "__main__":
+    main()
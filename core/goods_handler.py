@@ -6,13 +6,92 @@ Handles operations related to goods in the Warehouse:
 >> retrieve list of all goods.
 >> Get unit price or quantity for a specific good.
 >> support price updates and quantity adjustments .
+>> in-process catalog cache (id >> name/price, folded name >> id) for the POS hot path.
 
 """
 
 
 import logging
-from core.db_manager import get_connection
+import threading
+from core.db_manager import get_connection, get_data_version, get_table_version
+from core.instrumentation import instrument_module
+from core.paged_query import PagedQuery
 from typing import Optional
+
+# SQLite's NOCASE collation folds ASCII letters only; fold names the same way in Python
+# so a Python-side lookup agrees with `name = ? COLLATE NOCASE` and the NOCASE name index.
+_ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+def fold_name(name: str) -> str:
+    """Case-folds a good/branch name exactly like the NOCASE name indexes do."""
+    return name.strip().translate(_ASCII_LOWER)
+
+def get_goods_name_map() -> dict[str, int]:
+    """
+    Returns {folded name: good id} for every good (a copy of the cached catalog index),
+    for resolving names in bulk.
+    """
+    try:
+        return dict(_fresh_catalog()["by_name"])
+    except Exception as e:
+        logging.error(f"Error loading goods name map: {e}", exc_info=True)
+        return {}
+
+# Goods catalog cache
+# Holds only what rarely changes (name, price), never quantities.
+# Stale-check per lookup: PRAGMA data_version (any commit anywhere?) and, only if that moved,
+# the trigger-maintained 'goods_catalog' version (did a good's name/price actually change?).
+_catalog_lock = threading.Lock()
+_catalog = {
+    "by_id": {},          # good_id >> (name, price)
+    "by_name": {},        # folded name >> good_id
+    "data_version": None,
+    "table_version": None,
+}
+
+def invalidate_goods_cache() -> None:
+    """Drops the cached catalog; the next lookup reloads it. Called by every goods write path."""
+    with _catalog_lock:
+        _catalog["data_version"] = None
+        _catalog["table_version"] = None
+
+def _load_catalog(data_version, table_version: int) -> None:
+    rows = get_connection().execute("SELECT id, name, price FROM goods ORDER BY id").fetchall()
+    _catalog["by_id"] = {good_id: (name, price) for good_id, name, price in rows}
+    _catalog["by_name"] = {fold_name(name): good_id for good_id, name, _ in rows}
+    _catalog["data_version"] = data_version
+    _catalog["table_version"] = table_version
+    logging.debug(f"Goods catalog cache loaded ({len(rows)} goods).")
+
+def _fresh_catalog() -> dict:
+    with _catalog_lock:
+        data_version = get_data_version()
+        if data_version != _catalog["data_version"]:
+            table_version = get_table_version("goods_catalog")
+            if table_version != _catalog["table_version"] or _catalog["data_version"] is None:
+                _load_catalog(data_version, table_version)
+            else:
+                _catalog["data_version"] = data_version  # commits elsewhere (sales...), catalog unchanged
+        return _catalog
+
+def get_goods_catalog() -> list[tuple]:
+    """
+    All goods as (id, name) from the catalog cache, ordered by id.
+    """
+    try:
+        return [(good_id, name) for good_id, (name, _) in _fresh_catalog()["by_id"].items()]
+    except Exception as e:
+        logging.error(f"Error loading goods catalog: {e}", exc_info=True)
+        return []
+
+def get_good_id(name: str) -> Optional[int]:
+    """Case-insensitive name >> id lookup served from the catalog cache."""
+    try:
+        return _fresh_catalog()["by_name"].get(fold_name(name))
+    except Exception as e:
+        logging.error(f"Error looking up good '{name}': {e}", exc_info=True)
+        return None
+
 def add_good(name: str, quantity: int, price: float) -> bool: # boolean return
     """
     Adds a new good or increases quantity if it exists (after user confirmation).
@@ -31,7 +110,7 @@ def add_good(name: str, quantity: int, price: float) -> bool: # boolean return
             cursor = conn.cursor()
 
             # Check if good already exists (case-insensitive)
-            cursor.execute("SELECT id, quantity FROM goods WHERE LOWER(name) = LOWER(?)", (name,))
+            cursor.execute("SELECT id, quantity FROM goods WHERE name = ? COLLATE NOCASE", (name,))
             row = cursor.fetchone()
 
             if row:
@@ -49,6 +128,7 @@ def add_good(name: str, quantity: int, price: float) -> bool: # boolean return
                     (name.strip(), quantity, price)
                 )
                 conn.commit()
+                invalidate_goods_cache()
                 logging.info(f"Added new good: {name}, Qty: {quantity}, Price: {price}")
                 return True
 
@@ -58,19 +138,16 @@ def add_good(name: str, quantity: int, price: float) -> bool: # boolean return
 
 def get_good_unit_price(good_id: int) -> Optional[float]:
     """
-    Retrieve the unit price of the good with the given good_id.
+    Retrieve the unit price of the good with the given good_id (from the catalog cache).
     Returns the price as a float if found, or None otherwise.
     """
     try:
-        with get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT price FROM goods WHERE id = ?", (good_id,))
-            row = cursor.fetchone()
-            if row:
-                return row[0]
-            else:
-                logging.warning(f"Good with id {good_id} not found.")
-                return None
+        entry = _fresh_catalog()["by_id"].get(good_id)
+        if entry:
+            return entry[1]
+        else:
+            logging.warning(f"Good with id {good_id} not found.")
+            return None
     except Exception as e:
         logging.error(f"Error fetching unit price for good_id {good_id}: {e}", exc_info=True)
         return None
@@ -85,7 +162,7 @@ def get_existing_good(name: str):
     try:
         with get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT id, quantity, price FROM goods WHERE LOWER(name) = LOWER(?)", (name,))
+            cursor.execute("SELECT id, quantity, price FROM goods WHERE name = ? COLLATE NOCASE", (name,))
             return cursor.fetchone()
     except Exception as e:
         logging.error(f"Error checking existing good: {e}", exc_info=True) #exc_info=True to log the traceback
@@ -112,6 +189,7 @@ def update_good_inventory(good_id: int, quantity: int, unit_cost: float, import_
                 WHERE id = ?
             """, (import_date, supplier, unit_cost, good_id))
             conn.commit()
+        invalidate_goods_cache()
         logging.info(f"Good {good_id} updated with additional quantity {quantity}.")
         return True
     except Exception as e:
@@ -131,4 +209,11 @@ def get_all_goods() -> list[tuple]: # output is a list of tuples
             return cursor.fetchall()
     except Exception as e:
         logging.error(f"Error retrieving goods: {e}", exc_info=True)
-        return []
\ No newline at end of file
+        return []
+
+
+# Paged source of the warehouse goods list (same columns as get_all_goods)
+GOODS_TABLE = PagedQuery("FROM goods", columns=["id", "name", "quantity", "price"], keys=["id"])
+
+
+instrument_module(__name__)
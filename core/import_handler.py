@@ -0,0 +1,198 @@
+# core/import_handler.py
+
+"""
+Supplier deliveries into the warehouse:
+>> record a single import (used by the Record Import screen).
+>> stream a CSV delivery manifest into imported_goods + warehouse stock: ONE transaction,
+   written in chunks (executemany), so a failure half-way leaves nothing imported.
+>> dry-run validation report before anything is written.
+
+CSV columns (header row required, extra columns are ignored):
+    good_name, quantity, price, import_date, import_place, import_cost
+  price       = new selling price of the good
+  import_cost = total cost of the line (unit_cost on goods = import_cost / quantity)
+"""
+
+import csv
+import logging
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from core.db_manager import get_connection, write_transaction
+from core.goods_handler import fold_name, get_goods_name_map, invalidate_goods_cache
+from core.instrumentation import instrument_module
+
+CSV_COLUMNS = ("good_name", "quantity", "price", "import_date", "import_place", "import_cost")
+CHUNK_SIZE = 5000
+MAX_REPORTED_ERRORS = 200
+
+_UPDATE_GOOD = """
+    UPDATE goods
+    SET quantity = quantity + ?,
+        price = ?,
+        last_import_date = ?,
+        supplier = ?,
+        unit_cost = ?
+    WHERE id = ?
+"""
+_INSERT_IMPORT = """
+    INSERT INTO imported_goods (good_name, price, quantity, import_date, import_place, import_cost)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+
+def record_import(good_id: int, good_name: str, quantity: int, price: float,
+                  import_date: str, import_place: str, import_cost: float) -> bool:
+    """
+    Records one import: adds the quantity to the warehouse, sets the selling price and
+    import details on the good, and logs the line in imported_goods (one transaction).
+    """
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(_UPDATE_GOOD, (quantity, price, import_date, import_place,
+                                          import_cost / quantity if quantity else None, good_id))
+            cursor.execute(_INSERT_IMPORT, (good_name, price, quantity, import_date, import_place, import_cost))
+            conn.commit()
+        invalidate_goods_cache()
+        logging.info(f"Import recorded: {quantity} of good_id={good_id} from {import_place}.")
+        return True
+    except Exception as e:
+        logging.error(f"Error recording import: {e}", exc_info=True)
+        return False
+
+
+def _parse_row(row: dict, name_map: Dict[str, int], create_missing: bool) -> tuple:
+    """Validates one CSV row; returns the parsed line or raises ValueError with the reason."""
+    name = (row.get("good_name") or "").strip()
+    if not name:
+        raise ValueError("good_name is empty")
+    good_id = name_map.get(fold_name(name))
+    if good_id is None and not create_missing:
+        raise ValueError(f"unknown good '{name}'")
+    try:
+        quantity = int(row["quantity"])
+        price = float(row["price"])
+        import_cost = float(row["import_cost"])
+    except (TypeError, ValueError, KeyError):
+        raise ValueError("quantity must be an integer, price and import_cost numbers")
+    if quantity <= 0 or price < 0 or import_cost < 0:
+        raise ValueError("quantity must be positive, price and import_cost not negative")
+    import_date = (row.get("import_date") or "").strip()
+    try:
+        datetime.strptime(import_date, "%Y-%m-%d")
+    except ValueError:
+        raise ValueError(f"import_date '{import_date}' is not YYYY-MM-DD")
+    import_place = (row.get("import_place") or "").strip()
+    if not import_place:
+        raise ValueError("import_place is empty")
+    return good_id, name, quantity, price, import_date, import_place, import_cost
+
+
+def _apply_chunk(cursor, chunk: List[tuple], name_map: Dict[str, int]) -> None:
+    """Writes one chunk of parsed lines inside the caller's transaction."""
+    # Goods that do not exist yet (create_missing) are inserted once, then resolved
+    new_names = {fold_name(line[1]): line[1] for line in chunk if line[0] is None and fold_name(line[1]) not in name_map}
+    if new_names:
+        cursor.executemany("INSERT OR IGNORE INTO goods (name, quantity, price) VALUES (?, 0, 0.0)",
+                           [(n,) for n in new_names.values()])
+        for folded, name in new_names.items():
+            cursor.execute("SELECT id FROM goods WHERE name = ? COLLATE NOCASE", (name,))
+            name_map[folded] = cursor.fetchone()[0]
+    # One UPDATE per good per chunk: quantities add up, the last line's price/details win
+    goods_rows: Dict[int, list] = {}
+    import_rows = []
+    for good_id, name, quantity, price, import_date, import_place, import_cost in chunk:
+        if good_id is None:
+            good_id = name_map[fold_name(name)]
+        previous_qty = goods_rows[good_id][0] if good_id in goods_rows else 0
+        goods_rows[good_id] = [previous_qty + quantity, price, import_date, import_place, import_cost / quantity, good_id]
+        import_rows.append((name, price, quantity, import_date, import_place, import_cost))
+    cursor.executemany(_UPDATE_GOOD, goods_rows.values())
+    cursor.executemany(_INSERT_IMPORT, import_rows)
+
+
+def import_deliveries_csv(path: str, dry_run: bool = False, skip_invalid: bool = False,
+                          create_missing: bool = False, chunk_size: int = CHUNK_SIZE,
+                          progress: Optional[Callable[[int], None]] = None) -> Dict:
+    """
+    Streams a supplier delivery CSV into the warehouse.
+    Good names are resolved through ONE preloaded name >> id map; lines are written with
+    executemany in chunks of chunk_size lines, all in one transaction (all or nothing).
+
+    >> dry_run: only validate and report, write nothing
+    >> skip_invalid: import the valid lines even if some lines are invalid
+       (otherwise any invalid line stops the import before anything is written)
+    >> create_missing: add unknown goods to the catalog instead of rejecting their lines
+    >> progress: optional callback, called with the number of CSV lines read so far
+       (every chunk_size lines, in the validation pass and again in the import pass)
+    >> return: {"success", "lines", "valid", "imported", "errors": [{"line": n, "reason": ...}], "error_count"}
+       (line numbers are file line numbers, header = line 1; at most MAX_REPORTED_ERRORS errors are listed)
+    """
+    report = {"success": False, "lines": 0, "valid": 0, "imported": 0, "errors": [], "error_count": 0}
+    name_map = get_goods_name_map()
+
+    def rows():
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            reader = csv.DictReader(f)
+            missing = [c for c in CSV_COLUMNS if c not in (reader.fieldnames or [])]
+            if missing:
+                raise ValueError(f"CSV is missing column(s): {', '.join(missing)}")
+            for row in reader:
+                yield reader.line_num, row
+
+    def validated(collect: bool):
+        for count, (line_num, row) in enumerate(rows(), 1):
+            if collect:
+                report["lines"] += 1
+            if progress and count % chunk_size == 0:
+                progress(count)
+            try:
+                parsed = _parse_row(row, name_map, create_missing)
+            except ValueError as e:
+                if collect:
+                    report["error_count"] += 1
+                    if len(report["errors"]) < MAX_REPORTED_ERRORS:
+                        report["errors"].append({"line": line_num, "reason": str(e)})
+                continue
+            if collect:
+                report["valid"] += 1
+            yield parsed
+
+    try:
+        if dry_run or not skip_invalid:
+            # Validation pass (streaming, nothing kept in memory)
+            for _ in validated(collect=True):
+                pass
+            if dry_run or report["error_count"]:
+                report["success"] = report["error_count"] == 0
+                logging.info(f"Import validation of {path}: {report['valid']} valid, {report['error_count']} invalid line(s).")
+                return report
+        imported = 0
+        try:
+            with write_transaction() as conn:
+                cursor = conn.cursor()
+                chunk: List[tuple] = []
+                for line in validated(collect=skip_invalid):
+                    chunk.append(line)
+                    if len(chunk) >= chunk_size:
+                        _apply_chunk(cursor, chunk, name_map)
+                        imported += len(chunk)
+                        chunk = []
+                if chunk:
+                    _apply_chunk(cursor, chunk, name_map)
+                    imported += len(chunk)
+        finally:
+            invalidate_goods_cache()
+        report["imported"] = imported
+        report["success"] = True
+        logging.info(f"Imported {report['imported']} line(s) from {path}.")
+        return report
+    except Exception as e:
+        # the transaction was rolled back: report["imported"] is still 0
+        logging.error(f"Error importing deliveries from {path} (nothing imported): {e}", exc_info=True)
+        report["reason"] = str(e)
+        return report
+
+
+instrument_module(__name__)
@@ -0,0 +1,182 @@
+# core/instrumentation.py
+
+"""
+Opt-in timing instrumentation for the core handlers.
+
+>> Every public function of core/*_handler.py, core/auth.py and core/db_manager.py is wrapped
+   (instrument_module(__name__) at the bottom of each of those modules).
+>> Per operation: call count, error count, total/max time and a latency histogram.
+   For @contextmanager factories (db_manager.write_transaction, sql_operation) the time is the
+   whole with-block, from entering it to leaving it.
+>> Disabled by default: the wrapper then costs one flag check per call.
+   Turn it on with GDS_INSTRUMENT=1 or enable() (Settings >> Performance Stats for admins).
+
+An "error" is a raised exception OR a handler result that reports failure
+(False, (False, reason) or a dict with "success": False) >> the handlers catch their own exceptions.
+"""
+
+import bisect
+import contextlib
+import functools
+import inspect
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+# Histogram bucket upper bounds in milliseconds (last bucket = everything slower)
+BUCKET_BOUNDS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+_state = {"enabled": os.environ.get("GDS_INSTRUMENT", "") not in ("", "0")}
+_lock = threading.Lock()
+_stats: Dict[str, dict] = {}
+
+
+def enable() -> None:
+    _state["enabled"] = True
+    logging.info("Core instrumentation enabled.")
+
+
+def disable() -> None:
+    _state["enabled"] = False
+    logging.info("Core instrumentation disabled.")
+
+
+def is_enabled() -> bool:
+    return _state["enabled"]
+
+
+def reset() -> None:
+    with _lock:
+        _stats.clear()
+
+
+def _record(name: str, seconds: float, error: bool) -> None:
+    ms = seconds * 1000
+    bucket = bisect.bisect_left(BUCKET_BOUNDS_MS, ms)
+    with _lock:
+        entry = _stats.get(name)
+        if entry is None:
+            entry = _stats[name] = {"count": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0,
+                                    "buckets": [0] * (len(BUCKET_BOUNDS_MS) + 1)}
+        entry["count"] += 1
+        entry["errors"] += error
+        entry["total_ms"] += ms
+        if ms > entry["max_ms"]:
+            entry["max_ms"] = ms
+        entry["buckets"][bucket] += 1
+
+
+def _is_failure(result) -> bool:
+    if result is False:
+        return True
+    if isinstance(result, dict):
+        return result.get("success") is False
+    return isinstance(result, tuple) and len(result) == 2 and result[0] is False
+
+
+def instrumented(func: Callable, name: Optional[str] = None) -> Callable:
+    """Wraps one function; returns it unchanged if it is already wrapped."""
+    if getattr(func, "__instrumented__", False):
+        return func
+    op_name = name or f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+    if inspect.isgeneratorfunction(getattr(func, "__wrapped__", None)):
+        return _instrumented_context(func, op_name)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _state["enabled"]:
+            return func(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except BaseException:
+            _record(op_name, time.perf_counter() - start, True)
+            raise
+        _record(op_name, time.perf_counter() - start, _is_failure(result))
+        return result
+
+    wrapper.__instrumented__ = True
+    return wrapper
+
+
+def _instrumented_context(func: Callable, op_name: str) -> Callable:
+    # calling a @contextmanager factory only builds a generator: time the with-block instead
+    @contextlib.contextmanager
+    def span(*args, **kwargs):
+        if not _state["enabled"]:
+            with func(*args, **kwargs) as value:
+                yield value
+            return
+        start = time.perf_counter()
+        try:
+            with func(*args, **kwargs) as value:
+                yield value
+        except BaseException:
+            _record(op_name, time.perf_counter() - start, True)
+            raise
+        _record(op_name, time.perf_counter() - start, False)
+
+    wrapper = functools.wraps(func)(span)
+    wrapper.__instrumented__ = True
+    return wrapper
+
+
+def instrument_module(module_name: str, exclude: tuple = ("main",)) -> None:
+    """Wraps every public function defined in the given module (call at the end of the module)."""
+    module = sys.modules[module_name]
+    for attr, value in list(vars(module).items()):
+        if attr.startswith("_") or attr in exclude:
+            continue
+        if inspect.isfunction(value) and value.__module__ == module_name:
+            setattr(module, attr, instrumented(value))
+
+
+def _percentile(buckets: List[int], count: int, pct: float) -> float:
+    """Upper bound (ms) of the bucket holding the given percentile."""
+    target = count * pct / 100
+    running = 0
+    for i, n in enumerate(buckets):
+        running += n
+        if running >= target and n:
+            return BUCKET_BOUNDS_MS[i] if i < len(BUCKET_BOUNDS_MS) else float("inf")
+    return 0.0
+
+
+def get_snapshot() -> Dict[str, dict]:
+    """
+    Current statistics per operation:
+    {name: {count, errors, total_ms, avg_ms, max_ms, p50_ms, p95_ms, p99_ms, buckets}}
+    (percentiles are histogram bucket upper bounds, i.e. "at most")
+    """
+    with _lock:
+        raw = {name: {**entry, "buckets": list(entry["buckets"])} for name, entry in _stats.items()}
+    snapshot = {}
+    for name, entry in raw.items():
+        count = entry["count"]
+        snapshot[name] = {
+            "count": count,
+            "errors": entry["errors"],
+            "total_ms": round(entry["total_ms"], 3),
+            "avg_ms": round(entry["total_ms"] / count, 4) if count else 0.0,
+            "max_ms": round(entry["max_ms"], 3),
+            "p50_ms": _percentile(entry["buckets"], count, 50),
+            "p95_ms": _percentile(entry["buckets"], count, 95),
+            "p99_ms": _percentile(entry["buckets"], count, 99),
+            "buckets": entry["buckets"],
+        }
+    return snapshot
+
+
+def slowest(limit: int = 10, key: str = "total_ms") -> List[tuple]:
+    """[(name, stats), ...] sorted by the given statistic, largest first."""
+    return sorted(get_snapshot().items(), key=lambda item: item[1][key], reverse=True)[:limit]
+
+
+def dump_snapshot(path: str) -> None:
+    """Writes the snapshot (plus the bucket bounds) as JSON."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"bucket_bounds_ms": BUCKET_BOUNDS_MS, "operations": get_snapshot()}, f, indent=2)
@@ -0,0 +1,156 @@
+# core/paged_query.py
+
+"""
+Paged reads of one SELECT for the virtualized UI tables (ui/virtual_table.py).
+
+>> Sorting and filtering are pushed down to SQL (ORDER BY / LIKE); only the requested page
+   is ever materialized in Python.
+>> The order is always total (sort column, then the key columns), so pages never overlap.
+>> Sequential pages seek: every page read forwards leaves a bookmark (the sort values of its
+   last row), and the next page starts at WHERE (sort, keys) > bookmark instead of skipping
+   OFFSET rows >> scrolling deep into a 1M-row table costs the same per page as the top.
+   Bookmarks belong to one sort / filter / database state (get_data_version()).
+>> Random jumps use OFFSET from the nearest bookmark, from the top, or backwards from the
+   end, whichever skips the fewest rows.
+"""
+
+import bisect
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional, Sequence
+
+from core.db_manager import get_connection, get_data_version
+
+MAX_BOOKMARKS = 2000     # per sort / filter state
+MAX_BOOKMARK_STATES = 4
+
+
+def _like_pattern(text: str) -> str:
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+class PagedQuery:
+    """
+    >> from_sql: the "FROM ... JOIN ..." part of the query
+    >> columns: one SQL expression per displayed column
+    >> keys: unique SQL expression(s), the final tie-breaker of every ORDER BY
+    >> where: fixed condition, ANDed with the filter (optional)
+    >> sort_columns: expressions to sort by, when they differ from the displayed ones (optional)
+    >> filter_columns: expressions searched by the filter text (default: the displayed columns)
+    >> default_sort / default_descending: column index used when no sort is requested
+       (None = key order)
+    """
+
+    def __init__(self, from_sql: str, columns: Sequence[str], keys: Sequence[str],
+                 where: Optional[str] = None, sort_columns: Optional[Sequence[str]] = None,
+                 filter_columns: Optional[Sequence[str]] = None,
+                 default_sort: Optional[int] = None, default_descending: bool = False) -> None:
+        self.from_sql = from_sql
+        self.columns = list(columns)
+        self.keys = list(keys)
+        self.where = where
+        self.sort_columns = list(sort_columns or columns)
+        self.filter_columns = list(filter_columns or columns)
+        self.default_sort = default_sort
+        self.default_descending = default_descending
+        # (sort, descending, filter, data version) >> ([offsets, sorted], {offset: seek values})
+        self._bookmarks: "OrderedDict[tuple, tuple[list, dict]]" = OrderedDict()
+        self._bookmark_lock = threading.Lock()
+
+    def _where(self, filter_text: str) -> tuple[str, list]:
+        clauses, params = [], []
+        if self.where:
+            clauses.append(f"({self.where})")
+        if filter_text:
+            clauses.append("(" + " OR ".join(f"{c} LIKE ? ESCAPE '\\'" for c in self.filter_columns) + ")")
+            params += [_like_pattern(filter_text)] * len(self.filter_columns)
+        return (f"WHERE {' AND '.join(clauses)}" if clauses else ""), params
+
+    def _order_terms(self, sort: Optional[int]) -> list[str]:
+        return ([self.sort_columns[sort]] if sort is not None else []) + self.keys
+
+    def _order_by(self, sort: Optional[int], descending: bool) -> str:
+        direction = "DESC" if descending else "ASC"
+        return "ORDER BY " + ", ".join(f"{term} {direction}" for term in self._order_terms(sort))
+
+    def _nearest_bookmark(self, state: tuple, offset: int) -> Optional[tuple[int, tuple]]:
+        """(bookmark offset, seek values) of the closest bookmark at or before offset."""
+        with self._bookmark_lock:
+            entry = self._bookmarks.get(state)
+            if entry is None:
+                return None
+            offsets, values = entry
+            i = bisect.bisect_right(offsets, offset)
+            return (offsets[i - 1], values[offsets[i - 1]]) if i else None
+
+    def _add_bookmark(self, state: tuple, offset: int, seek: tuple) -> None:
+        if any(value is None for value in seek):
+            return  # NULLs do not compare in a row value: such a row can not be seeked past
+        with self._bookmark_lock:
+            entry = self._bookmarks.get(state)
+            if entry is None:
+                entry = self._bookmarks[state] = ([], {})
+                while len(self._bookmarks) > MAX_BOOKMARK_STATES:
+                    self._bookmarks.popitem(last=False)
+            else:
+                self._bookmarks.move_to_end(state)
+            offsets, values = entry
+            if offset not in values:
+                if len(offsets) >= MAX_BOOKMARKS:
+                    offsets.clear()
+                    values.clear()
+                bisect.insort(offsets, offset)
+            values[offset] = seek
+
+    def count(self, filter_text: str = "") -> int:
+        where, params = self._where(filter_text)
+        try:
+            return get_connection().execute(f"SELECT COUNT(*) {self.from_sql} {where}", params).fetchone()[0]
+        except Exception as e:
+            logging.error(f"Error counting rows: {e}", exc_info=True)
+            return 0
+
+    def fetch(self, offset: int, limit: int, sort: Optional[int] = None, descending: Optional[bool] = None,
+              filter_text: str = "", total: Optional[int] = None) -> list[tuple]:
+        """
+        Rows [offset, offset + limit) of the sorted, filtered result.
+        Pass total (the count() for the same filter) to let pages near the end be read backwards.
+        """
+        if sort is None and descending is None:
+            sort, descending = self.default_sort, self.default_descending
+        descending = bool(descending)
+        where, params = self._where(filter_text)
+        terms = self._order_terms(sort)
+        try:
+            state = (sort, descending, filter_text, get_data_version())
+            bookmark = self._nearest_bookmark(state, offset)
+            start, seek = bookmark if bookmark else (0, None)
+            reverse = total is not None and max(0, total - offset - limit) < offset - start
+            if reverse:
+                # Same rows, counted from the other end: OFFSET stays small
+                limit = max(0, min(limit, total - offset))
+                skip = max(0, total - offset - limit)
+                descending = not descending
+            else:
+                skip = offset - start
+                if seek is not None:
+                    # rows after the bookmark, in the same order
+                    comparison = f"({', '.join(terms)}) {'<' if descending else '>'} ({', '.join('?' * len(terms))})"
+                    where = f"{where} AND {comparison}" if where else f"WHERE {comparison}"
+                    params = params + list(seek)
+            rows = get_connection().execute(
+                f"SELECT {', '.join(self.columns + terms)} {self.from_sql} {where} "
+                f"{self._order_by(sort, descending)} LIMIT ? OFFSET ?",
+                params + [limit, skip]
+            ).fetchall()
+        except Exception as e:
+            logging.error(f"Error fetching page at offset {offset}: {e}", exc_info=True)
+            return []
+        if reverse:
+            rows.reverse()
+        elif len(rows) == limit:
+            self._add_bookmark(state, offset + limit, rows[-1][len(self.columns):])
+        width = len(self.columns)
+        return [row[:width] for row in rows]
@@ -6,48 +6,140 @@
 >> Validate quantity against available stock.
 >>>> Update branch inventory after sale. 
 >> Supports retrieval and verification of good stock.
+>> Bulk ingestion of end-of-day sale uploads (record_sales_bulk).
 """
 
 
 import logging
 from datetime import datetime
-from core.db_manager import get_connection
-from typing import Optional, Dict
+from core.db_manager import get_connection, write_transaction
+from core.instrumentation import instrument_module
+from typing import Optional, Dict, Iterable, List, Tuple
 
 def record_sale(good_id: int, branch_id: int, quantity: int, sold_by_user_id: int) -> Dict:
     if quantity <= 0:
         logging.warning("Sale quantity must be positive.")
         return {"success": False, "reason": "Quantity must be positive."}
     try:
-        with get_connection() as conn:
+        # a savepoint when the caller already has a transaction open on this thread's connection
+        with write_transaction() as conn:
             cursor = conn.cursor()
-            # Check stock in branch_inventories
+            # Decrement only if enough stock is left: one atomic statement, no lost updates between terminals
             cursor.execute("""
-                SELECT quantity FROM branch_inventories
-                WHERE branch_id = ? AND good_id = ?
-            """, (branch_id, good_id))
-            row = cursor.fetchone()
-            if not row:
-                logging.warning(f"No inventory row for branch_id={branch_id}, good_id={good_id}")
-                return {"success": False, "reason": "No inventory record."}
-            current_stock = row[0]
-            if current_stock < quantity:
+                UPDATE branch_inventories
+                SET quantity = quantity - ?
+                WHERE branch_id = ? AND good_id = ? AND quantity >= ?
+            """, (quantity, branch_id, good_id, quantity))
+            if cursor.rowcount == 0:
+                # Nothing changed >> find out why (only on the failure path)
+                cursor.execute("""
+                    SELECT quantity FROM branch_inventories
+                    WHERE branch_id = ? AND good_id = ?
+                """, (branch_id, good_id))
+                row = cursor.fetchone()
+                if not row:
+                    logging.warning(f"No inventory row for branch_id={branch_id}, good_id={good_id}")
+                    return {"success": False, "reason": "No inventory record."}
+                current_stock = row[0]
                 logging.warning(f"Insufficient stock in branch {branch_id}. Needed={quantity}, Available={current_stock}")
                 return {"success": False, "reason": "Insufficient stock", "available": current_stock}
-            new_stock = current_stock - quantity
-            cursor.execute("""
-                UPDATE branch_inventories
-                SET quantity = ?
-                WHERE branch_id = ? AND good_id = ?
-            """, (new_stock, branch_id, good_id))
             sale_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             cursor.execute("""
                 INSERT INTO sales (good_id, quantity, sale_date, sold_by_user_id, branch_id)
                 VALUES (?, ?, ?, ?, ?)
             """, (good_id, quantity, sale_date, sold_by_user_id, branch_id))
-            conn.commit()
             logging.info(f"Sale recorded: {quantity} of good_id={good_id} at branch_id={branch_id}")
             return {"success": True}
     except Exception as e:
         logging.error(f"Error recording sale: {e}", exc_info=True)
         return {"success": False, "reason": str(e)}
+
+def _format_sale_date(timestamp) -> str:
+    if timestamp is None:
+        return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(timestamp, datetime):
+        return timestamp.strftime("%Y-%m-%d %H:%M:%S")
+    # Accept ISO strings ("2024-05-01T10:00:00", "2024-05-01 10:00:00", "2024-05-01")
+    return datetime.fromisoformat(str(timestamp)).strftime("%Y-%m-%d %H:%M:%S")
+
+def record_sales_bulk(lines: Iterable[tuple], atomic: bool = False) -> Dict:
+    """
+    Records many sale lines in ONE transaction (end-of-day uploads from branches).
+    Stock is validated for the whole batch up front, then inventories are decremented
+    and the sales inserted with executemany.
+
+    >> lines: iterable of (good_id, branch_id, quantity, user_id, timestamp);
+       timestamp may be a datetime, an ISO date string or None (= now)
+    >> atomic: if True, any failing line rejects the whole batch
+    >> return: {"success": bool, "recorded": int, "failed": [{"line": i, "reason": ..., ("available": n)}]}
+       where i is the 0-based position of the line in the input
+    """
+    failed: List[Dict] = []
+    parsed: List[Tuple[int, int, int, int, Optional[int], str]] = []
+    for i, line in enumerate(lines):
+        try:
+            good_id, branch_id, quantity, user_id, timestamp = line
+            good_id, branch_id, quantity = int(good_id), int(branch_id), int(quantity)
+            sale_date = _format_sale_date(timestamp)
+        except (TypeError, ValueError) as e:
+            failed.append({"line": i, "reason": f"Malformed line: {e}"})
+            continue
+        if quantity <= 0:
+            failed.append({"line": i, "reason": "Quantity must be positive."})
+            continue
+        parsed.append((i, good_id, branch_id, quantity, user_id, sale_date))
+
+    if not parsed:
+        return {"success": not failed, "recorded": 0, "failed": failed}
+
+    try:
+        # Write lock before reading stock so no other terminal can sell the same units meanwhile
+        # (a savepoint when the caller already has a transaction open on this thread's connection).
+        with write_transaction() as conn:
+            cursor = conn.cursor()
+            branch_ids = sorted({p[2] for p in parsed})
+            placeholders = ",".join("?" * len(branch_ids))
+            cursor.execute(f"""
+                SELECT branch_id, good_id, quantity FROM branch_inventories
+                WHERE branch_id IN ({placeholders})
+            """, branch_ids)
+            stock = {(b, g): q for b, g, q in cursor.fetchall()}
+
+            sold: Dict[Tuple[int, int], int] = {}
+            rows = []
+            for i, good_id, branch_id, quantity, user_id, sale_date in parsed:
+                key = (branch_id, good_id)
+                if key not in stock:
+                    failed.append({"line": i, "reason": "No inventory record."})
+                    continue
+                available = stock[key] - sold.get(key, 0)
+                if available < quantity:
+                    failed.append({"line": i, "reason": "Insufficient stock", "available": available})
+                    continue
+                sold[key] = sold.get(key, 0) + quantity
+                rows.append((good_id, quantity, sale_date, user_id, branch_id))
+
+            if atomic and failed:
+                # nothing written yet: leaving the block just ends the (empty) transaction
+                logging.warning(f"Bulk sale rejected: {len(failed)} failing line(s).")
+                failed.sort(key=lambda f: f["line"])
+                return {"success": False, "recorded": 0, "failed": failed}
+
+            cursor.executemany("""
+                UPDATE branch_inventories
+                SET quantity = quantity - ?
+                WHERE branch_id = ? AND good_id = ?
+            """, [(qty, b, g) for (b, g), qty in sold.items()])
+            cursor.executemany("""
+                INSERT INTO sales (good_id, quantity, sale_date, sold_by_user_id, branch_id)
+                VALUES (?, ?, ?, ?, ?)
+            """, rows)
+        failed.sort(key=lambda f: f["line"])
+        logging.info(f"Bulk sale recorded: {len(rows)} line(s), {len(failed)} failed.")
+        return {"success": not failed, "recorded": len(rows), "failed": failed}
+    except Exception as e:
+        logging.error(f"Error recording bulk sales: {e}", exc_info=True)
+        return {"success": False, "recorded": 0, "failed": failed, "reason": str(e)}
+
+
+instrument_module(__name__)
@@ -0,0 +1,232 @@
+# core/snapshot.py
+
+"""
+Columnar, memory-mapped snapshot of the sales and distributions tables for analytics.
+
+>> One raw little-endian file per column, fixed width: ts int64 (epoch seconds), branch / good /
+   qty int32 (distributions: branch = receiving branch). 10M sales = 200 MB on disk, read through
+   np.memmap >> the OS page cache is shared by every process, nothing is parsed into Python tuples.
+>> refresh_snapshot() appends only rows with an id above the stored watermark (ids only grow:
+   AUTOINCREMENT). When an existing row was changed or deleted (the '<table>_history' counter of
+   table_versions moved, see migration 6) the snapshot is rebuilt into a new generation of files.
+>> meta.json (written last, atomically) says how many rows are valid; readers never map more.
+>> Locking: refreshes hold <table>.lock exclusively (flock / msvcrt, so across processes too);
+   readers hold it shared only while reading meta.json and mapping the files. A rebuild
+   therefore never truncates or removes files between those two steps, and two processes
+   never write the same generation. Once mapped, the arrays stay valid: old generations are
+   only unlinked (POSIX) or left for a later refresh when still open (Windows).
+>> Lives next to the database: <db file>.snapshot/ (GDS_SNAPSHOT_DIR to move it).
+
+Dates are stored as 'YYYY-MM-DD HH:MM:SS' local time and converted as if they were UTC (see core/timeseries.py).
+"""
+
+import itertools
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+import numpy as np
+
+from core.db_manager import get_connection, get_data_version, get_database_config, get_table_version
+from core.instrumentation import instrument_module
+
+COLUMNS = (("ts", "<i8"), ("branch", "<i4"), ("good", "<i4"), ("qty", "<i4"))
+FETCH_BATCH = 100_000
+
+_ROW_DTYPE = np.dtype([("id", "<i8")] + list(COLUMNS))
+
+# table >> rows after a watermark: (id, epoch seconds, branch, good, qty); unparsable dates are skipped
+_QUERIES = {
+    "sales": """
+        SELECT * FROM (
+            SELECT id, CAST(strftime('%s', sale_date) AS INTEGER) AS ts, COALESCE(branch_id, 0), good_id, quantity
+            FROM sales WHERE id > ?
+        ) WHERE ts IS NOT NULL ORDER BY id
+    """,
+    "distributions": """
+        SELECT * FROM (
+            SELECT id, CAST(strftime('%s', distribution_date) AS INTEGER) AS ts, to_branch_id, good_id, quantity
+            FROM distributions WHERE id > ?
+        ) WHERE ts IS NOT NULL ORDER BY id
+    """,
+}
+
+_lock = threading.Lock()  # in-process counterpart of the lock file (flock is per open file, not per thread)
+_refreshed: Dict[str, tuple] = {}  # table >> data_version the snapshot was last brought up to
+
+
+def snapshot_dir() -> str:
+    return os.environ.get("GDS_SNAPSHOT_DIR") or get_database_config()["db_path"] + ".snapshot"
+
+
+def _column_path(directory: str, table: str, generation: int, column: str) -> str:
+    return os.path.join(directory, f"{table}.{generation}.{column}.bin")
+
+
+def _meta_path(directory: str, table: str) -> str:
+    return os.path.join(directory, f"{table}.meta.json")
+
+
+@contextmanager
+def _file_lock(directory: str, table: str, shared: bool = False):
+    """Cross-process lock on <table>.lock: exclusive for refreshes, shared for readers."""
+    with open(os.path.join(directory, f"{table}.lock"), "a+b") as f:
+        if os.name == "nt":
+            # no shared mode on Windows: readers lock exclusively too (they hold it for microseconds)
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(f.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def read_meta(table: str) -> Optional[dict]:
+    """{"generation", "rows", "watermark", "history", "db"} of the stored snapshot, or None."""
+    try:
+        with open(_meta_path(snapshot_dir(), table), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logging.warning(f"Unreadable {table} snapshot metadata, rebuilding: {e}")
+        return None
+
+
+def _write_meta(directory: str, table: str, meta: dict) -> None:
+    path = _meta_path(directory, table)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(path + ".tmp", path)
+
+
+def _files_complete(directory: str, table: str, meta: dict) -> bool:
+    for column, dtype in COLUMNS:
+        path = _column_path(directory, table, meta["generation"], column)
+        if not os.path.exists(path) or os.path.getsize(path) < meta["rows"] * np.dtype(dtype).itemsize:
+            return False
+    return True
+
+
+def _generations(directory: str, table: str) -> set:
+    found = set()
+    for name in os.listdir(directory):
+        parts = name.split(".")
+        if len(parts) == 4 and parts[0] == table and parts[3] == "bin" and parts[1].isdigit():
+            found.add(int(parts[1]))
+    return found
+
+
+def _remove_old_generations(directory: str, table: str, keep: int) -> None:
+    for generation in _generations(directory, table) - {keep}:
+        for column, _ in COLUMNS:
+            try:
+                os.remove(_column_path(directory, table, generation, column))
+            except OSError:
+                pass  # gone already, or still mapped by a reader (Windows): removed by a later refresh
+
+
+def refresh_snapshot(table: str) -> dict:
+    """
+    Brings the snapshot of `table` ("sales" or "distributions") up to date.
+    >> return: {"success": True, "rows": total, "added": new rows, "rebuilt": bool}
+               or {"success": False, "reason": ...}
+    """
+    if table not in _QUERIES:
+        return {"success": False, "reason": f"Unknown snapshot table '{table}'"}
+    directory = snapshot_dir()
+    db_path = os.path.abspath(get_database_config()["db_path"])
+    with _lock:
+        try:
+            os.makedirs(directory, exist_ok=True)
+            with _file_lock(directory, table):
+                return _refresh_locked(directory, table, db_path)
+        except Exception as e:
+            logging.error(f"Error refreshing {table} snapshot: {e}", exc_info=True)
+            return {"success": False, "reason": str(e)}
+
+
+def _refresh_locked(directory: str, table: str, db_path: str) -> dict:
+    """refresh_snapshot() body; the caller holds _lock and the table's lock file."""
+    # read the counter before the rows: a change in between makes the next refresh rebuild
+    history = get_table_version(f"{table}_history")
+    meta = read_meta(table)
+    rebuilt = (meta is None or meta.get("history") != history or meta.get("db") != db_path
+               or not _files_complete(directory, table, meta))
+    if rebuilt:
+        # a fresh generation number: files of any older one may still be mapped by readers
+        generation = max(_generations(directory, table) | {(meta or {}).get("generation", 0)}) + 1
+        meta = {"generation": generation, "rows": 0, "watermark": 0}
+    meta.update(history=history, db=db_path)
+
+    files = {}
+    for column, _ in COLUMNS:
+        path = _column_path(directory, table, meta["generation"], column)
+        files[column] = open(path, "r+b" if os.path.exists(path) and not rebuilt else "w+b")
+    added = 0
+    try:
+        for column, dtype in COLUMNS:
+            # anything past the valid rows is the tail of an interrupted refresh: overwrite it
+            files[column].seek(meta["rows"] * np.dtype(dtype).itemsize)
+        cursor = get_connection().execute(_QUERIES[table], (meta["watermark"],))
+        while True:
+            batch = np.fromiter(itertools.islice(cursor, FETCH_BATCH), dtype=_ROW_DTYPE)
+            if not len(batch):
+                break
+            for column, _ in COLUMNS:
+                batch[column].tofile(files[column])
+            added += len(batch)
+            meta["watermark"] = int(batch["id"][-1])
+    finally:
+        for f in files.values():
+            f.close()
+
+    meta["rows"] += added
+    if added or rebuilt:
+        _write_meta(directory, table, meta)
+    if rebuilt:
+        _remove_old_generations(directory, table, meta["generation"])
+        logging.info(f"{table} snapshot rebuilt: {meta['rows']} rows.")
+    return {"success": True, "rows": meta["rows"], "added": added, "rebuilt": rebuilt}
+
+
+def open_snapshot(table: str, refresh: bool = True) -> Dict[str, np.ndarray]:
+    """
+    The snapshot of `table` as read-only column arrays {"ts", "branch", "good", "qty"} (np.memmap).
+    >> refresh: catch up with the database first (skipped while nothing was committed since the last time)
+    """
+    if refresh:
+        version = get_data_version()
+        if _refreshed.get(table) != version and refresh_snapshot(table)["success"]:
+            _refreshed[table] = version
+    columns = {column: np.zeros(0, dtype=dtype) for column, dtype in COLUMNS}
+    directory = snapshot_dir()
+    # meta.json and the files it names are read under the lock, so no rebuild can swap them in between
+    with _lock:
+        if not os.path.isdir(directory):
+            return columns
+        with _file_lock(directory, table, shared=True):
+            meta = read_meta(table)
+            if meta and meta["rows"]:
+                for column, dtype in COLUMNS:
+                    path = _column_path(directory, table, meta["generation"], column)
+                    columns[column] = np.memmap(path, dtype=dtype, mode="r", shape=(meta["rows"],))
+    return columns
+
+
+instrument_module(__name__)
@@ -3,55 +3,194 @@
 """
 statistical data aggregation:
 
-* Sales totals grouped by branch and product.
-** full distribution history with user and date.
+* Sales totals grouped by branch and product (from the sales_totals aggregate table).
+** distribution history with user and date (keyset-paginated pages or the full list).
 ** current inventory status across all branches.
+** *_TABLE: sortable/filterable paged sources of the same data for the virtualized UI tables.
+** sales trends / sales vs distributions: NumPy over the memory-mapped columnar snapshot
+   (core/snapshot.py, core/timeseries.py); numpy is imported on the first call.
 
 << used later >>used for generating charts and reports in the UI.
 """
 
 import logging
+from typing import Optional
 from core.db_manager import get_connection
+from core.instrumentation import instrument_module
+from core.paged_query import PagedQuery
 
 def get_sales_by_branch() -> list[tuple]: # for each branch !!
+    # Served from the trigger-maintained sales_totals table: O(branches x goods), not O(sales)
     try:
         with get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
-                SELECT b.name as branch_name, g.name as good_name, SUM(s.quantity) as total_sold
-                FROM sales s
-                JOIN goods g ON s.good_id = g.id
-                JOIN branches b ON s.branch_id = b.id
-                GROUP BY s.branch_id, s.good_id
+                SELECT b.name as branch_name, g.name as good_name, t.total_qty as total_sold
+                FROM sales_totals t
+                JOIN goods g ON t.good_id = g.id
+                JOIN branches b ON t.branch_id = b.id
+                WHERE t.total_qty > 0
+                ORDER BY t.branch_id, t.good_id
             """)
             return cursor.fetchall()
     except Exception as e:
         logging.error("Error fetching sales by branch", exc_info=True)
         return []
 
-def get_distribution_history() -> list[tuple]:
+def get_sales_totals() -> list[tuple]:
+    """(branch_name, good_name, total_qty, total_revenue) for every branch/good with sales."""
     try:
         with get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
-                SELECT g.name, 
-                       COALESCE(sb.name, 'Warehouse') AS from_branch,
-                       tb.name AS to_branch,
-                       d.quantity,
-                       d.distribution_date,
-                       u.username
-                FROM distributions d
-                LEFT JOIN branches sb ON d.from_branch_id = sb.id
-                JOIN branches tb ON d.to_branch_id = tb.id
-                JOIN goods g ON d.good_id = g.id
-                JOIN users u ON d.distributed_by_user_id = u.id
-                ORDER BY d.distribution_date DESC
+                SELECT b.name, g.name, t.total_qty, t.total_revenue
+                FROM sales_totals t
+                JOIN goods g ON t.good_id = g.id
+                JOIN branches b ON t.branch_id = b.id
+                WHERE t.total_qty > 0
+                ORDER BY t.branch_id, t.good_id
             """)
             return cursor.fetchall()
+    except Exception as e:
+        logging.error("Error fetching sales totals", exc_info=True)
+        return []
+
+_DISTRIBUTION_SELECT = """
+    SELECT g.name,
+           COALESCE(sb.name, 'Warehouse') AS from_branch,
+           tb.name AS to_branch,
+           d.quantity,
+           d.distribution_date,
+           u.username,
+           d.id
+    FROM distributions d
+    LEFT JOIN branches sb ON d.from_branch_id = sb.id
+    JOIN branches tb ON d.to_branch_id = tb.id
+    JOIN goods g ON d.good_id = g.id
+    JOIN users u ON d.distributed_by_user_id = u.id
+"""
+
+def _distribution_filters(filters: Optional[dict]) -> tuple[list[str], list]:
+    """
+    Turns a filters dict into WHERE clauses. Supported keys:
+    >> branch_id: distributions from OR to this branch
+    >> good_id, date_from, date_to ('YYYY-MM-DD' or full timestamp, inclusive)
+    """
+    clauses, params = [], []
+    filters = filters or {}
+    if filters.get("branch_id") is not None:
+        clauses.append("(d.to_branch_id = ? OR d.from_branch_id = ?)")
+        params += [filters["branch_id"], filters["branch_id"]]
+    if filters.get("good_id") is not None:
+        clauses.append("d.good_id = ?")
+        params.append(filters["good_id"])
+    if filters.get("date_from"):
+        clauses.append("d.distribution_date >= ?")
+        params.append(filters["date_from"])
+    if filters.get("date_to"):
+        # a bare date means "up to the end of that day"
+        date_to = filters["date_to"]
+        clauses.append("d.distribution_date <= ?")
+        params.append(date_to + " 23:59:59" if len(date_to) == 10 else date_to)
+    return clauses, params
+
+def get_distribution_history_page(after_cursor: Optional[tuple] = None, limit: int = 200, filters: Optional[dict] = None) -> dict:
+    """
+    One page of distribution history, newest first, using keyset pagination over the
+    (distribution_date, id) index >> the cost of a page does not grow with the table size.
+
+    >> after_cursor: the "next_cursor" of the previous page, or None for the first page
+    >> limit: rows per page
+    >> filters: see _distribution_filters
+    >> return: {"rows": [(good, from, to, quantity, date, user), ...], "next_cursor": tuple or None}
+    """
+    clauses, params = _distribution_filters(filters)
+    if after_cursor is not None:
+        clauses.append("(d.distribution_date, d.id) < (?, ?)")
+        params += list(after_cursor)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                {_DISTRIBUTION_SELECT}
+                {where}
+                ORDER BY d.distribution_date DESC, d.id DESC
+                LIMIT ?
+            """, params + [limit])
+            rows = cursor.fetchall()
+        next_cursor = (rows[-1][4], rows[-1][6]) if len(rows) == limit else None
+        return {"rows": [row[:6] for row in rows], "next_cursor": next_cursor}
+    except Exception as e:
+        logging.error("Error fetching distribution history page", exc_info=True)
+        return {"rows": [], "next_cursor": None}
+
+def get_distribution_history(filters: Optional[dict] = None) -> list[tuple]:
+    # Whole history in one list >> prefer get_distribution_history_page / DISTRIBUTION_HISTORY_TABLE for anything user-facing
+    clauses, params = _distribution_filters(filters)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                {_DISTRIBUTION_SELECT}
+                {where}
+                ORDER BY d.distribution_date DESC, d.id DESC
+            """, params)
+            return [row[:6] for row in cursor.fetchall()]
     except Exception as e:
         logging.error("Error fetching distribution history", exc_info=True)
         return []
 
+def _names(table: str) -> dict:
+    try:
+        with get_connection() as conn:
+            return dict(conn.execute(f"SELECT id, name FROM {table}").fetchall())
+    except Exception as e:
+        logging.error(f"Error reading {table} names", exc_info=True)
+        return {}
+
+def get_sales_trend(period: str = "weekly", by: str = "branch", last: int = 12, top: int = 6) -> tuple[dict, list]:
+    """
+    Line chart data: units sold per period by the `top` branches (or goods) over the last `last` periods.
+    >> period: "daily", "weekly" or "monthly"
+    >> return: ({name: [qty per period]}, period labels), ready for plot_line_chart
+    """
+    import numpy as np
+    from core.timeseries import aggregate, load_sales_columns
+    try:
+        result = aggregate(load_sales_columns(), period, by)
+        if not result["labels"]:
+            return {}, []
+        # group 0 = sales without a branch (the snapshot stores NULL as 0): not a series of its own
+        known = result["groups"] != 0
+        totals = result["totals"][known, -last:]
+        groups = result["groups"][known].tolist()
+        order = np.argsort(-totals.sum(axis=1), kind="stable")[:top]
+        names = _names("branches" if by == "branch" else "goods")
+        return {names.get(groups[i], f"#{groups[i]}"): totals[i].tolist() for i in order}, result["labels"][-last:]
+    except Exception as e:
+        logging.error("Error computing sales trend", exc_info=True)
+        return {}, []
+
+def get_sales_vs_distributions(date_from: Optional[str] = None, date_to: Optional[str] = None) -> dict:
+    """
+    Stacked bar data: units sold and units received per branch ('YYYY-MM-DD' range, both optional).
+    >> return: {branch name: {"Sales": qty, "Distributions": qty}}, ready for plot_stacked_bar_chart
+    """
+    from core.timeseries import aggregate, load_distribution_columns, load_sales_columns
+    try:
+        per_branch: dict = {}
+        for label, columns in (("Sales", load_sales_columns()), ("Distributions", load_distribution_columns())):
+            result = aggregate(columns, "monthly", "branch", date_from, date_to)
+            for branch, total in zip(result["groups"].tolist(), result["totals"].sum(axis=1).tolist()):
+                per_branch.setdefault(branch, {"Sales": 0, "Distributions": 0})[label] = total
+        names = _names("branches")
+        return {names.get(branch, f"#{branch}"): per_branch[branch] for branch in sorted(per_branch) if branch}
+    except Exception as e:
+        logging.error("Error computing sales vs distributions", exc_info=True)
+        return {}
+
 def get_branch_inventory() -> list[tuple]:
     try:
         with get_connection() as conn:
@@ -67,3 +206,48 @@ def get_branch_inventory() -> list[tuple]:
     except Exception as e:
         logging.error("Error fetching branch inventory", exc_info=True)
         return []
+
+
+# Paged sources for the virtualized tables (same rows as the functions above).
+# Scrolling seeks from the previous page like get_distribution_history_page does: in the default
+# order the Distribution History pages walk the (distribution_date, id) index, whatever the depth.
+SALES_BY_BRANCH_TABLE = PagedQuery(
+    """
+    FROM sales_totals t
+    JOIN goods g ON t.good_id = g.id
+    JOIN branches b ON t.branch_id = b.id
+    """,
+    columns=["b.name", "g.name", "t.total_qty"],
+    keys=["t.branch_id", "t.good_id"],
+    where="t.total_qty > 0",
+)
+
+DISTRIBUTION_HISTORY_TABLE = PagedQuery(
+    _DISTRIBUTION_SELECT[_DISTRIBUTION_SELECT.index("FROM"):],
+    columns=["g.name", "COALESCE(sb.name, 'Warehouse')", "tb.name", "d.quantity", "d.distribution_date", "u.username"],
+    keys=["d.id"],
+    default_sort=4,
+    default_descending=True,
+)
+
+BRANCH_INVENTORY_TABLE = PagedQuery(
+    """
+    FROM branch_inventories bi
+    JOIN branches b ON bi.branch_id = b.id
+    JOIN goods g ON bi.good_id = g.id
+    """,
+    columns=["b.name", "g.name", "bi.quantity"],
+    keys=["bi.branch_id", "bi.good_id"],
+    default_sort=0,
+)
+
+# "id - name" display of the Branch Inventory screen, sorted by the ids
+BRANCH_INVENTORY_IDS_TABLE = PagedQuery(
+    BRANCH_INVENTORY_TABLE.from_sql,
+    columns=["bi.branch_id || ' - ' || b.name", "bi.good_id || ' - ' || g.name", "bi.quantity"],
+    keys=["bi.branch_id", "bi.good_id"],
+    sort_columns=["bi.branch_id", "bi.good_id", "bi.quantity"],
+)
+
+
+instrument_module(__name__)
@@ -3,7 +3,7 @@ import tkinter as tk
 import logging
 from core.session import get_session
 from ui.login_screen import LoginScreen
-from ui.main_menu import MainMenuScreen
+# the main menu (and every screen behind it) is imported only after a successful login
 
 def main():
     logging.basicConfig(
@@ -27,6 +27,7 @@ def main():
     session = get_session()
     if session.get("user_id") is not None:
         # Show main menu on the same root
+        from ui.main_menu import MainMenuScreen
         menu = MainMenuScreen(root)
         menu.window.deiconify()
         root.mainloop()
@@ -10,7 +10,6 @@ import logging
 import tkinter
 import customtkinter as ctk
 from tkinter import messagebox
-from PIL import Image
 
 
 # internal modules 
@@ -18,6 +17,7 @@ from core.goods_handler import add_good
 from core.session import get_session
 from core.db_manager import get_connection
 from utils.constants import BG_DEFAULT
+from utils.image_cache import get_background
 
 BG_PATH = BG_DEFAULT
 
@@ -36,10 +36,7 @@ def add_goods_screen(parent):
     window.resizable(False, False)
 
     try:
-        bg_image = ctk.CTkImage(
-            dark_image=Image.open(BG_PATH).resize((500, 500)),
-            size=(500, 500)
-        )
+        bg_image = get_background(BG_PATH, (500, 500))
         bg_label = ctk.CTkLabel(master=window, image=bg_image, text="", fg_color="transparent")
         bg_label.place(x=0, y=0)
     except Exception as e:
@@ -82,7 +79,7 @@ def add_goods_screen(parent):
         try:
             with get_connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute("SELECT id, quantity FROM goods WHERE LOWER(name) = LOWER(?)", (name,))
+                cursor.execute("SELECT id, quantity FROM goods WHERE name = ? COLLATE NOCASE", (name,))
                 row = cursor.fetchone()
 
                 if row:
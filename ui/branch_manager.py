@@ -11,7 +11,9 @@ import tkinter
 import customtkinter as ctk
 from tkinter import messagebox, simpledialog
 from core.branch_handler import get_all_branches, add_branch, edit_branch, delete_branch_record
+from core.db_manager import get_data_version
 from core.session import get_session
+from utils.row_diff import diff_rows
 
 class BranchManagerScreen:
     def __init__(self, parent):
@@ -21,6 +23,9 @@ class BranchManagerScreen:
         self.window.geometry("500x600")
         self.window.resizable(False, False)
         self.session = get_session()
+        self.branch_rows = {}     # branch id >> (id, name, location) on screen
+        self.branch_labels = {}   # branch id >> its label
+        self.data_version = None  # database state the list was loaded at
         if self.session["role"] != "ADMIN":
             messagebox.showerror("Access Denied", "You do not have permission to manage branches.")
             self.window.destroy()
@@ -46,23 +51,32 @@ class BranchManagerScreen:
         self.edit_button.pack(pady=5)
         self.delete_button = ctk.CTkButton(self.frame, text="Delete Branch", command=self.delete_branch)
         self.delete_button.pack(pady=5)
-        self.refresh_button = ctk.CTkButton(self.frame, text="Refresh Branches", command=self.refresh_branches)
+        self.refresh_button = ctk.CTkButton(self.frame, text="Refresh Branches", command=lambda: self.refresh_branches(force=True))
         self.refresh_button.pack(pady=5)
         self.back_button = ctk.CTkButton(self.frame, text="Back", command=self.go_back)
         self.back_button.pack(pady=5)
 
-    def refresh_branches(self):
-        # Clear existing branch labels
-        for widget in self.branch_list_frame.winfo_children():
-            widget.destroy()
+    def refresh_branches(self, force=False):
+        # Nothing committed since the last load >> nothing to do
+        if not force and get_data_version() == self.data_version:
+            return
+        self.data_version = get_data_version()
         branches = get_all_branches()
-        for branch in branches:
+        # Only touch the labels of branches that were added, changed or removed
+        added, changed, removed = diff_rows(self.branch_rows, branches)
+        for branch_id in removed:
+            self.branch_labels.pop(branch_id).destroy()
+        for branch in changed:
+            self.branch_labels[branch[0]].configure(text=f"{branch[0]} - {branch[1]} - {branch[2]}")
+        for branch in added:
             branch_label = ctk.CTkLabel(
                 self.branch_list_frame,
                 text=f"{branch[0]} - {branch[1]} - {branch[2]}",
                 font=("Century Gothic", 14)
             )
             branch_label.pack(pady=2, padx=2, anchor="w")
+            self.branch_labels[branch[0]] = branch_label
+        self.branch_rows = {branch[0]: branch for branch in branches}
 
     def add_branch(self):
         name = simpledialog.askstring("New Branch", "Enter branch name:")
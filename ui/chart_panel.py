@@ -0,0 +1,115 @@
+# ui/chart_panel.py
+
+"""
+One embedded matplotlib figure that shows any chart of utils.chart_utils.CHARTS.
+
+>> The figure and its FigureCanvasTkAgg are created once; show() with new numbers for the
+   chart already on screen only moves the existing artists (update_chart) and redraws through Agg.
+>> Switching to another chart kind (or other labels) clears the axes and draws it again,
+   still on the same figure and canvas.
+>> Every rendered chart is kept as PNG in utils.chart_cache: a chart that was rendered before
+   (same kind, data, size and theme) is put on the canvas as an image, without matplotlib;
+   the chart already on screen is not touched at all. save() writes the cached PNG too.
+"""
+
+import base64
+import io
+import tkinter
+from typing import Any, Dict, Optional, Tuple
+
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.image import imsave
+
+from utils.chart_cache import chart_key, get_png, put_png, write_png
+from utils.chart_utils import draw_chart, new_figure, update_chart
+
+CACHED_IMAGE_TAG = "cached_chart"
+
+
+class ChartPanel:
+    def __init__(self, master: Any, figsize: Tuple[float, float] = (7.0, 3.6), dpi: int = 100) -> None:
+        self.figure = new_figure(figsize, dpi)
+        self.canvas = FigureCanvasTkAgg(self.figure, master=master)
+        self.widget = self.canvas.get_tk_widget()
+        self.widget.bind("<Configure>", self.on_resize, add="+")
+        self.ax: Any = None
+        self.handles: Optional[Dict] = None
+        self.shown: Optional[tuple] = None     # (kind, data, options) on screen
+        self.screen_key: Optional[str] = None  # chart_key of what is on screen
+        self.figure_key: Optional[str] = None  # chart_key of what the figure holds
+        self.photo: Optional[tkinter.PhotoImage] = None
+
+    # Layout helpers, so the panel can be placed like a widget
+    def pack(self, **kwargs: Any) -> None:
+        self.widget.pack(**kwargs)
+
+    def grid(self, **kwargs: Any) -> None:
+        self.widget.grid(**kwargs)
+
+    @property
+    def kind(self) -> Optional[str]:
+        return self.shown[0] if self.shown else None
+
+    def size(self) -> Tuple[int, int]:
+        width, height = self.figure.bbox.size
+        return int(width), int(height)
+
+    def show(self, kind: str, data: Dict, **options: Any) -> None:
+        """Shows chart `kind` of data (options as for chart_utils.draw_chart): cached, in place or drawn."""
+        if not data:
+            self.clear("No data to plot.")
+            return
+        self.shown = (kind, data, options)
+        key = chart_key(kind, data, self.size(), **options)
+        if key == self.screen_key:
+            return
+        png = get_png(key)
+        if png is not None:
+            self._show_png(png)
+        else:
+            self._render(kind, data, options, key)
+        self.screen_key = key
+
+    def _render(self, kind: str, data: Dict, options: Dict, key: str) -> None:
+        if self.handles is None or self.handles["kind"] != kind or not update_chart(self.handles, self.ax, data, **options):
+            self.figure.clear()
+            self.ax = self.figure.add_subplot(111)
+            self.handles = draw_chart(kind, self.ax, data, **options)
+            self.figure.tight_layout()
+        self.widget.delete(CACHED_IMAGE_TAG)
+        self.canvas.draw()
+        self.figure_key = key
+        # the Agg buffer just drawn is the picture on screen: cache it as PNG
+        buffer = io.BytesIO()
+        imsave(buffer, self.canvas.buffer_rgba(), format="png", pil_kwargs={"compress_level": 1})
+        put_png(key, buffer.getvalue())
+
+    def _show_png(self, png: bytes) -> None:
+        self.photo = tkinter.PhotoImage(master=self.widget, data=base64.b64encode(png), format="png")
+        self.widget.delete(CACHED_IMAGE_TAG)
+        self.widget.create_image(0, 0, anchor="nw", image=self.photo, tags=CACHED_IMAGE_TAG)
+
+    def on_resize(self, event: Any) -> None:
+        # the key includes the size: a resized canvas gets a chart of its own size
+        if self.shown is not None:
+            self.widget.after_idle(lambda: self.show(self.shown[0], self.shown[1], **self.shown[2]))
+
+    def clear(self, message: str = "") -> None:
+        self.figure.clear()
+        self.ax = None
+        self.handles = None
+        self.shown = self.screen_key = self.figure_key = None
+        self.widget.delete(CACHED_IMAGE_TAG)
+        if message:
+            self.figure.text(0.5, 0.5, message, ha="center", va="center", fontsize=12)
+        self.canvas.draw_idle()
+
+    def save(self, path: str) -> None:
+        """Writes the chart on screen to an image file (format from the extension; PNG from the cache)."""
+        if path.lower().endswith(".png") and self.screen_key and write_png(self.screen_key, path):
+            return
+        if self.shown is not None and self.figure_key != self.screen_key:
+            # the screen shows a cached image: bring the figure up to date first
+            kind, data, options = self.shown
+            self._render(kind, data, options, self.screen_key)
+        self.figure.savefig(path, bbox_inches="tight")
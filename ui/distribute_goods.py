@@ -3,18 +3,19 @@
 # UI screen that handles distribution of goods from the warehouse or branches
 # to other branches. Includes stock checking, dropdown selectors for goods/branches,
 # and input validation. Connected to distribution handler logic.
+# Multi-line mode: lines can be collected into a manifest and shipped together in one transaction.
 #
 # Jamal alqbail
 
 import logging
 import tkinter
 import customtkinter as ctk
-from tkinter import messagebox
+from tkinter import messagebox, ttk
 
 
-from core.distribution_handler import distribute_goods, get_stock
+from core.distribution_handler import distribute_goods, distribute_manifest, get_stock
 from core.branch_handler import get_all_branches
-from core.db_manager import get_connection  # for goods retrieval
+from core.goods_handler import get_goods_catalog
 from core.session import get_session
 
 class DistributeGoodsScreen:
@@ -26,12 +27,13 @@ class DistributeGoodsScreen:
         #     return
         self.window = ctk.CTkToplevel(parent)
         self.window.title("Distribute Goods")
-        self.window.geometry("600x650")
+        self.window.geometry("600x900")
         self.window.resizable(False, False)
         self.build_ui()
     
     def build_ui(self):
-        self.frame = ctk.CTkFrame(self.window, width=580, height=600, corner_radius=15)
+        self.manifest = []  # pending lines: (good_id, from_branch_id, to_branch_id, quantity)
+        self.frame = ctk.CTkFrame(self.window, width=580, height=850, corner_radius=15)
         self.frame.place(relx=0.5, rely=0.5, anchor=tkinter.CENTER)
         
         self.title_label = ctk.CTkLabel(self.frame, text="Distribute Goods", font=("Century Gothic", 24))
@@ -78,19 +80,30 @@ class DistributeGoodsScreen:
         self.distribute_button = ctk.CTkButton(self.frame, text="Distribute", command=self.do_distribute)
         self.distribute_button.pack(pady=10)
         
+        # Manifest (multi-line) mode
+        self.add_line_button = ctk.CTkButton(self.frame, text="Add to Manifest", command=self.add_to_manifest)
+        self.add_line_button.pack(pady=5)
+        
+        manifest_columns = ("Good", "From", "To", "Quantity")
+        self.manifest_tree = ttk.Treeview(self.frame, columns=manifest_columns, show='headings', height=6)
+        for col in manifest_columns:
+            self.manifest_tree.heading(col, text=col)
+            self.manifest_tree.column(col, width=120, anchor=tkinter.CENTER)
+        self.manifest_tree.pack(pady=5, padx=10)
+        
+        manifest_buttons = ctk.CTkFrame(self.frame, fg_color="transparent")
+        manifest_buttons.pack(pady=5)
+        self.ship_button = ctk.CTkButton(manifest_buttons, text="Ship Manifest", command=self.ship_manifest)
+        self.ship_button.grid(row=0, column=0, padx=5)
+        self.clear_button = ctk.CTkButton(manifest_buttons, text="Clear Manifest", command=self.clear_manifest)
+        self.clear_button.grid(row=0, column=1, padx=5)
+        
         # Back button
         self.back_button = ctk.CTkButton(self.frame, text="Back", command=self.go_back)
         self.back_button.pack(pady=5)
     
     def get_goods_list(self):
-        try:
-            with get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT id, name FROM goods")
-                return cursor.fetchall()
-        except Exception as e:
-            logging.error(f"Error fetching goods: {e}")
-            return []
+        return get_goods_catalog()
     
     def check_stock(self):
         src_text = self.source_var.get()
@@ -110,13 +123,14 @@ class DistributeGoodsScreen:
             self.stock_label.configure(text="Available Stock: N/A")
             messagebox.showerror("Error", f"Could not retrieve stock: {stock_info.get('reason', '')}")
     
-    def do_distribute(self):
+    def read_selection(self):
+        """Returns (good_id, from_branch_id, to_branch_id, quantity) from the form, or None after showing an error."""
         src_text = self.source_var.get()
         good_text = self.good_var.get()
         dest_text = self.dest_var.get()
         if not good_text or not dest_text:
             messagebox.showerror("Error", "Select both good and destination branch.")
-            return
+            return None
         good_id = int(good_text.split(" - ")[0])
         if src_text.startswith("Warehouse"):
             from_branch_id = None
@@ -127,7 +141,14 @@ class DistributeGoodsScreen:
             quantity = int(self.qty_var.get())
         except ValueError:
             messagebox.showerror("Error", "Quantity must be an integer.")
+            return None
+        return good_id, from_branch_id, to_branch_id, quantity
+    
+    def do_distribute(self):
+        selection = self.read_selection()
+        if selection is None:
             return
+        good_id, from_branch_id, to_branch_id, quantity = selection
         result = distribute_goods(good_id, from_branch_id, to_branch_id, quantity, self.session.get("user_id", 0))
         if result["success"]:
             messagebox.showinfo("Success", "Goods distributed successfully!")
@@ -136,6 +157,35 @@ class DistributeGoodsScreen:
             available = result.get("available", "N/A")
             messagebox.showerror("Error", f"Distribution failed: {reason}\nAvailable: {available}")
     
+    def add_to_manifest(self):
+        selection = self.read_selection()
+        if selection is None:
+            return
+        if selection[3] <= 0:
+            messagebox.showerror("Error", "Quantity must be positive.")
+            return
+        self.manifest.append(selection)
+        self.manifest_tree.insert("", "end", values=(self.good_var.get(), self.source_var.get(), self.dest_var.get(), selection[3]))
+    
+    def clear_manifest(self):
+        self.manifest.clear()
+        self.manifest_tree.delete(*self.manifest_tree.get_children())
+    
+    def ship_manifest(self):
+        if not self.manifest:
+            messagebox.showwarning("Warning", "The manifest is empty.")
+            return
+        result = distribute_manifest(self.manifest, self.session.get("user_id", 0))
+        if result["success"]:
+            messagebox.showinfo("Success", f"Manifest shipped: {result['lines']} line(s) distributed.")
+            self.clear_manifest()
+        else:
+            problems = [
+                f"Line {f['line'] + 1}: {f['reason']}" + (f" (available: {f['available']})" if "available" in f else "")
+                for f in result.get("failed", [])
+            ] or [result.get("reason", "Distribution failed.")]
+            messagebox.showerror("Error", "Manifest not shipped, nothing was changed:\n" + "\n".join(problems[:15]))
+    
     def go_back(self):
         self.window.destroy()
         self.parent.deiconify()
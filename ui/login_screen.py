@@ -12,13 +12,14 @@ import logging
 import customtkinter as ctk
 import tkinter
 from tkinter import messagebox
-from PIL import Image
 
 
 from core.auth import authenticate_user, register_user
 from core.session import set_session
+from utils.background import run_in_background
 from utils.style_utils import apply_theme
 from utils.constants import BG_DEFAULT
+from utils.image_cache import get_background
 
 BG_PATH = BG_DEFAULT
 
@@ -43,6 +44,7 @@ class LoginScreen:
 
         # In a real application, you might pass in a shared DB connection or a service.
         self.attempts = 0
+        self.busy = False  # a bcrypt check / registration is running in the background
         self._login_window()
 
     def _login_window(self, event=None) -> None:
@@ -55,10 +57,7 @@ class LoginScreen:
 
         # Background image
         try:
-            bg_image = ctk.CTkImage(
-                dark_image=Image.open(BG_PATH).resize((500, 600)),
-                size=(500, 600)
-            )
+            bg_image = get_background(BG_PATH, (500, 600))
             bg_label = ctk.CTkLabel(master=self.window, image=bg_image, text="")
             bg_label.place(x=0, y=0)
         except Exception as e:
@@ -112,14 +111,14 @@ class LoginScreen:
         self.toggle_link.bind("<Button-1>", self._register_window)
 
         # Login button
-        login_button = ctk.CTkButton(
+        self.action_button = ctk.CTkButton(
             master=self.frame,
             width=220,
             text="Login",
             corner_radius=6,
             command=self._login
         )
-        login_button.place(x=50, y=250)
+        self.action_button.place(x=50, y=250)
 
     def _register_window(self, event=None) -> None:
         """
@@ -134,20 +133,31 @@ class LoginScreen:
         self.toggle_link.bind("<Button-1>", self._login_window)
 
         # Update button to call the register method
-        register_button = ctk.CTkButton(
+        self.action_button = ctk.CTkButton(
             master=self.frame,
             width=220,
             text="Create Account",
             corner_radius=6,
             command=self._register
         )
-        register_button.place(x=50, y=250)
+        self.action_button.place(x=50, y=250)
+
+    def _set_busy(self, busy: bool, text: str = "") -> None:
+        """Disables the action button while a background check runs (Enter is ignored too)."""
+        self.busy = busy
+        if busy:
+            self._idle_text = self.action_button.cget("text")
+            self.action_button.configure(state="disabled", text=text)
+        else:
+            self.action_button.configure(state="normal", text=self._idle_text)
 
     def _login(self, event=None) -> None:
         """
         Authenticates the user by checking the provided username and password.
         Sets session if successful, otherwise shows an error.
         """
+        if self.busy:
+            return
         username = self.username_entry.get().strip()
         password = self.password_entry.get().strip()
 
@@ -156,8 +166,14 @@ class LoginScreen:
             messagebox.showerror("Login Error", "Username and password must not be empty.")
             return
 
-        # Attempt to authenticate
-        user_row = authenticate_user(username, password)
+        # Attempt to authenticate (bcrypt runs on a worker thread)
+        self._set_busy(True, "Signing in...")
+        run_in_background(self.window, authenticate_user, username, password,
+                          on_done=lambda user_row: self._login_done(username, user_row),
+                          on_error=lambda e: self._login_done(username, None))
+
+    def _login_done(self, username: str, user_row) -> None:
+        self._set_busy(False)
         if user_row:
             user_id, role = user_row
             set_session(user_id, role)
@@ -177,6 +193,8 @@ class LoginScreen:
         
        #registers a new user by inserting them into the DB (hashed password).
        
+        if self.busy:
+            return
         username = self.username_entry.get().strip()
         password = self.password_entry.get().strip()
 
@@ -188,7 +206,13 @@ class LoginScreen:
             messagebox.showerror("Error", "Username/Password is too long.")
             return
 
-        success, msg = register_user(username, password)
+        self._set_busy(True, "Creating account...")
+        run_in_background(self.window, register_user, username, password,
+                          on_done=lambda outcome: self._register_done(username, *outcome),
+                          on_error=lambda e: self._register_done(username, False, "Registration failed due to an internal error."))
+
+    def _register_done(self, username: str, success: bool, msg: str) -> None:
+        self._set_busy(False)
         if success:
             logging.info(f"User '{username}' registered successfully.")
             messagebox.showinfo("Success", "Account created successfully!")
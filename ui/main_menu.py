@@ -9,11 +9,11 @@ MAIN MENU screen shown after successful login.
 import logging
 import customtkinter as ctk
 import tkinter
-from PIL import Image
 from typing import List, Tuple, Any  
 from core.session import get_session
 from utils.constants import BG_DARK
 from utils.style_utils import apply_theme, toggle_theme, get_bg_image_path
+from utils.image_cache import get_background
 
 BG_PATH = BG_DARK
 
@@ -33,7 +33,6 @@ class MainMenuScreen:
 
         self.bg_label = None
         self.frame = None
-        self.pil_image = None
         self.bg_image = None
 
         self._build_ui()
@@ -42,8 +41,8 @@ class MainMenuScreen:
 
     def update_background(self):
         try:
-            bg_image = Image.open(get_bg_image_path()).resize((1350, 740))
-            self.bg_image = ctk.CTkImage(dark_image=bg_image, size=(1350, 740))
+            # both theme backgrounds stay cached, so toggling back and forth decodes nothing
+            self.bg_image = get_background(get_bg_image_path(), (1350, 740))
             self.bg_label.configure(image=self.bg_image)
             self.bg_label.lower()  # Send background to back
         except Exception as e:
@@ -57,8 +56,7 @@ class MainMenuScreen:
 
     def _build_ui(self):
         try:
-            self.pil_image = Image.open(BG_PATH).resize((1350, 740))
-            self.bg_image = ctk.CTkImage(dark_image=self.pil_image, size=(1350, 740))
+            self.bg_image = get_background(BG_PATH, (1350, 740))
             self.bg_label = ctk.CTkLabel(
                 master=self.window,
                 image=self.bg_image,
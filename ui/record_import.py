@@ -8,6 +8,8 @@
 ***  source (customer/place), and desired selling price.
 
  >>>> Validates and stores import data in the database for sales and inventory tracking.
+ >>>> "Import CSV" loads a whole supplier delivery manifest on a worker thread (validated first, all or
+      nothing, see core/import_handler.py).
 
 
  !!!! maybe delete it ??? if sales screen is enough (REMEMBER JIMMIE :))
@@ -16,13 +18,15 @@
 import logging
 import tkinter
 import customtkinter as ctk
-from tkinter import messagebox
-from PIL import Image
+from tkinter import messagebox, filedialog
 
 
 from core.session import get_session
-from core.db_manager import get_connection
+from core.goods_handler import get_goods_catalog
+from core.import_handler import record_import, import_deliveries_csv
 from utils.constants import BG_DEFAULT
+from utils.background import run_in_background
+from utils.image_cache import get_background
 
 
 BG_PATH = BG_DEFAULT
@@ -45,10 +49,7 @@ def record_import_screen(parent):
 
     # Attempt to load and display a background image
     try:
-        bg_image = ctk.CTkImage(
-            dark_image=Image.open(BG_PATH).resize((500, 700)),
-            size=(500, 700)
-        )
+        bg_image = get_background(BG_PATH, (500, 700))
         bg_label = ctk.CTkLabel(master=window, image=bg_image, text="", fg_color="transparent")
         bg_label.place(x=0, y=0)
     except Exception as e:
@@ -62,15 +63,8 @@ def record_import_screen(parent):
 
     ctk.CTkLabel(frame, text="Record New Import", font=("Century Gothic", 22)).pack(pady=(20, 10))
 
-    # Load the list of goods from the central goods table
-    try:
-        with get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT id, name FROM goods")
-            goods = cursor.fetchall()
-    except Exception as e:
-        logging.error(f"Error loading goods: {e}")
-        goods = []
+    # Load the list of goods from the central goods table (catalog cache)
+    goods = get_goods_catalog()
 
     goods_names = [f"{g[0]} - {g[1]}" for g in goods]
     selected_good = tkinter.StringVar(value=goods_names[0] if goods_names else "")
@@ -117,30 +111,79 @@ def record_import_screen(parent):
             messagebox.showerror("Error", "Import Date and Import Place are required.")
             return
 
-        try:
-            with get_connection() as conn:
-                cursor = conn.cursor()
-                # update the central warehouse goods quantity (adding the imported amount) 
-                cursor.execute("UPDATE goods SET quantity = quantity + ? WHERE id = ?", (quantity, good_id))
-                
-                # update the selling price 
-                cursor.execute("UPDATE goods SET price = ? WHERE id = ?", (price, good_id))
-                
-                # Record the import transaction in the imported_goods table
-                cursor.execute("""
-                    INSERT INTO imported_goods (good_name, price, quantity, import_date, import_place, import_cost)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """, (good_name, price, quantity, import_date, import_place, import_cost))
-                conn.commit()
-                messagebox.showinfo("Success", "Import recorded and warehouse quantity updated.")
-                # Clear the fields after success
-                for var in (qty_var, date_var, place_var, cost_var, price_var):
-                    var.set("")
-        except Exception as e:
-            logging.error(f"Error recording import: {e}")
+        if record_import(good_id, good_name, quantity, price, import_date, import_place, import_cost):
+            messagebox.showinfo("Success", "Import recorded and warehouse quantity updated.")
+            # Clear the fields after success
+            for var in (qty_var, date_var, place_var, cost_var, price_var):
+                var.set("")
+        else:
             messagebox.showerror("Error", "Failed to record import.")
 
-    ctk.CTkButton(frame, text="Record Import", command=submit_import).pack(pady=20)
+    # CSV import runs on a worker thread (100k lines take seconds); the worker only stores the
+    # line count, the Tk thread shows it on the button
+    csv_progress = {"lines": None}
+
+    def show_csv_progress():
+        if csv_progress["lines"] is not None and csv_button.winfo_exists():
+            csv_button.configure(text=f"{csv_progress['task']}... {csv_progress['lines']:,} lines")
+            window.after(200, show_csv_progress)
+
+    def run_csv_task(task, on_done, *args, **kwargs):
+        csv_progress.update(lines=0, task=task)
+        csv_button.configure(state="disabled")
+        show_csv_progress()
+
+        def finish(result):
+            csv_progress["lines"] = None
+            csv_button.configure(state="normal", text="Import CSV...")
+            on_done(result)
+
+        def failed(error):
+            csv_progress["lines"] = None
+            csv_button.configure(state="normal", text="Import CSV...")
+            messagebox.showerror("Error", f"{task} failed: {error}")
+
+        run_in_background(window, import_deliveries_csv, *args,
+                          progress=lambda lines: csv_progress.update(lines=lines), on_done=finish, on_error=failed,
+                          **kwargs)
+
+    def import_csv():
+        path = filedialog.askopenfilename(
+            parent=window,
+            title="Supplier delivery CSV",
+            filetypes=[("CSV", "*.csv"), ("All files", "*.*")]
+        )
+        if not path:
+            return
+        # Dry run first: nothing is written until the user has seen the validation report
+        run_csv_task("Validating", lambda report: csv_validated(path, report), path, dry_run=True)
+
+    def csv_validated(path, report):
+        if "reason" in report:
+            messagebox.showerror("Error", f"Could not read the CSV: {report['reason']}")
+            return
+        summary = f"{report['lines']} line(s): {report['valid']} valid, {report['error_count']} invalid."
+        if report["error_count"]:
+            details = "\n".join(f"Line {e['line']}: {e['reason']}" for e in report["errors"][:10])
+            if not report["valid"]:
+                messagebox.showerror("Validation", f"{summary}\n\n{details}")
+                return
+            if not messagebox.askyesno("Validation", f"{summary}\n\n{details}\n\nImport the valid lines and skip the rest?"):
+                return
+        elif not messagebox.askyesno("Validation", f"{summary}\n\nImport now?"):
+            return
+        run_csv_task("Importing", csv_imported, path, skip_invalid=bool(report["error_count"]))
+
+    def csv_imported(result):
+        if result["success"]:
+            messagebox.showinfo("Success", f"{result['imported']} import line(s) recorded.")
+        else:
+            # one transaction: a failure rolls the whole file back
+            messagebox.showerror("Error", f"Import failed, nothing was imported: {result.get('reason', 'see logs')}")
+
+    ctk.CTkButton(frame, text="Record Import", command=submit_import).pack(pady=(20, 5))
+    csv_button = ctk.CTkButton(frame, text="Import CSV...", command=import_csv)
+    csv_button.pack(pady=(5, 20))
 
 
 # must return to main 
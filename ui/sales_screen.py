@@ -16,7 +16,7 @@ from tkinter import messagebox
 
 from core.sales_handler import record_sale
 from core.branch_handler import get_all_branches
-from core.goods_handler import get_all_goods, get_good_unit_price  # get_good_unit_price 
+from core.goods_handler import get_goods_catalog, get_good_unit_price  # both served from the catalog cache
 from core.distribution_handler import get_stock
 from core.session import get_session
 
@@ -49,7 +49,7 @@ class RecordSaleScreen:
         self.branch_menu.pack(pady=5)
         
         # Goods selection 
-        goods = get_all_goods()
+        goods = get_goods_catalog()
         good_options = [f"{g[0]} - {g[1]}" for g in goods]
         self.good_var = tkinter.StringVar(value=good_options[0] if good_options else "")
         ctk.CTkLabel(self.frame, text="Select Good", font=("Century Gothic", 14)).pack(pady=5)
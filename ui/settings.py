@@ -3,39 +3,149 @@
 Tkinter-based settings screen with user management and password controls.
 For regular users: shows change password form.
 For ADMIN users: shows user list (with bcrypt-hashed passwords), add/delete user controls,
-and a form to update the admin's own password.
+a form to update the admin's own password and a window with the slowest core operations.
 Uses bcrypt for password hashing and verification.
 """
 import logging
 import tkinter
 import customtkinter as ctk
-from PIL import Image
-from tkinter import ttk, messagebox
-import bcrypt
+from tkinter import ttk, messagebox, filedialog
 
 from core.session import get_session
 from core.db_manager import get_connection
+from core import instrumentation
+from utils.background import run_in_background, show_loading, clear_loading
 from utils.constants import BG_DEFAULT
+from utils.image_cache import get_background
 
 bg_path = BG_DEFAULT
 
 def hash_password(password):
     """Hash a password using bcrypt and return the hashed password as a string."""
+    import bcrypt  # first use only: opening the screen does not need it
     hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
     return hashed.decode('utf-8')
 
-def refresh_user_list(tree):
-    """Refresh the user list in the treeview"""
-    for item in tree.get_children():
-        tree.delete(item)
+def fetch_users():
+    """All user accounts (runs on a worker thread)"""
     try:
         with get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT username, password, role FROM users")
-            for row in cursor.fetchall():
-                tree.insert("", "end", values=row)
+            return cursor.fetchall()
     except Exception as e:
         logging.error(f"Failed to load user accounts: {e}", exc_info=True)
+        return []
+
+def refresh_user_list(tree):
+    """Refresh the user list in the treeview (the query runs in the background)"""
+    show_loading(tree)
+
+    def fill(rows):
+        clear_loading(tree)
+        for row in rows:
+            tree.insert("", "end", values=row)
+
+    run_in_background(tree, fetch_users, on_done=fill)
+
+def change_password(username, current, new):
+    """
+    Checks the current password and stores the new hash (runs on a worker thread: bcrypt is slow).
+    >> return: (True, "Password updated successfully") or (False, reason)
+    """
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            # Get the stored hashed password for current user
+            cursor.execute("SELECT password FROM users WHERE username=?", (username,))
+            result = cursor.fetchone()
+            if not result:
+                return False, "User not found"
+
+            stored_hash = result[0]
+            import bcrypt
+            if not bcrypt.checkpw(current.encode('utf-8'), stored_hash.encode('utf-8')):
+                return False, "Incorrect current password"
+
+            new_hash = hash_password(new)
+            cursor.execute("UPDATE users SET password=? WHERE username=?", (new_hash, username))
+            conn.commit()
+            return True, "Password updated successfully"
+    except Exception as e:
+        logging.error(f"Password change failed: {e}", exc_info=True)
+        return False, "Failed to update password"
+
+def add_user_account(username, password, user_role):
+    """Inserts a user with a bcrypt-hashed password (worker thread) >> (success, message)"""
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT username FROM users WHERE username=?", (username,))
+            if cursor.fetchone():
+                return False, "Username already exists"
+
+            hashed_pw = hash_password(password)
+            cursor.execute("INSERT INTO users (username, password, role) VALUES (?, ?, ?)",
+                           (username, hashed_pw, user_role))
+            conn.commit()
+            return True, "User added successfully"
+    except Exception as e:
+        logging.error(f"Failed to add user: {e}", exc_info=True)
+        return False, "Failed to add user"
+
+
+PERF_COLUMNS = ("Operation", "Calls", "Errors", "Avg ms", "p95 ms", "Max ms", "Total ms")
+
+
+def performance_window(parent):
+    """Admin view of the core instrumentation: slowest operations by total time."""
+    window = ctk.CTkToplevel(parent)
+    window.title("Performance Stats")
+    window.geometry("760x420")
+
+    enabled_var = ctk.BooleanVar(value=instrumentation.is_enabled())
+
+    tree = ttk.Treeview(window, columns=PERF_COLUMNS, show="headings", height=14)
+    for col in PERF_COLUMNS:
+        tree.heading(col, text=col)
+        tree.column(col, width=230 if col == "Operation" else 80, anchor="w" if col == "Operation" else "e")
+    tree.pack(pady=10, padx=10, fill="both", expand=True)
+
+    def refresh():
+        tree.delete(*tree.get_children())
+        for name, stats in instrumentation.slowest(limit=25):
+            tree.insert("", "end", values=(name, stats["count"], stats["errors"], stats["avg_ms"],
+                                           stats["p95_ms"], stats["max_ms"], stats["total_ms"]))
+
+    def toggle():
+        if enabled_var.get():
+            instrumentation.enable()
+        else:
+            instrumentation.disable()
+
+    def reset():
+        instrumentation.reset()
+        refresh()
+
+    def save():
+        path = filedialog.asksaveasfilename(parent=window, defaultextension=".json",
+                                            filetypes=[("JSON", "*.json")], initialfile="performance.json")
+        if not path:
+            return
+        try:
+            instrumentation.dump_snapshot(path)
+            messagebox.showinfo("Saved", f"Snapshot written to {path}", parent=window)
+        except Exception as e:
+            logging.error(f"Failed to save performance snapshot: {e}", exc_info=True)
+            messagebox.showerror("Error", "Failed to save the snapshot", parent=window)
+
+    controls = ctk.CTkFrame(window)
+    controls.pack(pady=5, fill="x", padx=10)
+    ctk.CTkCheckBox(controls, text="Instrumentation enabled", variable=enabled_var, command=toggle).pack(side="left", padx=5)
+    for text, command in (("Refresh", refresh), ("Reset", reset), ("Save JSON", save)):
+        ctk.CTkButton(controls, text=text, width=90, command=command).pack(side="right", padx=5)
+
+    refresh()
 
 
 # back later to fix the error >>> password not updated in db,  1 hour work 
@@ -74,34 +184,22 @@ def create_password_change_frame(parent, is_admin=False):
             messagebox.showerror("Error", "New passwords don't match")
             return
             
-        try:
-            with get_connection() as conn:
-                cursor = conn.cursor()
-                # Get the stored hashed password for current user
-                cursor.execute("SELECT password FROM users WHERE username=?", (username,))
-                result = cursor.fetchone()
-                if not result:
-                    messagebox.showerror("Error", "User not found")
-                    return
-                    
-                stored_hash = result[0]
-                if not bcrypt.checkpw(current.encode('utf-8'), stored_hash.encode('utf-8')):
-                    messagebox.showerror("Error", "Incorrect current password")
-                    return
-                    
-                new_hash = hash_password(new)
-                cursor.execute("UPDATE users SET password=? WHERE username=?", (new_hash, username))
-                conn.commit()
-                messagebox.showinfo("Success", "Password updated successfully")
-                current_pass.delete(0, "end")
-                new_pass.delete(0, "end")
-                confirm_pass.delete(0, "end")
-                
-        except Exception as e:
-            logging.error(f"Password change failed: {e}", exc_info=True)
-            messagebox.showerror("Error", "Failed to update password")
+        def done(outcome):
+            success, message = outcome
+            submit_button.configure(state="normal", text="Submit")
+            if not success:
+                messagebox.showerror("Error", message)
+                return
+            messagebox.showinfo("Success", message)
+            current_pass.delete(0, "end")
+            new_pass.delete(0, "end")
+            confirm_pass.delete(0, "end")
+
+        submit_button.configure(state="disabled", text="Checking...")
+        run_in_background(frame, change_password, username, current, new, on_done=done,
+                          on_error=lambda e: done((False, f"Password change failed: {e}")))
 
-    ctk.CTkButton(frame, text="Submit", command=handle_password_change,
+    submit_button = ctk.CTkButton(frame, text="Submit", command=handle_password_change,
                   font=("Arial", 16),
                   fg_color="transparent",
                   hover_color="#212121",
@@ -109,7 +207,8 @@ def create_password_change_frame(parent, is_admin=False):
                   width=200,
                   height=40,
                   corner_radius=8
-                 ).pack(pady=10)
+                 )
+    submit_button.pack(pady=10)
     return frame
 
 def settings_screen(parent):
@@ -121,10 +220,7 @@ def settings_screen(parent):
     window.resizable(False, False)
 
     try:
-        bg_image = ctk.CTkImage(
-            dark_image=Image.open(bg_path).resize((600, 650)),
-            size=(600, 650)
-        )
+        bg_image = get_background(bg_path, (600, 650))
         bg_label = ctk.CTkLabel(master=window, image=bg_image, text="", fg_color="transparent")
         bg_label.place(x=0, y=0)
     except Exception as e:
@@ -181,35 +277,30 @@ def settings_screen(parent):
                 messagebox.showerror("Error", "All fields are required")
                 return
 
-            try:
-                with get_connection() as conn:
-                    cursor = conn.cursor()
-                    cursor.execute("SELECT username FROM users WHERE username=?", (username,))
-                    if cursor.fetchone():
-                        messagebox.showerror("Error", "Username already exists")
-                        return
-
-                    hashed_pw = hash_password(password)
-                    cursor.execute("INSERT INTO users (username, password, role) VALUES (?, ?, ?)",
-                                   (username, hashed_pw, user_role))
-                    conn.commit()
-                    refresh_user_list(tree)
-                    new_user_entry.delete(0, "end")
-                    new_pass_entry.delete(0, "end")
-                    messagebox.showinfo("Success", "User added successfully")
+            def done(outcome):
+                success, message = outcome
+                add_button.configure(state="normal")
+                if not success:
+                    messagebox.showerror("Error", message)
+                    return
+                refresh_user_list(tree)
+                new_user_entry.delete(0, "end")
+                new_pass_entry.delete(0, "end")
+                messagebox.showinfo("Success", message)
 
-            except Exception as e:
-                logging.error(f"Failed to add user: {e}", exc_info=True)
-                messagebox.showerror("Error", "Failed to add user")
+            add_button.configure(state="disabled")
+            run_in_background(add_frame, add_user_account, username, password, user_role, on_done=done,
+                              on_error=lambda e: done((False, f"Could not add the user: {e}")))
 
-        ctk.CTkButton(add_frame, text="Add User", font=("Arial", 16),
+        add_button = ctk.CTkButton(add_frame, text="Add User", font=("Arial", 16),
                       fg_color="transparent",
                       hover_color="#212121",
                       anchor="center",
                       width=80,
                       height=40,
                       corner_radius=8,
-                      command=add_user).pack(side="right", padx=5)
+                      command=add_user)
+        add_button.pack(side="right", padx=5)
 
         # Delete User Button
         def delete_user():
@@ -243,6 +334,15 @@ def settings_screen(parent):
                       corner_radius=8,
                       command=delete_user).pack(pady=5)
 
+        ctk.CTkButton(management_frame, text="Performance Stats", font=("Arial", 16),
+                      fg_color="transparent",
+                      hover_color="#212121",
+                      anchor="center",
+                      width=200,
+                      height=40,
+                      corner_radius=8,
+                      command=lambda: performance_window(window)).pack(pady=5)
+
         # Admin Password Change Section
         admin_pass_frame = create_password_change_frame(main_frame, is_admin=True)
         admin_pass_frame.pack(pady=10)
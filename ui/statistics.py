@@ -5,25 +5,44 @@
 
 
 import customtkinter as ctk
-from tkinter import messagebox, ttk
-from typing import Any, List, Tuple
+import tkinter
+from tkinter import messagebox, ttk, filedialog
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 
 # internal modules import in list order >>easy to read
 from core.statistics_handler import (
     get_sales_by_branch,
-    get_distribution_history,
-    get_branch_inventory
+    get_sales_trend,
+    get_sales_vs_distributions,
+    SALES_BY_BRANCH_TABLE,
+    DISTRIBUTION_HISTORY_TABLE,
+    BRANCH_INVENTORY_TABLE
 )
+from core.db_manager import get_data_version
+from core.export_handler import export_dataset
 from core.session import get_session
-from utils.chart_utils import (
-    plot_sales_bar_chart,
-    plot_sales_horizontal_chart,
-    plot_sales_pie_chart,
-    plot_sales_chart,
-    plot_stacked_bar_chart,
-    plot_line_chart
-)
+from ui.virtual_table import VirtualTable
+from utils.background import run_in_background
+
+CHARTS_TAB = "Charts"
+TREND_WEEKS = 12
+REFRESH_MS = 5000  # how often the open window checks whether anything was committed
+
+# tab >> (dataset of core/export_handler, what the file holds)
+TAB_EXPORTS = {
+    "Sales by Branch": ("sales_totals", "sales totals per branch and good"),
+    "Distribution History": ("distributions", "distribution history"),
+    "Branch Inventory": ("branch_inventories", "branch inventory"),
+}
+
+# tab >> (columns, column widths, paged source); sorting/filtering run in SQL
+TAB_TABLES = {
+    "Sales by Branch": (["Branch", "Good", "Total Sold"], [250, 250, 150], SALES_BY_BRANCH_TABLE),
+    "Distribution History": (["Good", "From", "To", "Quantity", "Date", "User"],
+                             [140, 110, 110, 80, 150, 90], DISTRIBUTION_HISTORY_TABLE),
+    "Branch Inventory": (["Branch", "Good", "Quantity"], [250, 250, 150], BRANCH_INVENTORY_TABLE),
+}
 
 
 class StatisticsScreen:
@@ -39,7 +58,19 @@ class StatisticsScreen:
         self.window.geometry("1000x600")
         self.window.resizable(False, False)
 
+        self.chart_panel = None
+        self.last_chart: Optional[Callable[[], None]] = None
+
+        # Shared get_sales_by_branch result (see load_sales)
+        self.sales_rows: Optional[List[Tuple]] = None
+        self.sales_dict: dict = {}
+        self.sales_waiters: List[Callable] = []
+        self.sales_generation = 0
+        self.sales_requested = -1
+        self.data_version = get_data_version()
+
         self.build_ui()
+        self.window.after(REFRESH_MS, self.watch_database)
 
     def build_ui(self) -> None:
         # Main wrapper frame
@@ -74,37 +105,36 @@ class StatisticsScreen:
             anchor="w"
         ).pack(pady=(20, 10), padx=20, fill="x")
 
-        # Prepare sales data for chart functions
-        sales_data = get_sales_by_branch()
-        self.sales_dict = {f"{row[0]} | {row[1]}": row[2] for row in sales_data}
+        # Sales charts share the sales tab's result (see load_sales); nothing is queried here
+        def show_sales_chart(kind: str) -> None:
+            self.load_sales(lambda rows: self.show_chart(kind, self.sales_dict))
 
-        # Sample functions for stacked and line charts
+        # Stacked and line charts aggregate the columnar snapshot with NumPy on a worker thread
+        # (numpy itself is only imported there, on first use)
         def show_stacked_chart() -> None:
-            sample_data = {
-                "Branch 1": {"Sales": 10, "Distributions": 20},
-                "Branch 2": {"Sales": 8, "Distributions": 16}
-            }
-            plot_stacked_bar_chart(sample_data, "Sales vs Distributions")
+            run_in_background(self.window, get_sales_vs_distributions,
+                              on_done=lambda data: self.show_chart("stacked_bar", data, title="Sales vs Distributions"))
 
         def show_line_chart() -> None:
-            trends = {
-                "Sales": [5, 10, 15, 8],
-                "Distributions": [10, 12, 18, 14]
-            }
-            time_labels = ["Week 1", "Week 2", "Week 3", "Week 4"]
-            plot_line_chart(trends, time_labels, "Weekly Trend", "Total")
+            run_in_background(self.window, get_sales_trend, "weekly", by="branch", last=TREND_WEEKS,
+                              on_done=lambda result: self.show_chart("line", result[0], x_labels=result[1],
+                                                                     title="Weekly Sales (top branches)",
+                                                                     ylabel="Units Sold"))
 
         # Define chart buttons with corresponding actions , also copy the image logo and see it it works wit ctk 
-        nav_buttons: List[Tuple[str, Any]] = [
-            ("📈 Sales Chart (Vertical)", lambda: plot_sales_chart(self.sales_dict)),
-            ("📊 Bar Chart", lambda: plot_sales_bar_chart(self.sales_dict)),
-            ("📉 Horizontal Bar", lambda: plot_sales_horizontal_chart(self.sales_dict)),
-            ("🧁 Pie Chart", lambda: plot_sales_pie_chart(self.sales_dict)),
-            ("📊 Stacked Bar (Sample)", show_stacked_chart),
-            ("📉 Line Chart (Sample)", show_line_chart)
+        chart_buttons: List[Tuple[str, Any]] = [
+            ("📈 Sales Chart (Vertical)", lambda: show_sales_chart("sales_vertical")),
+            ("📊 Bar Chart", lambda: show_sales_chart("sales_bar")),
+            ("📉 Horizontal Bar", lambda: show_sales_chart("sales_horizontal")),
+            ("🧁 Pie Chart", lambda: show_sales_chart("sales_pie")),
+            ("📊 Sales vs Distributions", show_stacked_chart),
+            ("📉 Weekly Sales Trend", show_line_chart)
         ]
+        nav_buttons = [(text, lambda command=command: self.run_chart(command)) for text, command in chart_buttons]
+        nav_buttons.append(("🔄 Refresh", self.refresh_tables))
+        nav_buttons.append(("💾 Export Tab Data", self.export_current_tab))
         for text, command in nav_buttons:
-            ctk.CTkButton(
+            button = ctk.CTkButton(
                 master=self.sidebar,
                 text=text,
                 font=("Century Gothic", 16),
@@ -112,26 +142,93 @@ class StatisticsScreen:
                 hover_color="#212121",
                 anchor="w",
                 command=command
-            ).pack(pady=10, padx=10, fill="x")
+            )
+            button.pack(pady=10, padx=10, fill="x")
+        self.export_button = button  # the last one: Export Tab Data (shows the progress of an export)
+        self.export_label = button.cget("text")
 
     def build_tabview(self) -> None:
         self.content_frame = ctk.CTkFrame(master=self.main_frame, fg_color="#1a1a1a", corner_radius=10)
         self.content_frame.pack(side="left", fill="both", expand=True, pady=10, padx=(0, 10))
 
-        self.tabview = ctk.CTkTabview(self.content_frame, width=720, height=440, corner_radius=10, fg_color="#2a2d2e")
+        self.tabview = ctk.CTkTabview(self.content_frame, width=720, height=440, corner_radius=10, fg_color="#2a2d2e",
+                                      command=self.on_tab_selected)
         self.tabview.pack(pady=20, padx=20, fill="both", expand=True)
 
         self.sales_tab = self.tabview.add("Sales by Branch")
         self.dist_tab = self.tabview.add("Distribution History")
         self.inventory_tab = self.tabview.add("Branch Inventory")
-
-        # Build tables for each tab
-        self.build_table(self.sales_tab, ["Branch", "Good", "Total Sold"], get_sales_by_branch())
-        self.build_table(self.dist_tab, ["Good", "From", "To", "Quantity", "Date", "User"], get_distribution_history())
-        self.build_table(self.inventory_tab, ["Branch", "Good", "Quantity"], get_branch_inventory())
-
-    def build_table(self, container: ctk.CTkFrame, columns: List[str], data: List[Tuple]) -> None:
-        """Builds a Treeview table in the given container."""
+        self.charts_tab = self.tabview.add(CHARTS_TAB)
+        self.chart_hint = ctk.CTkLabel(self.charts_tab, text="Pick a chart on the left.", font=("Century Gothic", 16))
+        self.chart_hint.pack(expand=True)
+
+        # Tables are built when their tab is first shown; only the visible one loads now
+        self.loaded_tabs = set()
+        self.tables: Dict[str, VirtualTable] = {}
+        self.on_tab_selected()
+
+    def on_tab_selected(self) -> None:
+        name = self.tabview.get()
+        if name in TAB_TABLES and name not in self.loaded_tabs:
+            self.load_tab(name)
+
+    def run_chart(self, command: Callable[[], None]) -> None:
+        # remembered, so refresh_tables can redraw the chart on screen with fresh data
+        self.last_chart = command
+        command()
+
+    def show_chart(self, kind: str, data: dict, **options: Any) -> None:
+        """
+        Shows a chart (utils.chart_utils.CHARTS) in the Charts tab.
+        >> The panel (and matplotlib) is created by the first chart; later charts reuse its
+           figure, and the same chart with new numbers is updated in place.
+        """
+        if self.chart_panel is None:
+            from ui.chart_panel import ChartPanel
+            self.chart_hint.destroy()
+            self.chart_panel = ChartPanel(self.charts_tab)
+            self.chart_panel.pack(fill="both", expand=True, padx=10, pady=10)
+        self.tabview.set(CHARTS_TAB)
+        self.chart_panel.show(kind, data, **options)
+
+    def load_tab(self, name: str) -> None:
+        """Builds one tab's virtualized table, or re-fetches it if it already exists."""
+        self.loaded_tabs.add(name)
+        if name in self.tables:
+            self.tables[name].refresh()
+            return
+        columns, widths, source = TAB_TABLES[name]
+        self.style_tables()
+        table = VirtualTable(self.tabview.tab(name), source, columns, widths=widths, height=12)
+        table.pack(fill="both", expand=True, padx=10, pady=10)
+        self.tables[name] = table
+
+    def load_sales(self, callback: Callable[[List[Tuple]], None]) -> None:
+        """
+        get_sales_by_branch runs once per window (or per refresh_tables), only when a sales chart
+        is requested; the sidebar charts share the result. callback(rows) runs on the Tk thread.
+        """
+        if self.sales_rows is not None:
+            callback(self.sales_rows)
+            return
+        self.sales_waiters.append(callback)
+        if self.sales_requested == self.sales_generation:
+            return  # already on its way
+        generation = self.sales_requested = self.sales_generation
+
+        def done(rows: List[Tuple]) -> None:
+            if generation != self.sales_generation:
+                return  # a newer request will answer the waiters
+            self.sales_rows = rows
+            self.sales_dict = {f"{row[0]} | {row[1]}": row[2] for row in rows}
+            waiters, self.sales_waiters = self.sales_waiters, []
+            for waiter in waiters:
+                waiter(rows)
+
+        run_in_background(self.window, get_sales_by_branch, on_done=done)
+
+    def style_tables(self) -> None:
+        """Dark style shared by the statistics tables."""
         style = ttk.Style()
         style.theme_use("default")
         style.configure("Treeview",
@@ -145,41 +242,95 @@ class StatisticsScreen:
         style.configure("Treeview.Heading", background="#444", foreground="white", relief="flat")
         style.map("Treeview.Heading", background=[('active', '#555')])
 
-        outer_frame = ctk.CTkFrame(container, fg_color="transparent")
-        outer_frame.pack(fill="both", expand=True, padx=10, pady=10)
-        outer_frame.pack_propagate(False)
-
-        vsb = ttk.Scrollbar(outer_frame, orient="vertical")
-        hsb = ttk.Scrollbar(outer_frame, orient="horizontal")
-        vsb.pack(side="right", fill="y")
-        hsb.pack(side="bottom", fill="x")
-
-        tree = ttk.Treeview(outer_frame, columns=columns, show='headings',
-                            yscrollcommand=vsb.set, xscrollcommand=hsb.set)
-        vsb.config(command=tree.yview)
-        hsb.config(command=tree.xview)
-
-        for col in columns:
-            tree.heading(col, text=col)
-            tree.column(col, anchor="center", width=150)
-
-        for row in data:
-            tree.insert("", "end", values=row)
-
-        tree.pack(fill="both", expand=True)
+    def watch_database(self) -> None:
+        """Refreshes when something was committed (sales / distributions from other screens); one PRAGMA otherwise."""
+        try:
+            if not self.window.winfo_exists():
+                return
+        except tkinter.TclError:
+            return
+        if get_data_version() != self.data_version:
+            self.refresh_tables()
+        self.window.after(REFRESH_MS, self.watch_database)
 
     def refresh_tables(self) -> None:
-        """Refreshes all table data by re-fetching from the database."""
-        # clear and rebuild each table;  enhance this method to update existing tables instead or use a refresh button !!
-        for tab, columns, data_func in [
-            (self.sales_tab, ["Branch", "Good", "Total Sold"], get_sales_by_branch),
-            (self.dist_tab, ["Good", "From", "To", "Quantity", "Date", "User"], get_distribution_history),
-            (self.inventory_tab, ["Branch", "Good", "Quantity"], get_branch_inventory)
-        ]:
-            # Clear the container and rebuild table
-            for widget in tab.winfo_children():
-                widget.destroy()
-            self.build_table(tab, columns, data_func())
+        """
+        Updates the visible tab in place (only rows that changed, and only if the database
+        changed at all); the other tabs catch up when they are selected next.
+        Called by the Refresh button and by watch_database.
+        """
+        self.data_version = get_data_version()
+        self.sales_rows = None
+        self.sales_generation += 1  # answers of older sales requests are dropped
+        self.loaded_tabs.clear()
+        name = self.tabview.get()
+        if name in TAB_TABLES:
+            self.load_tab(name)
+        elif self.last_chart is not None:
+            self.last_chart()  # same chart, new numbers >> updated in place
+
+    def export_current_tab(self) -> None:
+        """
+        Streams the rows behind the selected tab to a CSV / JSON Lines file (gzip for .gz).
+        >> runs on a worker thread; the button shows the running row count meanwhile
+        """
+        if self.tabview.get() == CHARTS_TAB:
+            self.export_chart()
+            return
+        dataset, description = TAB_EXPORTS[self.tabview.get()]
+        path = filedialog.asksaveasfilename(
+            parent=self.window,
+            title=f"Export {description}",
+            initialfile=f"{dataset}.csv",
+            filetypes=[("CSV", "*.csv"), ("CSV (gzip)", "*.csv.gz"), ("JSON Lines", "*.jsonl"), ("JSON Lines (gzip)", "*.jsonl.gz")]
+        )
+        if not path:
+            return
+        fmt = "jsonl" if ".jsonl" in path else "csv"
+        # the worker only stores the count; the Tk thread picks it up (Tk is not thread-safe)
+        progress = {"rows": 0}
+
+        def show_progress() -> None:
+            if progress is not None and self.export_button.winfo_exists():
+                self.export_button.configure(text=f"💾 Exporting... {progress['rows']:,} rows")
+                self.window.after(200, show_progress)
+
+        def finish(result: Optional[dict], error: Optional[BaseException] = None) -> None:
+            nonlocal progress
+            progress = None
+            self.export_button.configure(state="normal", text=self.export_label)
+            if error is not None:
+                messagebox.showerror("Export", f"Export failed: {error}")
+            elif result["success"]:
+                messagebox.showinfo("Export", f"{result['rows']:,} row(s) of {description} exported to:\n{path}")
+            else:
+                messagebox.showerror("Export", f"Export failed: {result['reason']}")
+
+        self.export_button.configure(state="disabled")
+        show_progress()
+        run_in_background(self.window, export_dataset, dataset, path, fmt,
+                          progress=lambda rows: progress.update(rows=rows) if progress else None,
+                          on_done=finish, on_error=lambda e: finish(None, e))
+
+    def export_chart(self) -> None:
+        """Saves the chart on screen as an image."""
+        if self.chart_panel is None or self.chart_panel.kind is None:
+            messagebox.showinfo("Export", "Show a chart first.")
+            return
+        path = filedialog.asksaveasfilename(
+            parent=self.window,
+            title="Export chart",
+            initialfile=f"{self.chart_panel.kind}.png",
+            defaultextension=".png",
+            filetypes=[("PNG", "*.png"), ("SVG", "*.svg"), ("PDF", "*.pdf")]
+        )
+        if not path:
+            return
+        try:
+            self.chart_panel.save(path)
+            messagebox.showinfo("Export", f"Chart saved to:\n{path}")
+        except Exception as e:
+            messagebox.showerror("Export", f"Could not save the chart: {e}")
 
     def go_back(self) -> None:
         self.window.destroy()
@@ -15,12 +15,13 @@ Done!!
 import logging
 import tkinter
 import customtkinter as ctk
-from PIL import Image
-from tkinter import ttk, messagebox
+from tkinter import ttk
 
-from core.db_manager import get_connection
 from core.session import get_session
+from core.statistics_handler import BRANCH_INVENTORY_IDS_TABLE
+from ui.virtual_table import VirtualTable
 from utils.constants import BG_DEFAULT
+from utils.image_cache import get_background
 
 BG_PATH = BG_DEFAULT
 
@@ -44,10 +45,7 @@ def view_branch_inventory_screen(parent):
 
     # Background
     try:
-        bg_image = ctk.CTkImage(
-            dark_image=Image.open(BG_PATH).resize((700, 600)),
-            size=(700, 600)
-        )
+        bg_image = get_background(BG_PATH, (700, 600))
         bg_label = ctk.CTkLabel(master=window, image=bg_image, text="", fg_color="transparent")
         bg_label.place(x=0, y=0)
     except Exception as e:
@@ -67,37 +65,11 @@ def view_branch_inventory_screen(parent):
     style.configure("Inventory.Treeview", font=("Century Gothic", 10), rowheight=25)
     style.configure("Inventory.Treeview.Heading", font=("Century Gothic", 11, "bold"))
 
-    columns = ("branch_id", "good_id", "quantity")
-    tree = ttk.Treeview(table_frame, columns=columns, show='headings', style="Inventory.Treeview")
-    for col in columns:
-        tree.heading(col, text=col.capitalize())
-        tree.column(col, width=150, anchor=tkinter.CENTER)
-    tree.pack(fill=tkinter.BOTH, expand=True)
-
-    # Fetch data
-    try:
-        with get_connection() as conn:
-            cursor = conn.cursor()
-            query = """
-                SELECT bi.branch_id, b.name AS branch_name, bi.good_id, g.name AS good_name, bi.quantity
-                FROM branch_inventories bi
-                JOIN branches b ON bi.branch_id = b.id
-                JOIN goods g ON bi.good_id = g.id
-            """
-            cursor.execute(query)
-            rows = cursor.fetchall()  # (branch_id, branch_name, good_id, good_name, quantity)
-
-        # Insert into table
-        for row in rows:
-            # Display format: branch_id => branch_name, good_id => good_name
-            display_branch = f"{row[0]} - {row[1]}"
-            display_good = f"{row[2]} - {row[3]}"
-            quantity = row[4]
-            tree.insert("", tkinter.END, values=(display_branch, display_good, quantity))
-
-    except Exception as e:
-        logging.error(f"Error fetching branch inventory: {e}")
-        messagebox.showerror("Error", "Could not fetch branch inventory data.")
+    # Virtualized table: rows are fetched page by page in the background, sort/filter run in SQL
+    # Display format: branch_id => branch_name, good_id => good_name
+    table = VirtualTable(table_frame, BRANCH_INVENTORY_IDS_TABLE, ["Branch", "Good", "Quantity"],
+                         widths=[200, 250, 150], height=10, style="Inventory.Treeview")
+    table.pack(fill=tkinter.BOTH, expand=True)
 
     def go_back():
         window.destroy()
@@ -10,14 +10,15 @@
 import logging
 import tkinter
 import customtkinter as ctk
-from tkinter import messagebox, ttk, simpledialog
-from PIL import Image
+from tkinter import messagebox, simpledialog
 
 #internal modules
-from core.goods_handler import add_good, get_all_goods
+from core.goods_handler import add_good, GOODS_TABLE
 from core.db_manager import update_good, delete_good
 from core.session import get_session
+from ui.virtual_table import VirtualTable
 from utils.constants import BG_WAREHOUSE
+from utils.image_cache import get_background
 
 BG_PATH = BG_WAREHOUSE
 
@@ -30,7 +31,6 @@ class ViewGoodsScreen:
         self.window.geometry("800x740")
         self.window.resizable(False, False)
         self.build_ui()
-        self.refresh_goods()
     
     def build_ui(self):
         # Main container frame
@@ -39,10 +39,7 @@ class ViewGoodsScreen:
         
         # adding a Warehouse Logo at the top , Bepragrammer.org 
         try:
-            warehouse_logo = ctk.CTkImage(
-                dark_image=Image.open(BG_PATH).resize((600, 220)),
-                size=(600, 220)
-            )
+            warehouse_logo = get_background(BG_PATH, (600, 220))
             self.logo_label = ctk.CTkLabel(self.frame, image=warehouse_logo, text="")
             self.logo_label.image = warehouse_logo  # keep a reference
             self.logo_label.pack(pady=(10, 0))
@@ -57,18 +54,13 @@ class ViewGoodsScreen:
         self.tree_frame = ctk.CTkFrame(self.frame, width=760, height=400)
         self.tree_frame.pack(pady=10)
         
-        self.goods_tree = ttk.Treeview(self.tree_frame, columns=("ID", "Name", "Quantity", "Price"), show='headings', height=15)
-        self.goods_tree.heading("ID", text="ID")
-        self.goods_tree.heading("Name", text="Name")
-        self.goods_tree.heading("Quantity", text="Quantity")
-        self.goods_tree.heading("Price", text="Price")
-        
-        self.goods_tree.column("ID", width=50, anchor=tkinter.CENTER)
-        self.goods_tree.column("Name", width=300, anchor=tkinter.W)
-        self.goods_tree.column("Quantity", width=150, anchor=tkinter.CENTER)
-        self.goods_tree.column("Price", width=150, anchor=tkinter.CENTER)
-        
-        self.goods_tree.pack(fill=tkinter.BOTH, expand=True)
+        # Virtualized: only the visible rows are Treeview items; sort/filter run in SQL.
+        # Picks up changes from other screens/processes by itself (data_version poll).
+        self.goods_table = VirtualTable(self.tree_frame, GOODS_TABLE, ["ID", "Name", "Quantity", "Price"],
+                                        widths=[50, 300, 150, 150], height=15, watch_ms=2000)
+        self.goods_table.tree.column("Name", anchor=tkinter.W)
+        self.goods_table.pack(fill=tkinter.BOTH, expand=True)
+        self.goods_tree = self.goods_table.tree
         
         # Buttons for Add, Edit, Delete, Refresh, and Back
         button_frame = ctk.CTkFrame(self.frame, width=760, height=50)
@@ -90,13 +82,8 @@ class ViewGoodsScreen:
         self.back_button.grid(row=0, column=4, padx=5, pady=5)
     
     def refresh_goods(self):
-        # Clear existing entries in tree
-        for item in self.goods_tree.get_children():
-            self.goods_tree.delete(item)
-        # Get goods from the database (warehouse goods)
-        goods = get_all_goods()
-        for good in goods:
-            self.goods_tree.insert("", "end", values=good)
+        # Re-fetch the visible rows if the database changed; only changed items are updated
+        self.goods_table.refresh()
     
     def add_good(self):
         name = simpledialog.askstring("Add Good", "Enter product name:")
@@ -118,11 +105,10 @@ class ViewGoodsScreen:
         self.refresh_goods()
     
     def edit_good(self):
-        selected = self.goods_tree.focus()
-        if not selected:
+        values = self.goods_table.selected_row()
+        if not values:
             messagebox.showwarning("Warning", "Select a good to edit.")
             return
-        values = self.goods_tree.item(selected, "values")
         good_id = int(values[0])
         current_name = values[1]
         current_price = values[3]
@@ -144,11 +130,10 @@ class ViewGoodsScreen:
         self.refresh_goods()
     
     def delete_good(self):
-        selected = self.goods_tree.focus()
-        if not selected:
+        values = self.goods_table.selected_row()
+        if not values:
             messagebox.showwarning("Warning", "Select a good to delete.")
             return
-        values = self.goods_tree.item(selected, "values")
         good_id = int(values[0])
         confirm = messagebox.askyesno("Confirm", "Are you sure you want to delete this good?")
         if confirm:
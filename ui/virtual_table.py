@@ -0,0 +1,298 @@
+# ui/virtual_table.py
+
+"""
+Virtualized table for very large result sets.
+
+>> Only the rows that fit on screen exist as Treeview items; scrolling re-fills them from
+   a cache of pages fetched (in the background) from a core.paged_query.PagedQuery
+   (pages in scrolling order seek from the previous one; jumps use OFFSET).
+>> Clicking a column heading sorts in SQL (click again = descending); the filter box
+   runs a SQL LIKE over the source's filter columns.
+>> Item ids are the absolute row numbers, so tree.focus() / tree.item(iid, "values") work
+   as on a normal Treeview for the visible rows.
+>> refresh() does nothing unless the database changed (PRAGMA data_version); when it did, the
+   old rows stay on screen until the new pages arrive and only changed items are touched.
+   watch_ms > 0 polls for changes by itself.
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence
+
+import customtkinter as ctk
+from tkinter import ttk
+
+from core.db_manager import get_data_version
+from core.paged_query import PagedQuery
+from utils.background import run_in_background
+from utils.row_diff import diff_rows
+
+PAGE_SIZE = 200
+MAX_CACHED_PAGES = 50
+FILTER_DELAY_MS = 300
+WHEEL_ROWS = 3
+
+
+class VirtualTable:
+    def __init__(self, master: Any, source: PagedQuery, columns: Sequence[str],
+                 widths: Optional[Sequence[int]] = None, height: int = 15, anchor: str = "center",
+                 style: str = "Treeview", filterable: bool = True, page_size: int = PAGE_SIZE,
+                 watch_ms: int = 0) -> None:
+        self.source = source
+        self.columns = list(columns)
+        self.page_size = page_size
+
+        self.total: Optional[int] = None       # row count for the current filter (None = counting)
+        self.offset = 0                        # absolute index of the first visible row
+        self.visible = height                  # rows that fit on screen
+        self.sort: Optional[int] = None
+        self.descending = False
+        self.filter_text = ""
+        self.selected_index: Optional[int] = None
+        self.pages: "OrderedDict[int, List[tuple]]" = OrderedDict()
+        self.stale_pages: Dict[int, List[tuple]] = {}  # shown until their fresh copy arrives
+        self.pending = set()
+        self.generation = 0                    # bumped on sort/filter/refresh: older answers are dropped
+        self.counted_generation = -1           # generation self.total was counted for
+        self.data_version = None               # database state the cached pages belong to
+        self.shown: Dict[str, tuple] = {}      # iid >> (iid, values) currently in the Treeview
+        self.filter_job = None
+        self.watch_ms = watch_ms
+
+        self.frame = ctk.CTkFrame(master, fg_color="transparent")
+        if filterable:
+            self.filter_entry = ctk.CTkEntry(self.frame, placeholder_text="Filter...")
+            self.filter_entry.pack(fill="x", pady=(0, 5))
+            self.filter_entry.bind("<KeyRelease>", self.on_filter_typed)
+
+        body = ttk.Frame(self.frame)
+        body.pack(fill="both", expand=True)
+        self.vsb = ttk.Scrollbar(body, orient="vertical", command=self.on_scrollbar)
+        self.vsb.pack(side="right", fill="y")
+        self.tree = ttk.Treeview(body, columns=self.columns, show="headings", height=height,
+                                 selectmode="browse", style=style)
+        for i, col in enumerate(self.columns):
+            self.tree.heading(col, text=col, command=lambda i=i: self.sort_by(i))
+            self.tree.column(col, anchor=anchor, width=widths[i] if widths else 150)
+        self.tree.pack(side="left", fill="both", expand=True)
+
+        self.tree.bind("<Configure>", self.on_resize)
+        self.tree.bind("<<TreeviewSelect>>", self.on_select)
+        self.tree.bind("<MouseWheel>", lambda e: self.scroll_rows(-WHEEL_ROWS if e.delta > 0 else WHEEL_ROWS))
+        self.tree.bind("<Button-4>", lambda e: self.scroll_rows(-WHEEL_ROWS))
+        self.tree.bind("<Button-5>", lambda e: self.scroll_rows(WHEEL_ROWS))
+        for key, step in (("<Up>", -1), ("<Down>", 1), ("<Prior>", "-page"), ("<Next>", "page"),
+                          ("<Home>", "home"), ("<End>", "end")):
+            self.tree.bind(key, lambda e, step=step: self.move_selection(step))
+
+        self.reload()
+        if watch_ms:
+            self.tree.after(watch_ms, self.watch)
+
+    # Layout helpers, so the table can be placed like a widget
+    def pack(self, **kwargs: Any) -> None:
+        self.frame.pack(**kwargs)
+
+    def grid(self, **kwargs: Any) -> None:
+        self.frame.grid(**kwargs)
+
+    # Data
+    def refresh(self) -> None:
+        """Re-fetches the visible rows if anything was committed since they were loaded."""
+        if get_data_version() == self.data_version:
+            return
+        self.stale_pages = dict(self.pages)
+        self.reload(keep_total=True)
+
+    def reload(self, keep_total: bool = False) -> None:
+        """Drops the cached pages and re-counts; keeps the scroll position when possible."""
+        self.generation += 1
+        self.data_version = get_data_version()
+        self.pages.clear()
+        self.pending.clear()
+        if not keep_total:
+            self.stale_pages = {}
+            self.total = None
+        generation = self.generation
+        run_in_background(self.tree, self.source.count, self.filter_text,
+                          on_done=lambda total: self._counted(generation, total))
+        self._request_page(self.offset // self.page_size)
+        self.render()
+
+    def watch(self) -> None:
+        """Polls for database changes every watch_ms (cheap: one PRAGMA when nothing changed)."""
+        try:
+            if not self.tree.winfo_exists():
+                return
+        except Exception:
+            return
+        self.refresh()
+        self.tree.after(self.watch_ms, self.watch)
+
+    def _counted(self, generation: int, total: int) -> None:
+        if generation != self.generation:
+            return
+        self.total = total
+        self.counted_generation = generation
+        self.offset = max(0, min(self.offset, total - self.visible))
+        self.render()
+
+    def _request_page(self, page: int) -> None:
+        if page in self.pages or page in self.pending or page < 0:
+            return
+        if self.total is not None and page * self.page_size >= self.total:
+            return
+        self.pending.add(page)
+        generation = self.generation
+        # a total from before a refresh may be off: read forwards until it is re-counted
+        total = self.total if self.counted_generation == generation else None
+        run_in_background(self.tree, self.source.fetch, page * self.page_size, self.page_size,
+                          self.sort, self.descending if self.sort is not None else None,
+                          self.filter_text, total,
+                          on_done=lambda rows: self._page_loaded(generation, page, rows))
+
+    def _page_loaded(self, generation: int, page: int, rows: List[tuple]) -> None:
+        if generation != self.generation:
+            return
+        self.pending.discard(page)
+        self.stale_pages.pop(page, None)
+        self.pages[page] = rows
+        while len(self.pages) > MAX_CACHED_PAGES:
+            self.pages.popitem(last=False)
+        self.render()
+
+    def _row(self, index: int) -> Optional[tuple]:
+        page, position = divmod(index, self.page_size)
+        rows = self.pages.get(page)
+        if rows is None:
+            self._request_page(page)
+            rows = self.stale_pages.get(page, ())
+        else:
+            self.pages.move_to_end(page)
+        return rows[position] if position < len(rows) else None
+
+    def _known_total(self) -> int:
+        if self.total is not None:
+            return self.total
+        # still counting: what the first page showed is all we know
+        first = self.pages.get(0)
+        return len(first) if first is not None else 0
+
+    # Rendering
+    def render(self) -> None:
+        """Brings the Treeview items in line with the visible window, touching only what changed."""
+        total = self._known_total()
+        blank = ("",) * (len(self.columns) - 1)
+        wanted = []
+        if self.total is None and not total:
+            wanted.append(("loading", ("Loading...",) + blank))
+        end = min(total, self.offset + self.visible)
+        for index in range(self.offset, end):
+            row = self._row(index)
+            wanted.append((str(index), tuple(row) if row is not None else ("...",) + blank))
+
+        added, changed, removed = diff_rows(self.shown, wanted)
+        if removed:
+            self.tree.delete(*removed)
+        for iid, values in changed:
+            self.tree.item(iid, values=values)
+        new_iids = {iid for iid, _ in added}
+        for position, (iid, values) in enumerate(wanted):
+            if iid in new_iids:
+                self.tree.insert("", position, iid=iid, values=values)
+        self.shown = {iid: (iid, values) for iid, values in wanted}
+
+        if self.selected_index is not None and self.offset <= self.selected_index < end:
+            iid = str(self.selected_index)
+            self.tree.selection_set(iid)
+            self.tree.focus(iid)
+        # Prefetch the page after the visible window
+        if end < total:
+            self._request_page(end // self.page_size)
+        if total:
+            self.vsb.set(self.offset / total, end / total)
+        else:
+            self.vsb.set(0, 1)
+
+    def scroll_to(self, offset: int) -> None:
+        offset = max(0, min(int(offset), self._known_total() - self.visible))
+        if offset != self.offset:
+            self.offset = offset
+            self.render()
+
+    def scroll_rows(self, rows: int) -> str:
+        self.scroll_to(self.offset + rows)
+        return "break"  # the Treeview must not scroll its own few items
+
+    # Events
+    def on_scrollbar(self, action: str, amount: str, unit: Optional[str] = None) -> None:
+        if action == "moveto":
+            self.scroll_to(float(amount) * self._known_total())
+        elif action == "scroll":
+            step = self.visible if unit == "pages" else 1
+            self.scroll_to(self.offset + int(amount) * step)
+
+    def on_resize(self, event: Any) -> None:
+        children = self.tree.get_children()
+        bbox = self.tree.bbox(children[0]) if children else None
+        if bbox:
+            header, row_height = bbox[1], bbox[3]
+        else:
+            row_height = int(ttk.Style().lookup(self.tree.cget("style") or "Treeview", "rowheight") or 20)
+            header = row_height
+        visible = max(1, (event.height - header) // row_height)
+        if visible != self.visible:
+            self.visible = visible
+            self.render()
+
+    def on_select(self, event: Any) -> None:
+        selection = self.tree.selection()
+        if selection and selection[0].isdigit():
+            self.selected_index = int(selection[0])
+
+    def move_selection(self, step: Any) -> str:
+        total = self._known_total()
+        if not total:
+            return "break"
+        current = self.selected_index if self.selected_index is not None else self.offset
+        target = {"home": 0, "end": total - 1, "page": current + self.visible,
+                  "-page": current - self.visible}.get(step, current + step if isinstance(step, int) else current)
+        self.selected_index = max(0, min(total - 1, target))
+        if self.selected_index < self.offset:
+            self.offset = self.selected_index
+        elif self.selected_index >= self.offset + self.visible:
+            self.offset = self.selected_index - self.visible + 1
+        self.render()
+        return "break"
+
+    def sort_by(self, column: int) -> None:
+        """Sorts in SQL by the clicked column; a second click on the same column reverses it."""
+        self.descending = not self.descending if self.sort == column else False
+        self.sort = column
+        for i, col in enumerate(self.columns):
+            arrow = (" ▼" if self.descending else " ▲") if i == column else ""
+            self.tree.heading(col, text=col + arrow)
+        self.offset = 0
+        self.selected_index = None
+        self.reload()
+
+    def on_filter_typed(self, event: Any = None) -> None:
+        # Debounced: the query runs once the user stops typing
+        if self.filter_job is not None:
+            self.tree.after_cancel(self.filter_job)
+        self.filter_job = self.tree.after(FILTER_DELAY_MS, self.apply_filter)
+
+    def apply_filter(self) -> None:
+        self.filter_job = None
+        text = self.filter_entry.get().strip()
+        if text == self.filter_text:
+            return
+        self.filter_text = text
+        self.offset = 0
+        self.selected_index = None
+        self.reload()
+
+    def selected_row(self) -> Optional[tuple]:
+        """Values of the selected row (None if nothing is selected or it is still loading)."""
+        if self.selected_index is None:
+            return None
+        return self._row(self.selected_index)
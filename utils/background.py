@@ -0,0 +1,68 @@
+# utils/background.py
+
+"""
+Runs blocking work (SQLite queries, bcrypt) on worker threads so the Tk window stays responsive.
+
+>> run_in_background(widget, func, *args, on_done=..., on_error=...) submits func to a small
+   thread pool; the result is handed back on the Tk thread through widget.after() polling
+   (Tk must never be touched from a worker thread).
+>> Every worker thread gets its own pooled SQLite connection from core.db_manager.
+>> show_loading(tree) / clear_loading(tree) put a "Loading..." row into a Treeview.
+"""
+
+import logging
+import tkinter
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+MAX_WORKERS = 4
+POLL_MS = 30
+LOADING_IID = "__loading__"
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="gds-worker")
+
+
+def run_in_background(widget: Any, func: Callable, *args: Any,
+                      on_done: Optional[Callable[[Any], None]] = None,
+                      on_error: Optional[Callable[[BaseException], None]] = None,
+                      **kwargs: Any) -> Future:
+    """
+    Runs func(*args, **kwargs) on a worker thread.
+    >> on_done(result) / on_error(exception) are called on the Tk thread;
+       without on_error the exception is only logged.
+    >> Nothing is called if the widget has been destroyed in the meantime.
+    """
+    future = _executor.submit(func, *args, **kwargs)
+
+    def poll() -> None:
+        try:
+            if not widget.winfo_exists():
+                return
+        except tkinter.TclError:
+            return  # the application is gone
+        if not future.done():
+            widget.after(POLL_MS, poll)
+            return
+        error = future.exception()
+        if error is not None:
+            if on_error:
+                on_error(error)
+            else:
+                logging.error(f"Background task {getattr(func, '__name__', func)} failed: {error}", exc_info=error)
+        elif on_done:
+            on_done(future.result())
+
+    widget.after(POLL_MS, poll)
+    return future
+
+
+def show_loading(tree: Any, text: str = "Loading...") -> None:
+    """Clears the Treeview and shows a single placeholder row."""
+    tree.delete(*tree.get_children())
+    columns = tree["columns"]
+    tree.insert("", "end", iid=LOADING_IID, values=(text,) + ("",) * (len(columns) - 1))
+
+
+def clear_loading(tree: Any) -> None:
+    if tree.exists(LOADING_IID):
+        tree.delete(LOADING_IID)
@@ -0,0 +1,108 @@
+# utils/chart_cache.py
+
+"""
+Rendered charts (PNG bytes), addressed by what they show.
+
+>> chart_key(kind, data, size, **options) hashes the chart kind, the data (in order), the options,
+   the pixel size and the UI theme >> the same key always means the same picture.
+>> The last MAX_CACHED_CHARTS PNGs stay in memory (least recently used is dropped first).
+>> With GDS_CHART_CACHE_DIR set, PNGs are also kept on disk (the newest MAX_DISK_CHARTS files),
+   so they survive a restart. Off by default.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+MAX_CACHED_CHARTS = 32
+MAX_DISK_CHARTS = 500
+CHART_CACHE_DIR = os.environ.get("GDS_CHART_CACHE_DIR", "")
+
+_charts: "OrderedDict[str, bytes]" = OrderedDict()
+
+
+def _plain(value: Any) -> Any:
+    # numpy arrays / scalars >> lists / numbers; anything else by its text
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    return str(value)
+
+
+def chart_key(kind: str, data: Any, size: Tuple[int, int], theme: Optional[str] = None, **options: Any) -> str:
+    """
+    >> data: the chart data; dict order counts (it is the order of the bars / lines)
+    >> size: (width, height) in pixels
+    >> theme: defaults to the current utils.style_utils theme
+    """
+    if theme is None:
+        from utils import style_utils
+        theme = style_utils.APP_THEME
+    text = json.dumps([kind, data, sorted(options.items()), list(size), theme], default=_plain)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def get_png(key: str) -> Optional[bytes]:
+    png = _charts.get(key)
+    if png is not None:
+        _charts.move_to_end(key)
+        return png
+    if CHART_CACHE_DIR:
+        path = os.path.join(CHART_CACHE_DIR, f"{key}.png")
+        try:
+            with open(path, "rb") as f:
+                png = f.read()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logging.warning(f"Could not read cached chart '{path}': {e}")
+            return None
+        _remember(key, png)
+    return png
+
+
+def put_png(key: str, png: bytes) -> None:
+    _remember(key, png)
+    if CHART_CACHE_DIR:
+        try:
+            os.makedirs(CHART_CACHE_DIR, exist_ok=True)
+            path = os.path.join(CHART_CACHE_DIR, f"{key}.png")
+            with open(path + ".tmp", "wb") as f:
+                f.write(png)
+            os.replace(path + ".tmp", path)
+            _prune_disk()
+        except OSError as e:
+            logging.warning(f"Could not write chart cache: {e}")
+
+
+def _remember(key: str, png: bytes) -> None:
+    _charts[key] = png
+    _charts.move_to_end(key)
+    while len(_charts) > MAX_CACHED_CHARTS:
+        _charts.popitem(last=False)
+
+
+def _prune_disk() -> None:
+    files = [os.path.join(CHART_CACHE_DIR, name) for name in os.listdir(CHART_CACHE_DIR) if name.endswith(".png")]
+    if len(files) <= MAX_DISK_CHARTS:
+        return
+    files.sort(key=os.path.getmtime)
+    for path in files[:len(files) - MAX_DISK_CHARTS]:
+        os.remove(path)
+
+
+def write_png(key: str, path: str) -> bool:
+    """Copies a cached chart to path. >> return: False if key is not cached"""
+    png = get_png(key)
+    if png is None:
+        return False
+    with open(path, "wb") as f:
+        f.write(png)
+    return True
+
+
+def clear_chart_cache() -> None:
+    """Forgets the in-memory charts (files in GDS_CHART_CACHE_DIR stay)."""
+    _charts.clear()
@@ -1,174 +1,315 @@
 # utils/chart_utils.py
 
 """
-matplotlib charts. 
+matplotlib charts.
+
+>> draw_chart(kind, ax, data, **options) draws one of CHARTS on an existing Axes and returns
+   its artists; update_chart() changes those artists in place (set_height / set_ydata ...)
+   when only the numbers changed >> ui/chart_panel.py keeps one embedded figure this way.
+>> plot_*() are the stand-alone versions (own figure, save_path / show).
+>> Only matplotlib.figure.Figure + Agg are used: no pyplot, so no second GUI loop and
+   no figures left behind in pyplot's registry.
+>> PNG exports (save_path) go through utils.chart_cache: the same chart is rendered once.
 """
-import matplotlib.pyplot as plt
-from typing import Dict, List, Optional, Tuple
+import io
+from typing import Any, Dict, List, Optional, Tuple
 
-def finalize_plot(fig: plt.Figure, save_path: Optional[str] = None, show: bool = True) -> None:
+from matplotlib import colormaps
+from matplotlib.figure import Figure
+
+from utils.chart_cache import chart_key, put_png, write_png
+
+PIE_COLORS = ["#f39c12", "#e67e22", "#e74c3c", "#f06292", "#7dcea0", "#85c1e9"]
+
+
+def new_figure(figsize: Tuple[float, float] = (10, 6), dpi: int = 100) -> Figure:
+    """A figure drawn by Agg (savefig / FigureCanvasTkAgg), not registered with pyplot."""
+    return Figure(figsize=figsize, dpi=dpi)
+
+
+def show_figure(fig: Figure, title: str = "Chart") -> Any:
+    """Opens fig in its own Toplevel of the running Tk app (no second GUI event loop)."""
+    import tkinter
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+    window = tkinter.Toplevel()
+    window.title(title)
+    canvas = FigureCanvasTkAgg(fig, master=window)
+    canvas.draw()
+    canvas.get_tk_widget().pack(fill="both", expand=True)
+    return window
+
+
+def finalize_plot(fig: Figure, save_path: Optional[str] = None, show: bool = True) -> None:
     """
-    
-    
+
+
     fig: The matplotlib Figure object.
     save_path:  saves the figure to this file path.
-    show: If True, displays the plot; otherwise, closes the figure.
+    show: If True, displays the plot in a Toplevel window (see show_figure).
     """
     if save_path:
         fig.savefig(save_path, bbox_inches='tight')
     if show:
-        plt.show()
-    else:
-        plt.close(fig)
+        show_figure(fig)
 
-def plot_sales_bar_chart(
-    data: Dict[str, float],
-    figsize: Tuple[int, int] = (12, 6),
-    save_path: Optional[str] = None,
-    show: bool = True
-) -> None:
-    """
-    Creates a vertical bar chart of sales per Branch-Good combo.
-    """
-    if not data:
-        print("No data to plot.")
-        return
-
-    labels = list(data.keys())
-    values = list(data.values())
-
-    fig, ax = plt.subplots(figsize=figsize)
-    bars = ax.bar(labels, values, color="#3498db")
 
+# Drawing on an existing Axes
+def _label_bars(ax: Any, bars: Any, horizontal: bool = False, fontsize: int = 10) -> List[Any]:
+    texts = []
     for bar in bars:
-        height = bar.get_height()
-        ax.annotate(
-            f'{height:.1f}',
-            xy=(bar.get_x() + bar.get_width() / 2, height),
-            xytext=(0, 3),
-            textcoords="offset points",
-            ha='center',
-            fontsize=10
-        )
-
+        if horizontal:
+            width = bar.get_width()
+            texts.append(ax.annotate(f'{width:.1f}', xy=(width, bar.get_y() + bar.get_height() / 2),
+                                     xytext=(5, 0), textcoords="offset points", ha='left', va='center',
+                                     fontsize=fontsize))
+        else:
+            height = bar.get_height()
+            texts.append(ax.annotate(f'{height:.1f}', xy=(bar.get_x() + bar.get_width() / 2, height),
+                                     xytext=(0, 3), textcoords="offset points", ha='center',
+                                     fontsize=fontsize))
+    return texts
+
+
+def _draw_sales_bar(ax: Any, data: Dict[str, float]) -> Dict:
+    """Vertical bar chart of sales per Branch-Good combo."""
+    bars = ax.bar(list(data.keys()), list(data.values()), color="#3498db")
+    texts = _label_bars(ax, bars)
     ax.set_title("Sales by Branch and Product", fontsize=16, fontweight="bold")
     ax.set_xlabel("Branch - Good", fontsize=12)
     ax.set_ylabel("Total Sold", fontsize=12)
     ax.tick_params(axis='x', labelrotation=30)
     ax.grid(axis='y', linestyle="--", alpha=0.7)
-    fig.tight_layout()
+    return {"bars": [list(bars)], "texts": texts}
+
+
+def _draw_sales_horizontal(ax: Any, data: Dict[str, float]) -> Dict:
+    """Horizontal bar chart of sales per Branch-Good combo."""
+    bars = ax.barh(list(data.keys()), list(data.values()), color="#2ecc71")
+    texts = _label_bars(ax, bars, horizontal=True)
+    ax.set_title("Horizontal View - Sales Performance", fontsize=16, weight="bold")
+    ax.set_xlabel("Total Sold", fontsize=12)
+    ax.set_ylabel("Branch - Good", fontsize=12)
+    ax.grid(axis='x', linestyle="--", alpha=0.7)
+    return {"bars": [list(bars)], "texts": texts}
+
+
+def _draw_sales_pie(ax: Any, data: Dict[str, float]) -> Dict:
+    """Pie chart showing percentage sales distribution."""
+    ax.pie(
+        list(data.values()),
+        labels=list(data.keys()),
+        autopct='%1.1f%%',
+        startangle=140,
+        textprops={'fontsize': 10},
+        colors=PIE_COLORS
+    )
+    ax.set_title("Sales Distribution by Branch-Product", fontsize=14, weight="bold")
+    return {}
 
+
+def _draw_sales_vertical(ax: Any, data: Dict[str, float]) -> Dict:
+    """Vertical bar chart for sales performance by Branch-Good combo (compact labels)."""
+    bars = ax.bar(list(data.keys()), list(data.values()), color="#3498db")
+    texts = _label_bars(ax, bars, fontsize=9)
+    ax.set_title("Sales Performance by Branch", fontsize=14, fontweight='bold')
+    ax.set_xlabel("Branch - Good", fontsize=12)
+    ax.set_ylabel("Total Sold", fontsize=12)
+    ax.tick_params(axis='x', labelrotation=45, labelsize=9)
+    for label in ax.get_xticklabels():
+        label.set_horizontalalignment("right")
+    ax.grid(axis="y", linestyle="--", alpha=0.7)
+    return {"bars": [list(bars)], "texts": texts}
+
+
+def _draw_stacked_bar(ax: Any, data: Dict[str, Dict[str, float]], title: str = "Stacked Bar Chart") -> Dict:
+    """Stacked bars: data maps each label to a dictionary of subcategory values."""
+    labels = list(data.keys())
+    colors = colormaps["Set3"].colors
+    series = []
+    bottom = [0] * len(labels)
+    for i, sub in enumerate(_subcategories(data)):
+        values = [data[label].get(sub, 0) for label in labels]
+        series.append(list(ax.bar(labels, values, label=sub, bottom=bottom, color=colors[i % len(colors)])))
+        bottom = [sum(x) for x in zip(bottom, values)]
+
+    ax.set_title(title, fontsize=14, fontweight='bold')
+    ax.set_ylabel("Quantity", fontsize=12)
+    ax.set_xlabel("Branch", fontsize=12)
+    ax.legend()
+    ax.tick_params(axis='x', labelrotation=45)
+    ax.grid(axis="y", linestyle="--", alpha=0.6)
+    return {"bars": series, "texts": []}
+
+
+def _draw_line(ax: Any, data: Dict[str, List[float]], x_labels: List[str], title: str = "Line Chart",
+               ylabel: str = "Quantity") -> Dict:
+    """Line chart for the given time series data (one line per key)."""
+    styles = ["-o", "-s", "-^", "-*"]
+    lines = []
+    for i, (label, values) in enumerate(data.items()):
+        lines += ax.plot(x_labels, values, styles[i % len(styles)], label=label)
+
+    ax.set_title(title, fontsize=14, fontweight='bold')
+    ax.set_xlabel("Time", fontsize=12)
+    ax.set_ylabel(ylabel, fontsize=12)
+    ax.tick_params(axis='x', labelrotation=45)
+    ax.grid(True, linestyle="--", alpha=0.6)
+    ax.legend()
+    return {"lines": lines}
+
+
+def _subcategories(data: Dict[str, Dict[str, float]]) -> List[str]:
+    return list(next(iter(data.values())).keys()) if data else []
+
+
+# kind >> draw function; "in_place" kinds can be updated without re-creating their artists
+CHARTS = {
+    "sales_bar": _draw_sales_bar,
+    "sales_horizontal": _draw_sales_horizontal,
+    "sales_pie": _draw_sales_pie,
+    "sales_vertical": _draw_sales_vertical,
+    "stacked_bar": _draw_stacked_bar,
+    "line": _draw_line,
+}
+IN_PLACE_KINDS = {"sales_bar", "sales_horizontal", "sales_vertical", "stacked_bar", "line"}
+
+
+def chart_shape(kind: str, data: Dict, **options: Any) -> tuple:
+    """What must stay the same for update_chart to work: the labels / series names."""
+    if kind == "stacked_bar":
+        return tuple(data), tuple(_subcategories(data))
+    if kind == "line":
+        return tuple(options.get("x_labels", ())), tuple(data)
+    return tuple(data)
+
+
+def draw_chart(kind: str, ax: Any, data: Dict, **options: Any) -> Dict:
+    """
+    Draws chart `kind` (see CHARTS) on ax.
+    >> return: handles for update_chart (its artists and the shape of the data)
+    """
+    handles = CHARTS[kind](ax, data, **options)
+    handles.update(kind=kind, shape=chart_shape(kind, data, **options))
+    return handles
+
+
+def update_chart(handles: Dict, ax: Any, data: Dict, **options: Any) -> bool:
+    """
+    Moves the existing artists of a draw_chart() result to the new numbers.
+    >> return: False (nothing touched) when the chart has to be drawn again instead
+       (pie chart, other labels or series)
+    """
+    kind = handles["kind"]
+    if kind not in IN_PLACE_KINDS or chart_shape(kind, data, **options) != handles["shape"]:
+        return False
+
+    if kind == "line":
+        for line, values in zip(handles["lines"], data.values()):
+            line.set_ydata(values)
+    else:
+        horizontal = kind == "sales_horizontal"
+        if kind == "stacked_bar":
+            series = [[data[label].get(sub, 0) for label in data] for sub in handles["shape"][1]]
+        else:
+            series = [list(data.values())]
+        bottom = [0] * len(data)
+        for bars, values in zip(handles["bars"], series):
+            for bar, value, base in zip(bars, values, bottom):
+                if horizontal:
+                    bar.set_width(value)
+                else:
+                    bar.set_y(base)
+                    bar.set_height(value)
+            bottom = [sum(x) for x in zip(bottom, values)]
+        for bar, text in zip(handles["bars"][0], handles["texts"]):
+            if horizontal:
+                text.xy = (bar.get_width(), bar.get_y() + bar.get_height() / 2)
+                text.set_text(f'{bar.get_width():.1f}')
+            else:
+                text.xy = (bar.get_x() + bar.get_width() / 2, bar.get_height())
+                text.set_text(f'{bar.get_height():.1f}')
+
+    if "title" in options:
+        ax.set_title(options["title"], fontsize=14, fontweight='bold')
+    if "ylabel" in options:
+        ax.set_ylabel(options["ylabel"], fontsize=12)
+    ax.relim()
+    ax.autoscale_view()
+    return True
+
+
+# Stand-alone charts (own figure)
+def _plot(kind: str, data: Dict, figsize: Tuple[int, int], save_path: Optional[str], show: bool,
+          **options: Any) -> Optional[Figure]:
+    """Returns the figure, or None when a PNG export was served from the chart cache."""
+    if not data:
+        print("No data to plot.")
+        return None
+    fig_dpi = 100
+    png_export = bool(save_path) and save_path.lower().endswith(".png")
+    key = chart_key(kind, data, (figsize[0] * fig_dpi, figsize[1] * fig_dpi), export="tight", **options)
+    if png_export and not show and write_png(key, save_path):
+        return None
+
+    fig = new_figure(figsize, fig_dpi)
+    draw_chart(kind, fig.add_subplot(111), data, **options)
+    fig.tight_layout()
+    if png_export:
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="png", bbox_inches='tight')
+        put_png(key, buffer.getvalue())
+        write_png(key, save_path)
+        save_path = None
     finalize_plot(fig, save_path=save_path, show=show)
+    return fig
 
-def plot_sales_horizontal_chart(
+
+def plot_sales_bar_chart(
     data: Dict[str, float],
     figsize: Tuple[int, int] = (12, 6),
     save_path: Optional[str] = None,
     show: bool = True
-) -> None:
+) -> Optional[Figure]:
     """
-    Creates a horizontal bar chart of sales per Branch-Good combo.
-    
+    Creates a vertical bar chart of sales per Branch-Good combo.
     """
-    if not data:
-        print("No data to plot.")
-        return
-
-    labels = list(data.keys())
-    values = list(data.values())
+    return _plot("sales_bar", data, figsize, save_path, show)
 
-    fig, ax = plt.subplots(figsize=figsize)
-    bars = ax.barh(labels, values, color="#2ecc71")
-
-    for bar in bars:
-        width = bar.get_width()
-        ax.annotate(
-            f'{width:.1f}',
-            xy=(width, bar.get_y() + bar.get_height() / 2),
-            xytext=(5, 0),
-            textcoords="offset points",
-            ha='left',
-            va='center',
-            fontsize=10
-        )
-
-    ax.set_title("Horizontal View - Sales Performance", fontsize=16, weight="bold")
-    ax.set_xlabel("Total Sold", fontsize=12)
-    ax.set_ylabel("Branch - Good", fontsize=12)
-    ax.grid(axis='x', linestyle="--", alpha=0.7)
-    fig.tight_layout()
+def plot_sales_horizontal_chart(
+    data: Dict[str, float],
+    figsize: Tuple[int, int] = (12, 6),
+    save_path: Optional[str] = None,
+    show: bool = True
+) -> Optional[Figure]:
+    """
+    Creates a horizontal bar chart of sales per Branch-Good combo.
 
-    finalize_plot(fig, save_path=save_path, show=show)
+    """
+    return _plot("sales_horizontal", data, figsize, save_path, show)
 
 def plot_sales_pie_chart(
     data: Dict[str, float],
     figsize: Tuple[int, int] = (8, 8),
     save_path: Optional[str] = None,
     show: bool = True
-) -> None:
+) -> Optional[Figure]:
     """
     Creates a pie chart showing percentage sales distribution.
-    
-    """
-    if not data:
-        print("No data to plot.")
-        return
 
-    labels = list(data.keys())
-    values = list(data.values())
-
-    fig, ax = plt.subplots(figsize=figsize)
-    ax.pie(
-        values,
-        labels=labels,
-        autopct='%1.1f%%',
-        startangle=140,
-        textprops={'fontsize': 10},
-        colors=["#f39c12", "#e67e22", "#e74c3c", "#f06292", "#7dcea0", "#85c1e9"]
-    )
-    ax.set_title("Sales Distribution by Branch-Product", fontsize=14, weight="bold")
-    plt.tight_layout()
-
-    finalize_plot(fig, save_path=save_path, show=show)
+    """
+    return _plot("sales_pie", data, figsize, save_path, show)
 
 def plot_sales_chart(
     data: Dict[str, float],
     figsize: Tuple[int, int] = (10, 6),
     save_path: Optional[str] = None,
     show: bool = True
-) -> None:
+) -> Optional[Figure]:
     """
     Creates a vertical bar chart for sales performance by Branch-Good combo.
     """
-    if not data:
-        print("No data to plot.")
-        return
-
-    labels = list(data.keys())
-    values = list(data.values())
-
-    fig = plt.figure(figsize=figsize)
-    ax = fig.add_subplot(111)
-    bars = ax.bar(labels, values, color="#3498db")
-
-    for bar in bars:
-        yval = bar.get_height()
-        ax.text(
-            bar.get_x() + bar.get_width() / 2.0,
-            yval + 0.5,
-            f"{yval:.1f}",
-            ha='center',
-            fontsize=9
-        )
-
-    ax.set_title("Sales Performance by Branch", fontsize=14, fontweight='bold')
-    ax.set_xlabel("Branch - Good", fontsize=12)
-    ax.set_ylabel("Total Sold", fontsize=12)
-    plt.xticks(rotation=45, ha="right", fontsize=9)
-    ax.grid(axis="y", linestyle="--", alpha=0.7)
-    plt.tight_layout()
-
-    finalize_plot(fig, save_path=save_path, show=show)
+    return _plot("sales_vertical", data, figsize, save_path, show)
 
 def plot_stacked_bar_chart(
     data: Dict[str, Dict[str, float]],
@@ -176,37 +317,12 @@ def plot_stacked_bar_chart(
     figsize: Tuple[int, int] = (10, 6),
     save_path: Optional[str] = None,
     show: bool = True
-) -> None:
+) -> Optional[Figure]:
     """
     Creates a stacked bar chart. The input data should be a dictionary mapping each label to a dictionary of subcategory values.
-    
-    """
-    if not data:
-        print("No data to plot.")
-        return
-
-    labels = list(data.keys())
-    subcategories = list(next(iter(data.values())).keys())
-    bar_data = {sub: [data[label].get(sub, 0) for label in labels] for sub in subcategories}
 
-    fig, ax = plt.subplots(figsize=figsize)
-    bottom = [0] * len(labels)
-    colors = plt.cm.Set3.colors
-
-    for i, sub in enumerate(subcategories):
-        values = bar_data[sub]
-        ax.bar(labels, values, label=sub, bottom=bottom, color=colors[i % len(colors)])
-        bottom = [sum(x) for x in zip(bottom, values)]
-
-    ax.set_title(title, fontsize=14, fontweight='bold')
-    ax.set_ylabel("Quantity", fontsize=12)
-    ax.set_xlabel("Branch", fontsize=12)
-    ax.legend()
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    ax.grid(axis="y", linestyle="--", alpha=0.6)
-
-    finalize_plot(fig, save_path=save_path, show=show)
+    """
+    return _plot("stacked_bar", data, figsize, save_path, show, title=title)
 
 def plot_line_chart(
     data: Dict[str, List[float]],
@@ -216,26 +332,9 @@ def plot_line_chart(
     figsize: Tuple[int, int] = (10, 6),
     save_path: Optional[str] = None,
     show: bool = True
-) -> None:
+) -> Optional[Figure]:
     """
     Creates a line chart for the given time series data.
-    
-    """
-    if not data:
-        print("No data to plot.")
-        return
 
-    plt.figure(figsize=figsize)
-    styles = ["-o", "-s", "-^", "-*"]
-    for i, (label, values) in enumerate(data.items()):
-        plt.plot(x_labels, values, styles[i % len(styles)], label=label)
-
-    plt.title(title, fontsize=14, fontweight='bold')
-    plt.xlabel("Time", fontsize=12)
-    plt.ylabel(ylabel, fontsize=12)
-    plt.xticks(rotation=45)
-    plt.grid(True, linestyle="--", alpha=0.6)
-    plt.legend()
-    plt.tight_layout()
-
-    finalize_plot(plt.gcf(), save_path=save_path, show=show)
+    """
+    return _plot("line", data, figsize, save_path, show, x_labels=x_labels, title=title, ylabel=ylabel)
@@ -1,5 +1,3 @@
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from tkinter import messagebox
 
 def error(text):
@@ -10,6 +8,9 @@ def error(text):
 
 
 def add_graphs(cur, frame):
+    import matplotlib.pyplot as plt  # matplotlib only loads when graphs are drawn
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
     plt.style.use("dark_background")
     for param in ['text.color', 'axes.labelcolor', 'xtick.color', 'ytick.color']:
         plt.rcParams[param] = '0.9'
@@ -0,0 +1,92 @@
+# utils/image_cache.py
+
+"""
+Background images, decoded and resized once.
+
+>> get_background(path, size) returns a ready CTkImage; the same (path, size) gives back the
+   same object, so opening a screen again (or toggling the theme back) does no image work at all.
+>> The last MAX_CACHED_IMAGES images stay in memory (least recently used is dropped first).
+>> Resized copies are also saved as PNG in IMAGE_CACHE_DIR, named after the source path, the size
+   and the source mtime >> the next start skips the full-size JPEG decode, and editing the
+   source image makes a fresh copy. GDS_IMAGE_CACHE_DIR="" turns the disk copies off.
+"""
+
+import hashlib
+import logging
+import os
+from collections import OrderedDict
+from typing import Tuple
+
+import customtkinter as ctk
+
+MAX_CACHED_IMAGES = 8
+IMAGE_CACHE_DIR = os.environ.get("GDS_IMAGE_CACHE_DIR", os.path.join("database", "image_cache"))
+
+# (path, size) >> (source mtime, CTkImage)
+_images: "OrderedDict[Tuple[str, Tuple[int, int]], Tuple[int, ctk.CTkImage]]" = OrderedDict()
+
+
+def _disk_name(path: str, size: Tuple[int, int]) -> str:
+    stem = os.path.splitext(os.path.basename(path))[0]
+    digest = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()[:10]
+    return f"{stem}-{digest}-{size[0]}x{size[1]}"
+
+
+def _load_resized(path: str, size: Tuple[int, int], mtime: int):
+    from PIL import Image  # only needed on a miss
+
+    name = _disk_name(path, size)
+    cached = os.path.join(IMAGE_CACHE_DIR, f"{name}-{mtime}.png") if IMAGE_CACHE_DIR else None
+    if cached and os.path.exists(cached):
+        try:
+            with Image.open(cached) as image:
+                image.load()
+                return image.copy()
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable cached image '{cached}': {e}")
+
+    with Image.open(path) as source:
+        # draft() lets the JPEG decoder scale down while decoding (no-op for other formats)
+        source.draft("RGB", size)
+        image = source.convert("RGB").resize(size)
+
+    if cached:
+        try:
+            os.makedirs(IMAGE_CACHE_DIR, exist_ok=True)
+            # copies made from an older version of the source are no longer needed
+            for old in os.listdir(IMAGE_CACHE_DIR):
+                if old.startswith(name + "-"):
+                    os.remove(os.path.join(IMAGE_CACHE_DIR, old))
+            temp = cached + ".tmp"
+            image.save(temp, format="PNG", compress_level=1)
+            os.replace(temp, cached)
+        except OSError as e:
+            logging.warning(f"Could not write image cache '{cached}': {e}")
+    return image
+
+
+def get_background(path: str, size: Tuple[int, int]) -> ctk.CTkImage:
+    """
+    >> path: image file (any format PIL reads)
+    >> size: (width, height) to display it at
+    >> return: CTkImage of the resized image (raises like Image.open if the file is missing)
+    """
+    path, size = str(path), (int(size[0]), int(size[1]))
+    key = (path, size)
+    mtime = os.stat(path).st_mtime_ns
+    entry = _images.get(key)
+    if entry is not None and entry[0] == mtime:
+        _images.move_to_end(key)
+        return entry[1]
+
+    image = ctk.CTkImage(dark_image=_load_resized(path, size, mtime), size=size)
+    _images[key] = (mtime, image)
+    _images.move_to_end(key)
+    while len(_images) > MAX_CACHED_IMAGES:
+        _images.popitem(last=False)
+    return image
+
+
+def clear_image_cache() -> None:
+    """Forgets the in-memory images (the PNG copies on disk stay)."""
+    _images.clear()
@@ -0,0 +1,28 @@
+# utils/row_diff.py
+
+"""
+Keyed diff of two row sets, for refreshing lists in place instead of rebuilding them.
+
+>> old: {key: row} of what is on screen now
+>> new: the freshly fetched rows
+>> only the returned added / changed / removed rows need widget work
+"""
+
+from typing import Callable, Dict, Hashable, Iterable, List, Tuple
+
+
+def diff_rows(old: Dict[Hashable, tuple], new: Iterable[tuple],
+              key: Callable[[tuple], Hashable] = lambda row: row[0]) -> Tuple[List[tuple], List[tuple], List[Hashable]]:
+    """
+    >> return: (added rows, changed rows, removed keys); added/changed keep the order of new
+    """
+    added, changed, seen = [], [], set()
+    for row in new:
+        k = key(row)
+        seen.add(k)
+        if k not in old:
+            added.append(row)
+        elif old[k] != row:
+            changed.append(row)
+    removed = [k for k in old if k not in seen]
+    return added, changed, removed